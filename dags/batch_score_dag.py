@@ -0,0 +1,30 @@
+import sys
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+
+# Add src to Python path
+sys.path.insert(0, "/opt/airflow/src")
+sys.path.insert(0, "/opt/airflow")
+
+from src.entrypoints import lazy_main
+
+batch_score_main = lazy_main("src.models.batch_score")
+
+default_args = {"owner": "airflow", "retries": 1, "retry_delay": timedelta(minutes=5)}
+
+with DAG(
+    dag_id="batch_score_dag",
+    default_args=default_args,
+    schedule_interval=None,
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+    description=(
+        "Score the configured parquet dataset with the Production champion; "
+        "retries resume from the last finished chunk"
+    ),
+) as dag:
+    t_score = PythonOperator(task_id="batch_score", python_callable=batch_score_main)
+
+    t_score
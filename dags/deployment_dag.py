@@ -8,7 +8,9 @@ from airflow.operators.python import PythonOperator
 sys.path.insert(0, "/opt/airflow/src")
 sys.path.insert(0, "/opt/airflow")
 
-from src.deployment.promote import main as promote_main
+from src.entrypoints import lazy_main
+
+promote_main = lazy_main("src.deployment.promote")
 
 default_args = {"owner": "airflow", "retries": 1, "retry_delay": timedelta(minutes=2)}
 
@@ -18,7 +20,10 @@ with DAG(
     schedule_interval=None,
     start_date=datetime(2025, 1, 1),
     catchup=False,
-    description="Register & promote model to Production if thresholds pass; trigger API reload",
+    description=(
+        "Register & promote model to Production if thresholds pass; reload API. With shadow "
+        "gating the run is staged instead and shadow_gate_dag promotes it"
+    ),
 ) as dag:
     t_promote = PythonOperator(task_id="promote_and_reload", python_callable=promote_main)
 
@@ -2,14 +2,18 @@ import sys
 from datetime import datetime, timedelta
 
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
+from airflow.operators.trigger_dagrun import TriggerDagRunOperator
 
 # Add src to Python path
 sys.path.insert(0, "/opt/airflow/src")
 sys.path.insert(0, "/opt/airflow")
 
-from src.data.simulate_drift import main as simulate_drift_main
-from src.monitoring.generate_drift import main as drift_report_main
+from src.entrypoints import lazy_main
+
+simulate_drift_main = lazy_main("src.data.simulate_drift")
+drift_report_main = lazy_main("src.monitoring.generate_drift")
+retrain_policy_main = lazy_main("src.monitoring.retrain_policy")
 
 default_args = {"owner": "airflow", "retries": 1, "retry_delay": timedelta(minutes=2)}
 
@@ -19,9 +23,16 @@ with DAG(
     schedule_interval="@hourly",
     start_date=datetime(2025, 1, 1),
     catchup=False,
-    description="Hourly drift simulation & reporting with Evidently",
+    description=(
+        "Hourly drift simulation & reporting with Evidently; triggers training_dag when the "
+        "retraining policy fires"
+    ),
 ) as dag:
     t_simulate = PythonOperator(task_id="simulate_current", python_callable=simulate_drift_main)
     t_drift = PythonOperator(task_id="generate_drift_reports", python_callable=drift_report_main)
 
-    t_simulate >> t_drift
+    # Skips the trigger (not a failure) when the policy decides against retraining
+    t_policy = ShortCircuitOperator(task_id="retrain_policy", python_callable=retrain_policy_main)
+    t_trigger = TriggerDagRunOperator(task_id="trigger_training", trigger_dag_id="training_dag")
+
+    t_simulate >> t_drift >> t_policy >> t_trigger
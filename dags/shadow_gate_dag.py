@@ -0,0 +1,38 @@
+import sys
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import ShortCircuitOperator
+
+# Add src to Python path
+sys.path.insert(0, "/opt/airflow/src")
+sys.path.insert(0, "/opt/airflow")
+
+from src.entrypoints import lazy_main
+
+evaluate_challenger = lazy_main("src.deployment.promote", "evaluate_challenger")
+
+default_args = {"owner": "airflow", "retries": 1, "retry_delay": timedelta(minutes=2)}
+
+with DAG(
+    dag_id="shadow_gate_dag",
+    default_args=default_args,
+    schedule_interval="@hourly",
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    description=(
+        "Hourly re-evaluation of the challenger deployment_dag staged: promotes it once its "
+        "shadow predictions agree with the champion"
+    ),
+) as dag:
+    # Skips `promoted` (not a failure) while there is no challenger or too few shadow samples;
+    # fails, without retrying, when the comparison fails (the challenger is archived) or the
+    # rollout fails (Production is restored), since a retry would find nothing staged
+    t_gate = ShortCircuitOperator(
+        task_id="shadow_gate", python_callable=evaluate_challenger, retries=0
+    )
+    t_promoted = EmptyOperator(task_id="promoted")
+
+    t_gate >> t_promoted
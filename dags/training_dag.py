@@ -9,10 +9,16 @@ from airflow.operators.python import PythonOperator
 sys.path.insert(0, "/opt/airflow/src")
 sys.path.insert(0, "/opt/airflow")
 
-from src.data.get_data import main as get_data_main
-from src.features.transform import main as transform_main
-from src.models.train import main as train_main
-from src.models.validate import main as validate_main
+from src.entrypoints import lazy_main
+
+get_data_main = lazy_main("src.data.get_data")
+quality_main = lazy_main("src.data.quality")
+transform_main = lazy_main("src.features.transform")
+compact_main = lazy_main("src.models.compact")
+train_main = lazy_main("src.models.train")
+validate_main = lazy_main("src.models.validate")
+# Commits the retraining policy's pending trigger only once the whole run has succeeded
+record_retrain = lazy_main("src.monitoring.retrain_policy", "record_retrain")
 
 default_args = {
     "owner": "airflow",
@@ -24,14 +30,21 @@ default_args = {
 with DAG(
     dag_id="training_dag",
     default_args=default_args,
-    schedule_interval="@daily",
+    # Triggered by drift_dag when the retraining policy fires (drift or new data)
+    schedule_interval=None,
     start_date=datetime(2025, 1, 1),
     catchup=False,
-    description="Daily training pipeline: ingest -> transform -> train -> validate",
+    description=(
+        "Training pipeline: ingest -> transform -> data quality -> train -> validate -> compact"
+    ),
 ) as dag:
     t_ingest = PythonOperator(task_id="ingest", python_callable=get_data_main)
     t_transform = PythonOperator(task_id="transform", python_callable=transform_main)
+    # Hard data-quality violations fail here, before any CPU is spent on training
+    t_quality = PythonOperator(task_id="data_quality", python_callable=quality_main, retries=0)
     t_train = PythonOperator(task_id="train", python_callable=train_main)
     t_validate = PythonOperator(task_id="validate", python_callable=validate_main)
+    t_compact = PythonOperator(task_id="compact", python_callable=compact_main)
+    t_record = PythonOperator(task_id="record_retrain", python_callable=record_retrain)
 
-    t_ingest >> t_transform >> t_train >> t_validate
+    t_ingest >> t_transform >> t_quality >> t_train >> t_validate >> t_compact >> t_record
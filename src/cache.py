@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from src.config import Config
+
+log = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".cache.json"
+
+
+def file_sha256(path: str | Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(chunk), b""):
+            h.update(part)
+    return h.hexdigest()
+
+
+def config_hash(cfg: Config, sections: Iterable[str]) -> str:
+    """Hash the given top-level config sections (e.g. ``["data", "features"]``)."""
+    payload = {s: getattr(cfg, s) for s in sections}
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def code_version(*sources: str | Path) -> str:
+    """Code version of a stage: env CODE_VERSION (e.g. git sha) plus a hash of its sources."""
+    h = hashlib.sha256(os.environ.get("CODE_VERSION", "").encode("utf-8"))
+    for src in sources:
+        h.update(Path(src).read_bytes())
+    return h.hexdigest()
+
+
+def stage_key(stage: str, **parts: Any) -> str:
+    blob = json.dumps({"stage": stage, **parts}, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def cache_enabled(cfg: Config) -> bool:
+    return bool(cfg.cache.get("enabled", True))
+
+
+def force_rerun(cfg: Config, stage: str) -> bool:
+    """Force a stage to rerun via env FORCE_RERUN ("1", "all" or "transform,train") or config."""
+    env = os.environ.get("FORCE_RERUN", "").strip().lower()
+    if env in ("1", "true", "all"):
+        return True
+    if stage in {s.strip() for s in env.split(",") if s.strip()}:
+        return True
+    return bool(cfg.cache.get("force", False))
+
+
+def manifest_path(output: str | Path) -> Path:
+    output = Path(output)
+    return output.with_name(output.name + MANIFEST_SUFFIX)
+
+
+def read_manifest(output: str | Path) -> Optional[Dict[str, Any]]:
+    p = manifest_path(output)
+    if not p.exists():
+        return None
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        log.warning("unreadable cache manifest; ignoring", extra={"path": str(p)})
+        return None
+
+
+def write_manifest(output: str | Path, key: str, **extra: Any) -> Path:
+    p = manifest_path(output)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    data = {"key": key, "created_at": datetime.now(timezone.utc).isoformat(), **extra}
+    with open(p, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    return p
+
+
+def decide(cfg: Config, stage: str, key: str, hit: bool) -> str:
+    """Resolve and log the cache decision for a stage: "hit", "miss", "forced" or "disabled"."""
+    if not cache_enabled(cfg):
+        decision = "disabled"
+    elif force_rerun(cfg, stage):
+        decision = "forced"
+    else:
+        decision = "hit" if hit else "miss"
+    log.info("stage cache decision", extra={"stage": stage, "key": key, "decision": decision})
+    return decision
@@ -1,29 +1,369 @@
+import copy
 import logging
 import os
-from dataclasses import dataclass, field
-from typing import Any, Dict
+import threading
+from dataclasses import MISSING, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, Optional, Union, get_args, get_origin
 
 import yaml
 
+log = logging.getLogger(__name__)
+
+# Env overrides: MLOPS__SECTION__KEY=value (value parsed as YAML), e.g.
+# MLOPS__SERVING__INFERENCE__MAX_WORKERS=4. CONFIG_OVERLAY=a.yaml,b.yaml merges files first.
+ENV_PREFIX = "MLOPS__"
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Section(dict):
+    """A typed config section that is still a plain dict (`cfg.paths["raw_dir"]`, `.get`).
+
+    Keys are declared as class annotations; values are also readable as attributes. Unknown
+    keys are rejected so typos fail at load time rather than deep inside a run.
+    """
+
+    REQUIRED: ClassVar[tuple] = ()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @classmethod
+    def declared(cls) -> Dict[str, Any]:
+        hints: Dict[str, Any] = {}
+        for klass in reversed(cls.__mro__):
+            hints.update(
+                {k: v for k, v in getattr(klass, "__annotations__", {}).items() if k[0] != "_"}
+            )
+        return {k: v for k, v in hints.items() if k not in ("REQUIRED",)}
+
+    @classmethod
+    def build(cls, data: Any, where: str, errors: list) -> "Section":
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            errors.append(f"{where}: expected a mapping, got {type(data).__name__}")
+            return cls()
+        declared = cls.declared()
+        n_errors = len(errors)
+        for key in cls.REQUIRED:
+            if key not in data:
+                errors.append(f"{where}.{key}: required")
+        out = cls()
+        for key, value in data.items():
+            if key not in declared:
+                errors.append(f"{where}.{key}: unknown key")
+                continue
+            out[key] = _coerce(value, declared[key], f"{where}.{key}", errors)
+        if len(errors) == n_errors:  # cross-field rules assume well-typed values
+            out.check(where, errors)
+        return out
+
+    def check(self, where: str, errors: list) -> None:
+        """Cross-field rules; subclasses append messages to errors."""
+
+
+def _coerce(value: Any, tp: Any, where: str, errors: list) -> Any:
+    if isinstance(tp, type) and issubclass(tp, Section):
+        return tp.build(value, where, errors)
+    origin = get_origin(tp)
+    if origin is Union:
+        if value is None and type(None) in get_args(tp):
+            return None
+        (tp,) = [a for a in get_args(tp) if a is not type(None)]
+        return _coerce(value, tp, where, errors)
+    expected = origin or tp
+    if expected is Any:
+        return value
+    if expected is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        errors.append(f"{where}: expected {getattr(expected, '__name__', expected)}, got {value!r}")
+    return value
+
+
+class PathsSection(Section):
+    REQUIRED = ("raw_dir", "reference_path", "current_dir", "features_out", "mlruns_dir")
+    raw_dir: str
+    processed_dir: str
+    reference_path: str
+    current_dir: str
+    features_out: str
+    features_dir: Optional[str]
+    mlruns_dir: str
+    shadow_dir: str
+    lookup_dir: str
+    drift_metrics: str
+    predictions_dir: str
+
+
+class DataSection(Section):
+    REQUIRED = ("url",)
+    url: str
+    sample_fraction: float
+    url_template: str
+    months: list
+    source: str
+    synthetic: dict
+
+    def check(self, where, errors):
+        if not 0 < self.get("sample_fraction", 1.0) <= 1:
+            errors.append(f"{where}.sample_fraction: must be in (0, 1]")
+        if self.get("source", "download") not in ("download", "synthetic"):
+            errors.append(f"{where}.source: must be download or synthetic")
+
+
+class FeaturesSection(Section):
+    REQUIRED = ("min_duration_min", "max_duration_min")
+    min_duration_min: float
+    max_duration_min: float
+    zone_aggregates: dict
+
+    def check(self, where, errors):
+        if self.get("min_duration_min", 0) >= self.get("max_duration_min", float("inf")):
+            errors.append(f"{where}: min_duration_min must be below max_duration_min")
+
+
+class ModelSection(Section):
+    REQUIRED = ("hyperparams",)
+    type: str
+    training_mode: str
+    in_memory: dict
+    chunked: dict
+    serialization: dict
+    uncertainty: dict
+    hyperparams: dict
+
+    def check(self, where, errors):
+        if self.get("training_mode", "in_memory") not in ("in_memory", "chunked"):
+            errors.append(f"{where}.training_mode: must be in_memory or chunked")
+
+
+class ThresholdsSection(Section):
+    REQUIRED = ("mae_max",)
+    mae_max: float
+    r2_min: float
+
+
+class MlflowSection(Section):
+    REQUIRED = ("experiment", "model_name")
+    experiment: str
+    model_name: str
+    upload_workers: int
+
+
+class InferenceSection(Section):
+    kind: str
+    max_workers: int
+    max_queue: int
+    retry_after_s: float
+
+    def check(self, where, errors):
+        if self.get("kind", "thread") not in ("thread", "process"):
+            errors.append(f"{where}.kind: must be thread or process")
+        if self.get("max_workers", 1) < 1 or self.get("max_queue", 0) < 0:
+            errors.append(f"{where}: max_workers must be >= 1 and max_queue >= 0")
+
+
+class ShadowSection(Section):
+    enabled: bool
+    stage: str
+    sample_rate: float
+    buffer_rows: int
+    flush_rows: int
+    gate: bool
+    min_samples: int
+    max_mean_abs_diff: float
+
+    def check(self, where, errors):
+        if not 0 <= self.get("sample_rate", 0) <= 1:
+            errors.append(f"{where}.sample_rate: must be in [0, 1]")
+
+
+class PredictionLogSection(Section):
+    enabled: bool
+    max_rows: int
+    flush_rows: int
+    flush_interval_s: float
+
+    def check(self, where, errors):
+        if self.get("flush_rows", 1) < 1 or self.get("max_rows", 1) < self.get("flush_rows", 1):
+            errors.append(f"{where}: need 1 <= flush_rows <= max_rows")
+
+
+class HotReloadSection(Section):
+    enabled: bool
+    interval_s: float
+
+
+class ServingSection(Section):
+    replicas: list
+    rollout: dict
+    shadow: ShadowSection
+    inference: InferenceSection
+    batch: dict
+    lookup: dict
+    hot_reload: HotReloadSection
+    prediction_log: PredictionLogSection
+
 
 @dataclass
 class Config:
     random_state: int
     n_jobs: int
-    paths: Dict[str, Any]
-    data: Dict[str, Any]
-    features: Dict[str, Any]
-    model: Dict[str, Any]
-    validation_thresholds: Dict[str, Any]
-    mlflow: Dict[str, Any]
+    paths: PathsSection
+    data: DataSection
+    features: FeaturesSection
+    model: ModelSection
+    validation_thresholds: ThresholdsSection
+    mlflow: MlflowSection
     logging: Dict[str, Any] = field(default_factory=dict)
+    cache: Dict[str, Any] = field(default_factory=dict)
+    backtest: Dict[str, Any] = field(default_factory=dict)
+    compact: Dict[str, Any] = field(default_factory=dict)
+    serving: ServingSection = field(default_factory=ServingSection)
+    batch_score: Dict[str, Any] = field(default_factory=dict)
+    quality: Dict[str, Any] = field(default_factory=dict)
+    retrain: Dict[str, Any] = field(default_factory=dict)
+    drift: Dict[str, Any] = field(default_factory=dict)
+
+
+def _merge(base: dict, override: dict) -> dict:
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def _env_overrides(environ) -> dict:
+    out: dict = {}
+    for name, raw in environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        keys = name[len(ENV_PREFIX) :].lower().split("__")
+        node = out
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = yaml.safe_load(raw)
+    return out
+
+
+def build_config(raw: dict) -> Config:
+    """Validate a parsed config mapping and return the typed Config, or raise ConfigError."""
+    errors: list = []
+    if not isinstance(raw, dict):
+        raise ConfigError("config: expected a mapping at the top level")
+    known = {f.name: f for f in fields(Config)}
+    kwargs = {}
+    for key, value in raw.items():
+        if key not in known:
+            errors.append(f"{key}: unknown section")
+            continue
+        kwargs[key] = _coerce(value, known[key].type, key, errors)
+    errors += [
+        f"{n}: required"
+        for n, f in known.items()
+        if n not in raw and f.default is MISSING and f.default_factory is MISSING
+    ]
+    if errors:
+        raise ConfigError("Invalid config:\n  " + "\n  ".join(errors))
+    return Config(**kwargs)
+
+
+def _sources(path: str | None) -> list[Path]:
+    cfg_path = Path(path or os.environ.get("CONFIG_PATH", "config.yaml"))
+    overlays = [Path(p) for p in os.environ.get("CONFIG_OVERLAY", "").split(",") if p.strip()]
+    return [cfg_path, *overlays]
+
+
+def _fingerprint(sources: list[Path]) -> tuple:
+    stamps = []
+    for src in sources:
+        st = src.stat()
+        stamps.append((str(src.resolve()), st.st_mtime_ns, st.st_size))
+    env = sorted((k, v) for k, v in os.environ.items() if k.startswith(ENV_PREFIX))
+    return tuple(stamps), tuple(env)
+
+
+_cache: Dict[tuple, Config] = {}
+_cache_lock = threading.Lock()
 
 
 def load_config(path: str | None = None) -> Config:
-    cfg_path = path or os.environ.get("CONFIG_PATH", "config.yaml")
-    with open(cfg_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
-    return Config(**cfg)
+    """Layered config: config.yaml < CONFIG_OVERLAY files < MLOPS__* env vars.
+
+    Parsed and validated once per file version; each call returns its own copy, so callers
+    may modify it without affecting others.
+    """
+    sources = _sources(path)
+    key = _fingerprint(sources)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is None:
+        raw: dict = {}
+        for src in sources:
+            with open(src, "r", encoding="utf-8") as f:
+                _merge(raw, yaml.safe_load(f) or {})
+        _merge(raw, _env_overrides(os.environ))
+        cached = build_config(raw)
+        with _cache_lock:
+            _cache.clear()  # keep only the current version
+            _cache[key] = cached
+    return copy.deepcopy(cached)
+
+
+class ConfigWatcher:
+    """Polls the config sources and calls on_change(cfg) with each new valid version.
+
+    Invalid edits are logged and skipped; the previous config stays in effect.
+    """
+
+    def __init__(
+        self, on_change: Callable[[Config], None], path: str | None = None, interval_s=2.0
+    ):
+        self.on_change = on_change
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = _fingerprint(_sources(path))
+
+    def poll(self) -> bool:
+        try:
+            current = _fingerprint(_sources(self.path))
+            if current == self._last:
+                return False
+            self._last = current
+            cfg = load_config(self.path)
+        except (OSError, yaml.YAMLError, ConfigError) as exc:
+            log.error("config reload rejected; keeping current config", extra={"error": str(exc)})
+            return False
+        self.on_change(cfg)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.poll()
+
+    def start(self) -> "ConfigWatcher":
+        self._thread = threading.Thread(target=self._run, name="config-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
 
 
 def get_tracking_uri(cfg: Config) -> str:
@@ -21,11 +21,15 @@ def download_file(url: str, out_path: Path, chunk: int = 1 << 20):
     log.info("download complete", extra={"out": str(out_path), "size": out_path.stat().st_size})
 
 
-def main():
-    cfg = load_config()
-    setup_logging(cfg)
-    url = cfg.data["url"]
-    raw_dir = Path(cfg.paths["raw_dir"])
+def source_urls(cfg) -> list[str]:
+    """Single `data.url`, or one URL per entry of `data.months` via `data.url_template`."""
+    months = cfg.data.get("months") or []
+    if months:
+        return [cfg.data["url_template"].format(month=m) for m in months]
+    return [cfg.data["url"]]
+
+
+def fetch(url: str, raw_dir: Path) -> str:
     out = raw_dir / url.split("/")[-1]
     if out.exists():
         log.warning("raw file exists; skipping download", extra={"path": str(out)})
@@ -39,5 +43,18 @@ def main():
     return str(out)
 
 
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    raw_dir = Path(cfg.paths["raw_dir"])
+    if cfg.data.get("source", "download") == "synthetic":
+        from src.data.synthetic import generate
+
+        paths = generate(cfg, raw_dir)
+    else:
+        paths = [fetch(url, raw_dir) for url in source_urls(cfg)]
+    return paths[0] if len(paths) == 1 else paths
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.config import get_tracking_uri, load_config
+from src.logging_utils import setup_logging
+
+log = logging.getLogger(__name__)
+
+HARD, SOFT = "hard", "soft"
+
+
+def rule_columns(rules: list[dict]) -> list[str]:
+    cols = []
+    for rule in rules:
+        for c in rule.get("columns") or [rule.get("column")]:
+            if c and c not in cols:
+                cols.append(c)
+    return cols
+
+
+def _count_true(mask: pa.ChunkedArray | pa.Array) -> int:
+    # Nulls are neither violations nor passes here; null_rate rules cover them
+    return int(pc.sum(mask).as_py() or 0)
+
+
+def _violations(rule: dict, batch: pa.Table) -> int:
+    kind = rule["type"]
+    if kind == "range":
+        col = batch[rule["column"]]
+        bad = 0
+        if rule.get("min") is not None:
+            bad += _count_true(pc.less(col, rule["min"]))
+        if rule.get("max") is not None:
+            bad += _count_true(pc.greater(col, rule["max"]))
+        return bad
+    if kind == "domain":
+        col = batch[rule["column"]]
+        allowed = pa.array(rule["values"], type=col.type)
+        # is_in reports nulls as "not in the domain"; mask them out (null_rate rules count them)
+        outside = pc.invert(pc.is_in(col, value_set=allowed))
+        return _count_true(pc.and_(pc.is_valid(col), outside))
+    if kind == "order":
+        first, second = rule["columns"]
+        return _count_true(pc.greater(batch[first], batch[second]))
+    return 0
+
+
+def _update(rule: dict, batch: pa.Table, state: dict) -> None:
+    kind = rule["type"]
+    if kind in ("range", "domain", "order"):
+        state["violations"] = state.get("violations", 0) + _violations(rule, batch)
+    elif kind == "null_rate":
+        state["nulls"] = state.get("nulls", 0) + batch[rule["column"]].null_count
+    elif kind == "freshness":
+        latest = pc.max(batch[rule["column"]]).as_py()
+        if latest is not None and (state.get("latest") is None or latest > state["latest"]):
+            state["latest"] = latest
+
+
+def _finalize(rule: dict, state: dict, rows: int) -> Dict[str, Any]:
+    kind = rule["type"]
+    if kind == "row_count":
+        observed, ok = rows, rule.get("min", 0) <= rows <= rule.get("max", float("inf"))
+    elif kind == "null_rate":
+        observed = state.get("nulls", 0) / rows if rows else 0.0
+        ok = observed <= rule.get("max", 0.0)
+    elif kind == "freshness":
+        latest = state.get("latest")
+        as_of = datetime.fromisoformat(rule["as_of"]) if rule.get("as_of") else datetime.now()
+        observed = (as_of - latest).total_seconds() / 86400 if latest else None
+        ok = latest is not None and as_of - latest <= timedelta(days=rule["max_age_days"])
+    else:
+        observed = state.get("violations", 0) / rows if rows else 0.0
+        ok = observed <= rule.get("max_violation_rate", 0.0)
+    return {"observed": observed, "passed": bool(ok)}
+
+
+def evaluate(files: list[Path], rules: list[dict], batch_rows: int = 500_000) -> dict:
+    """Evaluate all rules over the files in one streaming pass of record batches."""
+    wanted = rule_columns(rules)
+    states: list[dict] = [{} for _ in rules]
+    missing: set = set()
+    rows = 0
+    for path in files:
+        pf = pq.ParquetFile(path)
+        names = set(pf.schema_arrow.names)
+        missing |= {c for c in wanted if c not in names}
+        columns = [c for c in wanted if c in names]
+        for batch in pf.iter_batches(batch_rows, columns=columns):
+            table = pa.Table.from_batches([batch])
+            rows += table.num_rows
+            for rule, state in zip(rules, states):
+                if not (set(rule_columns([rule])) & missing):
+                    _update(rule, table, state)
+
+    results = []
+    for rule, state in zip(rules, states):
+        result = {
+            "name": rule.get("name") or "_".join([rule["type"], *rule_columns([rule])]),
+            "type": rule["type"],
+            "severity": rule.get("severity", HARD),
+        }
+        absent = set(rule_columns([rule])) & missing
+        if absent:
+            result.update(observed=None, passed=False, error=f"missing columns {sorted(absent)}")
+        else:
+            result.update(_finalize(rule, state, rows))
+        results.append(result)
+    failed = [r for r in results if not r["passed"]]
+    return {
+        "files": [str(f) for f in files],
+        "rows": rows,
+        "rules": results,
+        "hard_failures": [r["name"] for r in failed if r["severity"] == HARD],
+        "soft_failures": [r["name"] for r in failed if r["severity"] != HARD],
+    }
+
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    opts = cfg.quality
+    if not opts.get("enabled", True):
+        log.info("data quality checks disabled via config")
+        return None
+    files = sorted(Path(cfg.paths["raw_dir"]).glob("*.parquet"))
+    if not files:
+        raise FileNotFoundError("No raw parquet found. Run: python -m src.data.get_data")
+    report = evaluate(files, opts.get("rules", []), int(opts.get("batch_rows", 500_000)))
+
+    os.makedirs("reports", exist_ok=True)
+    out = Path("reports/data_quality.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    import mlflow
+
+    mlflow.set_tracking_uri(get_tracking_uri(cfg))
+    mlflow.set_experiment(cfg.mlflow["experiment"])
+    with mlflow.start_run(run_name="data-quality"):
+        mlflow.log_metrics(
+            {
+                **{
+                    f"dq_{r['name']}": float(r["observed"])
+                    for r in report["rules"]
+                    if isinstance(r["observed"], (int, float))
+                },
+                "dq_rows": report["rows"],
+                "dq_hard_failures": len(report["hard_failures"]),
+            }
+        )
+        mlflow.log_artifact(str(out))
+
+    for r in report["rules"]:
+        if not r["passed"]:
+            level = logging.ERROR if r["severity"] == HARD else logging.WARNING
+            extra = {("rule" if k == "name" else k): v for k, v in r.items()}
+            log.log(level, "data quality rule failed", extra=extra)
+    if report["hard_failures"]:
+        raise RuntimeError(f"Data quality hard failures: {report['hard_failures']}")
+    log.info(
+        "data quality passed",
+        extra={"rows": report["rows"], "soft_failures": report["soft_failures"]},
+    )
+    return report
+
+
+if __name__ == "__main__":
+    main()
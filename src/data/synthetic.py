@@ -0,0 +1,232 @@
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config import load_config
+from src.logging_utils import setup_logging
+
+log = logging.getLogger(__name__)
+
+N_ZONES = 265
+FILE_TEMPLATE = "green_tripdata_{month}.parquet"
+
+# Column types of the published green taxi files
+SCHEMA = pa.schema(
+    [
+        ("VendorID", pa.int32()),
+        ("lpep_pickup_datetime", pa.timestamp("us")),
+        ("lpep_dropoff_datetime", pa.timestamp("us")),
+        ("store_and_fwd_flag", pa.string()),
+        ("RatecodeID", pa.float64()),
+        ("PULocationID", pa.int32()),
+        ("DOLocationID", pa.int32()),
+        ("passenger_count", pa.float64()),
+        ("trip_distance", pa.float64()),
+        ("fare_amount", pa.float64()),
+        ("extra", pa.float64()),
+        ("mta_tax", pa.float64()),
+        ("tip_amount", pa.float64()),
+        ("tolls_amount", pa.float64()),
+        ("ehail_fee", pa.float64()),
+        ("improvement_surcharge", pa.float64()),
+        ("total_amount", pa.float64()),
+        ("payment_type", pa.float64()),
+        ("trip_type", pa.float64()),
+        ("congestion_surcharge", pa.float64()),
+    ]
+)
+
+# Relative pickup volume by hour of day, and typical speed (mph) by hour
+HOUR_WEIGHTS = np.array(
+    [3, 2, 1.5, 1, 1, 1.5, 3, 5, 6, 5.5, 5, 5, 5.5, 5.5, 6, 6.5, 7, 7, 6.5, 5.5, 5, 4.5, 4, 3.5]
+)
+HOUR_SPEED = np.array(
+    [19, 20, 21, 21, 21, 20, 17, 12, 10, 11, 12, 12, 12, 12, 11, 10, 9, 9, 10, 12, 14, 15, 16, 18]
+)
+
+
+class ZoneModel:
+    """City layout shared by every chunk: zone centroids (miles), pickup popularity, a gravity
+    model for drop-off zones and a per-pair speed factor. Derived from the seed alone, so all
+    workers and months see the same city."""
+
+    def __init__(self, seed: int):
+        rng = np.random.default_rng([seed, 0])
+        self.xy = rng.uniform(0, [18.0, 24.0], size=(N_ZONES, 2))
+        popularity = rng.pareto(2.0, N_ZONES) + 0.05
+        self.pickup_p = popularity / popularity.sum()
+        self.distance = np.linalg.norm(self.xy[:, None] - self.xy[None, :], axis=-1)
+        gravity = popularity[None, :] * np.exp(-self.distance / 1.2)
+        gravity[np.diag_indices(N_ZONES)] *= 0.15  # a zone is small next to its neighbourhood
+        cdf = np.cumsum(gravity / gravity.sum(axis=1, keepdims=True), axis=1)
+        # Row r of the CDF shifted to [r, r + 1], so one searchsorted samples every row
+        self._flat_cdf = (cdf + np.arange(N_ZONES)[:, None]).ravel()
+        self.pair_speed = rng.lognormal(0.0, 0.15, size=(N_ZONES, N_ZONES))
+
+    def dropoff(self, pu: np.ndarray, rng) -> np.ndarray:
+        """Drop-off zone indices (0-based) for pickup zone indices."""
+        hits = np.searchsorted(self._flat_cdf, pu + rng.random(len(pu)))
+        return np.clip(hits - pu * N_ZONES, 0, N_ZONES - 1)
+
+
+def generate_chunk(
+    zones: ZoneModel, month: str, rows: int, seed: np.random.SeedSequence
+) -> pa.Table:
+    """`rows` trips with pickups in `month`; depends only on the zone model and `seed`."""
+    rng = np.random.default_rng(seed)
+    hour = rng.choice(24, size=rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    day = rng.integers(0, pd.Period(month, "M").days_in_month, rows)
+    offset_s = day * 86_400 + hour * 3_600 + rng.integers(0, 3_600, rows)
+    pickup = np.datetime64(f"{month}-01", "us") + offset_s.astype("timedelta64[s]")
+    weekend = pd.DatetimeIndex(pickup).dayofweek.to_numpy() >= 5
+
+    pu = rng.choice(N_ZONES, size=rows, p=zones.pickup_p)
+    do = zones.dropoff(pu, rng)
+    same = pu == do
+    distance = np.where(
+        same,
+        rng.gamma(2.0, 0.4, rows),
+        zones.distance[pu, do] * 1.3 * rng.lognormal(0.0, 0.2, rows),
+    )
+    distance = np.where(rng.random(rows) < 0.01, 0.0, np.round(distance, 2))
+
+    speed = HOUR_SPEED[hour] * np.where(weekend, 1.15, 1.0) * zones.pair_speed[pu, do]
+    speed = speed * rng.lognormal(0.0, 0.2, rows)
+    duration_min = 1.5 + distance / speed * 60 + rng.exponential(1.0, rows)
+    # Meters left running and clock errors, which the feature stage filters out
+    odd = rng.random(rows)
+    duration_min = np.where(odd < 0.003, rng.uniform(180, 1_400, rows), duration_min)
+    duration_min = np.where(odd > 0.999, -rng.uniform(1, 30, rows), duration_min)
+    dropoff = pickup + (duration_min * 60e6).astype("timedelta64[us]")
+
+    card = rng.random(rows) < 0.62
+    payment = np.where(card, 1.0, rng.choice([2.0, 3.0, 4.0], rows, p=[0.94, 0.04, 0.02]))
+    negotiated = rng.random(rows) < 0.03
+    fare = np.round(3.0 + 1.75 * distance + 0.35 * np.clip(duration_min, 0, 180), 2)
+    fare = np.where(negotiated, np.round(rng.uniform(10, 60, rows), 0), fare)
+    extra = np.select([(hour >= 20) | (hour < 6), (hour >= 16) & (hour < 20)], [1.0, 2.5], 0.0)
+    tip = np.where(card, np.round(fare * rng.uniform(0.1, 0.3, rows), 2), 0.0)
+    tolls = np.where((distance > 8) & (rng.random(rows) < 0.1), 6.94, 0.0)
+    congestion = np.where(rng.random(rows) < 0.1, 2.75, 0.0)
+    total = fare + extra + 0.5 + tip + tolls + 1.0 + congestion
+
+    # Dispatch-app trips arrive without the driver-entered fields
+    unrecorded = rng.random(rows) < 0.03
+    passengers = rng.choice(np.arange(1.0, 7.0), rows, p=[0.82, 0.09, 0.03, 0.02, 0.02, 0.02])
+    columns = {
+        "VendorID": np.where(rng.random(rows) < 0.8, 2, 1).astype(np.int32),
+        "lpep_pickup_datetime": pickup,
+        "lpep_dropoff_datetime": dropoff,
+        "store_and_fwd_flag": np.where(rng.random(rows) < 0.005, "Y", "N").astype(object),
+        "RatecodeID": np.where(negotiated, 5.0, 1.0),
+        "PULocationID": (pu + 1).astype(np.int32),
+        "DOLocationID": (do + 1).astype(np.int32),
+        "passenger_count": passengers,
+        "trip_distance": distance,
+        "fare_amount": fare,
+        "extra": extra,
+        "mta_tax": np.full(rows, 0.5),
+        "tip_amount": tip,
+        "tolls_amount": tolls,
+        "ehail_fee": np.full(rows, np.nan),
+        "improvement_surcharge": np.full(rows, 1.0),
+        "total_amount": np.round(total, 2),
+        "payment_type": payment,
+        "trip_type": np.where(negotiated, 2.0, 1.0),
+        "congestion_surcharge": congestion,
+    }
+    for name in ("store_and_fwd_flag", "RatecodeID", "passenger_count", "payment_type"):
+        columns[name] = np.where(unrecorded, None, columns[name])
+    arrays = [pa.array(columns[f.name], type=f.type, from_pandas=True) for f in SCHEMA]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+_zones = None  # per worker process
+
+
+def _init_worker(seed: int) -> None:
+    global _zones
+    _zones = ZoneModel(seed)
+
+
+def _chunk(month: str, rows: int, seed: np.random.SeedSequence) -> pa.Table:
+    return generate_chunk(_zones, month, rows, seed)
+
+
+def write_month(
+    pool, seed: int, month: str, rows: int, chunk_rows: int, out: Path, max_pending: int
+) -> Path:
+    """Generate one month as consecutive row groups of one file, written in chunk order.
+
+    Each chunk has its own child seed, so the output does not depend on the number of workers;
+    at most `max_pending` chunks are generated ahead of the writer.
+    """
+    sizes = [min(chunk_rows, rows - i) for i in range(0, rows, chunk_rows)]
+    seeds = np.random.SeedSequence([seed, *map(int, month.split("-"))]).spawn(len(sizes))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    pending: deque = deque()
+    with pq.ParquetWriter(tmp, SCHEMA) as writer:
+        for size, child in zip(sizes, seeds):
+            if len(pending) >= max_pending:
+                writer.write_table(pending.popleft().result())
+            pending.append(pool.submit(_chunk, month, size, child))
+        while pending:
+            writer.write_table(pending.popleft().result())
+    os.replace(tmp, out)
+    return out
+
+
+def months_from(cfg) -> list[str]:
+    """`data.months`, else the month in the `data.url` file name."""
+    months = cfg.data.get("months") or []
+    if months:
+        return list(months)
+    found = re.search(r"(\d{4}-\d{2})\.parquet$", cfg.data["url"])
+    if not found:
+        raise RuntimeError("Set data.months to generate synthetic data")
+    return [found.group(1)]
+
+
+def generate(cfg, raw_dir: Path) -> list[str]:
+    """Write one synthetic TLC-schema file per month to raw_dir, named like the real ones so
+    every later stage runs unchanged. Existing files are kept, as with downloads."""
+    opts = cfg.data.get("synthetic", {})
+    rows = int(opts.get("rows_per_month", 100_000))
+    chunk_rows = int(opts.get("chunk_rows", 250_000))
+    max_workers = int(opts.get("max_workers", os.cpu_count() or 1))
+    paths = []
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(cfg.random_state,)
+    ) as pool:
+        for month in months_from(cfg):
+            out = raw_dir / FILE_TEMPLATE.format(month=month)
+            if out.exists():
+                log.warning("raw file exists; skipping generation", extra={"path": str(out)})
+            else:
+                write_month(pool, cfg.random_state, month, rows, chunk_rows, out, 2 * max_workers)
+                mb = round(out.stat().st_size / 1e6, 2)
+                log.info(
+                    "generated synthetic month", extra={"path": str(out), "rows": rows, "mb": mb}
+                )
+            paths.append(str(out))
+    return paths
+
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    paths = generate(cfg, Path(cfg.paths["raw_dir"]))
+    return paths[0] if len(paths) == 1 else paths
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,176 @@
 import logging
-import os
-import time
+import tempfile
+from pathlib import Path
 
 import mlflow
-import requests
-from mlflow.exceptions import RestException
+from mlflow.exceptions import MlflowException, RestException
 from mlflow.tracking import MlflowClient
 
 from src.config import get_tracking_uri, load_config
+from src.deployment.rollout import (
+    default_candidates,
+    discover_replicas,
+    first_reachable,
+    rollout_replicas,
+)
 from src.logging_utils import setup_logging
+from src.models.tracking import latest_training_run, log_batch
+from src.monitoring.shadow import compare_shadow, load_shadow_log
 
 log = logging.getLogger(__name__)
 
 
-def try_post(url: str, path="/reload", retries=3, delay=1.0, timeout=5.0):
-    last_err = None
-    for i in range(retries):
-        try:
-            r = requests.post(f"{url.rstrip('/')}{path}", timeout=timeout)
-            log.info(
-                "api reload", extra={"url": url, "status": r.status_code, "body": r.text[:200]}
-            )
-            return True
-        except Exception as e:
-            last_err = e
-            time.sleep(delay)
-    log.warning("api reload failed", extra={"url": url, "error": str(last_err)})
-    return False
-
-
-def reload_fastapi():
-    # Respect explicit env first
-    candidates = []
-    env_url = os.environ.get("API_URL")
-    if env_url:
-        candidates.append(env_url)
-
-    # Detect if likely inside Docker (heuristic)
-    inside_docker = os.path.exists("/.dockerenv") or os.environ.get("RUNNING_IN_DOCKER") == "1"
-
-    # Add context-aware fallbacks
-    if inside_docker:
-        # Service name on the docker network
-        candidates += ["http://fastapi:8000", "http://web:8000"]
-        # On Linux containers, host gateway is often available:
-        candidates += ["http://host.docker.internal:8000", "http://172.17.0.1:8000"]
+def choose_artifact(cfg, run) -> str:
+    """Pick "model" or "model_compact" per `compact.serve` and the logged accuracy delta."""
+    serve = cfg.compact.get("serve", "auto")
+    metrics = run.data.metrics
+    if serve == "full" or "compact_mae_test" not in metrics:
+        return "model"
+    if serve == "compact":
+        return "model_compact"
+    delta = metrics["compact_mae_test"] - metrics["full_mae_test"]
+    artifact = "model_compact" if delta <= cfg.compact.get("max_mae_delta", 0.05) else "model"
+    log.info(
+        "serving artifact chosen",
+        extra={
+            "artifact": artifact,
+            "mae_delta": round(delta, 4),
+            "size_ratio": round(metrics["compact_size_bytes"] / metrics["full_size_bytes"], 3),
+        },
+    )
+    return artifact
+
+
+def register(client, run, artifact: str, model_name: str):
+    model_uri = f"runs:/{run.info.run_id}/{artifact}"
+    try:
+        mv = mlflow.register_model(model_uri=model_uri, name=model_name)
+    except RestException:
+        # model may already exist; register new version
+        mv = mlflow.register_model(model_uri=model_uri, name=model_name)
+    client.set_model_version_tag(model_name, mv.version, "artifact", artifact)
+    return mv
+
+
+def staged_version(client, model_name: str, stage: str):
+    try:
+        versions = client.get_latest_versions(name=model_name, stages=[stage])
+    except (MlflowException, RestException):
+        return None
+    return versions[0] if versions else None
+
+
+def build_lookup(cfg, client, run, artifact: str, version: str):
+    """Precompute the serving lookup table for the promoted model and log it with the run."""
+    # Only needed when lookup serving is enabled; these pull in sklearn and the training stack
+    import pandas as pd
+
+    from src.models.compact import holdout_sets
+    from src.models.serialization import load_pipeline
+    from src.models.split import VAL
+    from src.serve.lookup import build_table, interpolation_error
+
+    opts = cfg.serving["lookup"]
+    run_id = run.info.run_id
+    pipe = load_pipeline(f"runs:/{run_id}/{artifact}")
+    table = build_table(pipe, pd.read_parquet(cfg.paths["reference_path"]), opts)
+    mode = run.data.params.get("training_mode", "in_memory")
+    X_val, _ = holdout_sets(cfg, mode, int(opts.get("max_eval_rows", 50_000)))[VAL]
+    table.meta.update(interpolation_error(table, pipe, X_val))
+    table.meta.update(model_version=version, artifact=artifact)
+    with tempfile.TemporaryDirectory() as tmp:
+        client.log_artifacts(run_id, str(table.save(Path(tmp) / "lookup")), "lookup")
+    metrics = {
+        k: table.meta[k]
+        for k in ("build_s", "bytes", "coverage", "max_interp_error", "mean_interp_error")
+    }
+    log_batch(run_id, metrics={f"lookup_{k}": v for k, v in metrics.items()}, client=client)
+    log.info("logged lookup table", extra={"run_id": run_id, **metrics})
+
+
+def reload_apis(cfg, expected_version) -> bool:
+    """Reload every configured API replica concurrently (canary first); without an explicit
+    replica list, roll out to the first default candidate that answers. False when a rollout
+    ran and did not complete; with no API reachable there is nothing to roll back."""
+    replicas = discover_replicas(cfg) or first_reachable(default_candidates())
+    if not replicas:
+        log.warning("no API reachable; API may still be serving previous model")
+        return True
+    if not rollout_replicas(cfg, replicas, expected_version):
+        log.warning("rollout incomplete; some replicas may still serve the previous model")
+        return False
+    return True
+
+
+def promote_version(cfg, client, run, artifact: str, model_name: str, mv) -> None:
+    """Move `mv` to Production and roll it out to the APIs.
+
+    The replicas load the Production stage, so the canary can only run after the transition;
+    if the rollout fails, the previous Production version is restored (and reloaded) and this
+    raises, failing the task.
+    """
+    previous = staged_version(client, model_name, "Production")
+    client.transition_model_version_stage(
+        name=model_name,
+        version=mv.version,
+        stage="Production",
+        archive_existing_versions=True,
+    )
+    log.info(
+        "promoted to production",
+        extra={"model": model_name, "version": mv.version, "artifact": artifact},
+    )
+    if cfg.serving.get("lookup", {}).get("enabled", False):
+        build_lookup(cfg, client, run, artifact, str(mv.version))
+    if reload_apis(cfg, str(mv.version)):
+        return
+    if previous is not None:
+        client.transition_model_version_stage(
+            name=model_name,
+            version=previous.version,
+            stage="Production",
+            archive_existing_versions=True,
+        )
     else:
-        # Running on host
-        candidates += ["http://localhost:8000", "http://127.0.0.1:8000", "http://fastapi:8000"]
+        client.transition_model_version_stage(name=model_name, version=mv.version, stage="Archived")
+    restored = str(previous.version) if previous is not None else None
+    log.error(
+        "rollout failed; production restored",
+        extra={"model": model_name, "version": mv.version, "restored": restored},
+    )
+    reload_apis(cfg, restored)
+    raise RuntimeError(
+        f"[promote] rollout of version {mv.version} failed; Production restored to {restored}"
+    )
 
-    # De-duplicate while preserving order
-    seen = set()
-    candidates = [u for u in candidates if not (u in seen or seen.add(u))]
 
-    for url in candidates:
-        if try_post(url):
-            return True
-    return False
+def shadow_gate(cfg, client, model_name: str, mv) -> bool:
+    """Compare the staged challenger `mv` with the champion on its shadow predictions.
+
+    Only shadow files written since the version was created are read. True to promote, False
+    while samples are too few; a failed comparison archives the challenger and raises.
+    """
+    opts = cfg.serving.get("shadow", {})
+    since = mv.creation_timestamp / 1000 if mv.creation_timestamp else None
+    df = load_shadow_log(cfg.paths.get("shadow_dir", "data/shadow"), since=since)
+    comparison = compare_shadow(df, mv.version, opts)
+    log.info("shadow comparison", extra=comparison)
+    for k in ("n", "mean_abs_diff", "mean_diff", "p95_abs_diff"):
+        if k in comparison:
+            client.set_model_version_tag(model_name, mv.version, f"shadow_{k}", comparison[k])
+    if not comparison["enough_samples"]:
+        log.info(
+            "not enough shadow samples yet; promotion deferred",
+            extra={"version": mv.version, "n": comparison.get("n", 0)},
+        )
+        return False
+    if not comparison["ok"]:
+        client.transition_model_version_stage(name=model_name, version=mv.version, stage="Archived")
+        raise RuntimeError(
+            f"[promote] shadow comparison failed; challenger {mv.version} archived "
+            f"(mean_abs_diff={comparison['mean_abs_diff']:.3f}, n={comparison['n']})"
+        )
+    return True
 
 
 def main():
@@ -65,19 +179,8 @@ def main():
     mlflow.set_tracking_uri(get_tracking_uri(cfg))
     client = MlflowClient()
     exp = client.get_experiment_by_name(cfg.mlflow["experiment"])
-    runs = client.search_runs(
-        exp.experiment_id, order_by=["attributes.start_time DESC"], max_results=5
-    )
-    if not runs:
-        raise RuntimeError("No training runs")
-
     # Find the latest run with metrics
-    run = None
-    for r in runs:
-        if "mae_val" in r.data.metrics and "r2_val" in r.data.metrics:
-            run = r
-            break
-
+    run = latest_training_run(client, exp.experiment_id)
     if not run:
         raise RuntimeError("No training runs with metrics found")
 
@@ -90,27 +193,58 @@ def main():
     else:
         raise RuntimeError(f"[promote] thresholds failed (mae={mae:.3f}, r2={r2:.3f})")
 
-    # Register model
-    model_uri = f"runs:/{run.info.run_id}/model"
+    artifact = choose_artifact(cfg, run)
     model_name = cfg.mlflow["model_name"]
-    try:
-        mv = mlflow.register_model(model_uri=model_uri, name=model_name)
-    except RestException:
-        # model may already exist; register new version
-        mv = mlflow.register_model(model_uri=model_uri, name=model_name)
-    client.transition_model_version_stage(
-        name=model_name,
-        version=mv.version,
-        stage="Production",
-        archive_existing_versions=True,
-    )
-    logging.getLogger(__name__).info(
-        "promoted to production", extra={"model": model_name, "version": mv.version}
-    )
+    shadow = cfg.serving.get("shadow", {})
+    first = staged_version(client, model_name, "Production") is None
+    if shadow.get("enabled", False) and shadow.get("gate", True) and not first:
+        # Champion/challenger: stage the run first, promote once shadow traffic backs it.
+        # Shadow samples need a serving champion, so the first model is promoted directly
+        stage = shadow.get("stage", "Staging")
+        mv = staged_version(client, model_name, stage)
+        if mv is None or mv.run_id != run.info.run_id:
+            mv = register(client, run, artifact, model_name)
+            client.transition_model_version_stage(
+                name=model_name, version=mv.version, stage=stage, archive_existing_versions=True
+            )
+            # shadow_gate_dag re-evaluates the challenger on its schedule
+            log.info(
+                "challenger staged; shadow_gate_dag promotes it once shadow traffic backs it",
+                extra={"version": mv.version, "stage": stage},
+            )
+            reload_apis(cfg, None)
+            return
+        if not shadow_gate(cfg, client, model_name, mv):
+            return
+    else:
+        mv = register(client, run, artifact, model_name)
+
+    promote_version(cfg, client, run, artifact, model_name, mv)
 
-    # Reload FastAPI with improved retry logic
-    if not reload_fastapi():
-        log.warning("api reload ultimately failed; API may still be serving previous model")
+
+def evaluate_challenger() -> bool:
+    """Scheduled re-check of the challenger staged by `main`: promote it once its shadow
+    predictions agree with the champion. False when there is nothing to promote yet, so the
+    Airflow task short-circuits instead of reporting a promotion."""
+    cfg = load_config()
+    setup_logging(cfg)
+    shadow = cfg.serving.get("shadow", {})
+    if not (shadow.get("enabled", False) and shadow.get("gate", True)):
+        log.info("shadow gating disabled; nothing to evaluate")
+        return False
+    mlflow.set_tracking_uri(get_tracking_uri(cfg))
+    client = MlflowClient()
+    model_name = cfg.mlflow["model_name"]
+    mv = staged_version(client, model_name, shadow.get("stage", "Staging"))
+    if mv is None:
+        log.info("no staged challenger")
+        return False
+    if not shadow_gate(cfg, client, model_name, mv):
+        return False
+    run = client.get_run(mv.run_id)
+    artifact = (mv.tags or {}).get("artifact") or choose_artifact(cfg, run)
+    promote_version(cfg, client, run, artifact, model_name, mv)
+    return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import requests
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplicaResult:
+    url: str
+    ok: bool
+    version: Optional[str] = None
+    attempts: int = 0
+    latency_s: float = 0.0
+    error: Optional[str] = None
+
+
+def discover_replicas(cfg) -> list[str]:
+    """API replicas to reload: env API_REPLICAS (comma-separated), else `serving.replicas`."""
+    env = os.environ.get("API_REPLICAS")
+    urls = env.split(",") if env else cfg.serving.get("replicas") or []
+    urls = [u.strip().rstrip("/") for u in urls if u.strip()]
+    seen = set()
+    return [u for u in urls if not (u in seen or seen.add(u))]
+
+
+def default_candidates() -> list[str]:
+    """Likely addresses of a single local API: env API_URL, then Docker or host fallbacks."""
+    candidates = []
+    env_url = os.environ.get("API_URL")
+    if env_url:
+        candidates.append(env_url.rstrip("/"))
+    # Detect if likely inside Docker (heuristic)
+    if os.path.exists("/.dockerenv") or os.environ.get("RUNNING_IN_DOCKER") == "1":
+        # Service names on the docker network, then the host gateway
+        candidates += ["http://fastapi:8000", "http://web:8000"]
+        candidates += ["http://host.docker.internal:8000", "http://172.17.0.1:8000"]
+    else:
+        candidates += ["http://localhost:8000", "http://127.0.0.1:8000", "http://fastapi:8000"]
+    seen = set()
+    return [u for u in candidates if not (u in seen or seen.add(u))]
+
+
+def first_reachable(urls: list[str], timeout: float = 2.0) -> list[str]:
+    """The first URL whose /health answers, as a one-replica list (empty if none does).
+
+    The candidates are alternative addresses of one API, so only one of them is rolled out to.
+    """
+    for url in urls:
+        try:
+            requests.get(f"{url}/health", timeout=timeout)
+            return [url]
+        except requests.RequestException:
+            log.debug("api candidate unreachable", extra={"url": url})
+    return []
+
+
+def _backoff(attempt: int, opts: dict) -> float:
+    return min(opts.get("backoff_base_s", 0.25) * 2**attempt, opts.get("backoff_max_s", 4.0))
+
+
+async def _request(method: str, url: str, timeout: float) -> requests.Response:
+    # requests is blocking; each call gets its own worker thread so replicas proceed concurrently
+    return await asyncio.to_thread(requests.request, method, url, timeout=timeout)
+
+
+async def reload_replica(url: str, expected_version: Optional[str], opts: dict) -> ReplicaResult:
+    """POST /reload with exponential backoff, then poll /health until it serves the version."""
+    result = ReplicaResult(url=url, ok=False)
+    timeout = opts.get("timeout_s", 5.0)
+    retries = int(opts.get("retries", 4))
+    start = time.perf_counter()
+    for attempt in range(retries):
+        result.attempts = attempt + 1
+        try:
+            r = await _request("POST", f"{url}/reload", timeout)
+            if r.status_code == 200:
+                result.version = r.json().get("version")
+                break
+            result.error = f"HTTP {r.status_code}: {r.text[:200]}"
+        except (requests.RequestException, ValueError) as exc:
+            result.error = str(exc)
+        if attempt + 1 < retries:
+            await asyncio.sleep(_backoff(attempt, opts))
+    else:
+        result.latency_s = time.perf_counter() - start
+        return result
+
+    deadline = start + opts.get("version_timeout_s", 30.0)
+    attempt = 0
+    while expected_version is not None and result.version != expected_version:
+        if time.perf_counter() >= deadline:
+            result.error = f"replica serves version {result.version}, expected {expected_version}"
+            result.latency_s = time.perf_counter() - start
+            return result
+        await asyncio.sleep(_backoff(attempt, opts))
+        attempt += 1
+        try:
+            r = await _request("GET", f"{url}/health", timeout)
+            result.version = r.json().get("version")
+        except (requests.RequestException, ValueError) as exc:
+            result.error = str(exc)
+    result.ok, result.error = True, None
+    result.latency_s = time.perf_counter() - start
+    return result
+
+
+async def rollout(
+    urls: list[str], expected_version: Optional[str], opts: dict
+) -> list[ReplicaResult]:
+    """Reload a canary share of replicas first, then the rest concurrently if all canaries pass."""
+    pct = float(opts.get("canary_percent", 0))
+    n_canary = math.ceil(len(urls) * pct / 100) if 0 < pct < 100 else len(urls)
+    canary, rest = urls[:n_canary], urls[n_canary:]
+
+    results = await asyncio.gather(*(reload_replica(u, expected_version, opts) for u in canary))
+    if rest:
+        if all(r.ok for r in results):
+            log.info("canary healthy; rolling out", extra={"canary": canary, "rest": len(rest)})
+            results += await asyncio.gather(
+                *(reload_replica(u, expected_version, opts) for u in rest)
+            )
+        else:
+            log.error("canary failed; halting rollout", extra={"canary": canary})
+            results += [
+                ReplicaResult(url=u, ok=False, error="skipped: canary failed") for u in rest
+            ]
+    return list(results)
+
+
+def rollout_replicas(cfg, urls: list[str], expected_version: Optional[str]) -> bool:
+    """Run the rollout for the promoted version and log per-replica outcome and latency."""
+    results = asyncio.run(rollout(urls, expected_version, cfg.serving.get("rollout", {})))
+    for r in results:
+        level = logging.INFO if r.ok else logging.WARNING
+        log.log(level, "replica reload", extra=asdict(r))
+    return all(r.ok for r in results)
@@ -0,0 +1,17 @@
+import importlib
+from typing import Any, Callable
+
+# The Airflow scheduler re-parses DAG files in a loop. Importing the pipeline modules there
+# would load mlflow, sklearn, evidently, etc. on every parse; these wrappers defer the import
+# until the task actually runs.
+
+
+def lazy_main(module: str, func: str = "main") -> Callable[[], Any]:
+    """A callable that imports `module` and runs its `main()` (or `func`) when invoked."""
+
+    def run():
+        return getattr(importlib.import_module(module), func)()
+
+    run.__name__ = run.__qualname__ = f"{module.rsplit('.', 1)[-1]}_{func}"
+    run.__doc__ = f"Import {module} and run its {func}()."
+    return run
@@ -1,12 +1,32 @@
 import logging
+import shutil
 from pathlib import Path
 
 import pandas as pd
+import pyarrow.parquet as pq
 
+from src.cache import (
+    code_version,
+    decide,
+    file_sha256,
+    manifest_path,
+    read_manifest,
+    stage_key,
+    write_manifest,
+)
 from src.config import load_config
 from src.logging_utils import setup_logging
 
 TARGET = "duration_min"
+RAW_COLUMNS = [
+    "lpep_pickup_datetime",
+    "lpep_dropoff_datetime",
+    "trip_distance",
+    "passenger_count",
+    "PULocationID",
+    "DOLocationID",
+    "payment_type",
+]
 log = logging.getLogger(__name__)
 
 
@@ -43,34 +63,95 @@ def engineer(df: pd.DataFrame, cfg) -> pd.DataFrame:
     return df[[c for c in cols if c in df.columns]]
 
 
+def transform_key(cfg, raw: Path) -> str:
+    """Key of one raw file's features: its digest and only the settings `load_raw` and
+    `engineer` read, so ingesting another month leaves the other partitions' keys alone."""
+    return stage_key(
+        "transform",
+        raw={raw.name: file_sha256(raw)},
+        config={
+            "random_state": cfg.random_state,
+            "sample_fraction": float(cfg.data.get("sample_fraction", 1.0)),
+            "features": cfg.features,
+        },
+        code=code_version(__file__),
+    )
+
+
+def load_raw(path: Path, cfg) -> pd.DataFrame:
+    """Read the raw columns `engineer` needs from one file, downsampled per config."""
+    available = set(pq.read_schema(path).names)
+    log.info("reading raw parquet", extra={"path": str(path)})
+    df = pd.read_parquet(path, columns=[c for c in RAW_COLUMNS if c in available])
+    # optional downsample
+    frac = float(cfg.data.get("sample_fraction", 1.0))
+    if 0 < frac < 1.0:
+        log.info("downsampling", extra={"frac": frac})
+        df = df.sample(frac=frac, random_state=cfg.random_state)
+    return df
+
+
+def write_partitions(cfg, files: list[Path]) -> list[Path]:
+    """Engineer one feature partition per raw file, one file in memory at a time."""
+    out_dir = Path(cfg.paths["features_dir"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outs = []
+    for raw in files:
+        out = out_dir / raw.name
+        key = transform_key(cfg, raw)
+        manifest = read_manifest(out)
+        hit = bool(manifest and manifest.get("key") == key) and out.exists()
+        if decide(cfg, "transform", key, hit) != "hit":
+            features = engineer(load_raw(raw, cfg), cfg)
+            features.to_parquet(out, index=False)
+            write_manifest(out, key, raw=raw.name, rows=len(features))
+            log.info("wrote feature partition", extra={"path": str(out), "rows": len(features)})
+        outs.append(out)
+    # Partitions of raw files that are gone would otherwise keep feeding chunked training
+    for stale in sorted(set(out_dir.glob("*.parquet")) - set(outs)):
+        stale.unlink()
+        manifest_path(stale).unlink(missing_ok=True)
+        log.info("removed superseded feature partition", extra={"path": str(stale)})
+    return outs
+
+
 def main():
     cfg = load_config()
     setup_logging(cfg)
     raw_dir = Path(cfg.paths["raw_dir"])
-    files = list(raw_dir.glob("*.parquet"))
+    files = sorted(raw_dir.glob("*.parquet"))
     if not files:
         raise FileNotFoundError("No raw parquet found. Run: python -m src.data.get_data")
-    log.info("reading raw parquet", extra={"path": str(files[0])})
-    df = pd.read_parquet(files[0])
-    # optional downsample
-    frac = float(cfg.data.get("sample_fraction", 1.0))
-    if 0 < frac < 1.0:
-        log.info("downsampling", extra={"frac": frac})
-        df = df.sample(frac=frac, random_state=cfg.random_state)
+    partitions = write_partitions(cfg, files) if cfg.paths.get("features_dir") else []
+
     out_path = Path(cfg.paths["features_out"])
+    ref_path = Path(cfg.paths["reference_path"])
+    key = transform_key(cfg, files[0])
+    manifest = read_manifest(out_path)
+    hit = bool(manifest and manifest.get("key") == key) and out_path.exists() and ref_path.exists()
+    if decide(cfg, "transform", key, hit) == "hit":
+        log.info("reusing cached features", extra={"features_path": str(out_path)})
+        return str(out_path)
+
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    features = engineer(df, cfg)
-    features.to_parquet(out_path, index=False)
+    if partitions:
+        # The first partition already holds the engineered features of files[0]
+        shutil.copyfile(partitions[0], out_path)
+        rows = pq.ParquetFile(out_path).metadata.num_rows
+    else:
+        features = engineer(load_raw(files[0], cfg), cfg)
+        features.to_parquet(out_path, index=False)
+        rows = len(features)
     # Save reference for drift
-    Path(cfg.paths["reference_path"]).parent.mkdir(parents=True, exist_ok=True)
-    features.to_parquet(cfg.paths["reference_path"], index=False)
-    ref_path = cfg.paths["reference_path"]
+    ref_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(out_path, ref_path)
+    write_manifest(out_path, key, raw=files[0].name, rows=rows)
     log.info(
         "wrote features and reference",
         extra={
             "features_path": str(out_path),
             "reference_path": str(ref_path),
-            "rows": len(features),
+            "rows": rows,
         },
     )
     return str(out_path)
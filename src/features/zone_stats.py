@@ -0,0 +1,201 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+log = logging.getLogger(__name__)
+
+N_ZONES = 266  # TLC zone ids are 1..265; row 0 holds the fallback for unknown ids
+N_HOURS = 24
+ZONE_COLUMNS = ["PULocationID", "DOLocationID"]
+INPUT_COLUMNS = [*ZONE_COLUMNS, "hour", "trip_distance"]  # all that fitting reads
+OUTPUT_COLUMNS = [
+    "zone_pair_duration",
+    "zone_pair_speed",
+    "zone_pair_log_count",
+    "zone_pu_hour_duration",
+    "zone_pu_duration",
+    "zone_do_duration",
+    "zone_expected_duration",
+]
+TABLES = [
+    "pair_duration_",
+    "pair_speed_",
+    "pair_log_count_",
+    "pu_hour_duration_",
+    "pu_duration_",
+    "do_duration_",
+]
+
+
+def zone_index(ids) -> np.ndarray:
+    """Zone ids as table indices; missing or out-of-range ids map to the fallback row 0."""
+    ids = pd.to_numeric(pd.Series(ids), errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    return np.where((ids > 0) & (ids < N_ZONES), ids, 0)
+
+
+def _medians(keys: list[np.ndarray], values: np.ndarray, shape: tuple):
+    """Median of values and row count per key tuple, as dense arrays of `shape` (NaN if empty)."""
+    frame = pd.DataFrame({f"k{i}": k for i, k in enumerate(keys)})
+    frame["v"] = values
+    grouped = frame.dropna(subset=["v"]).groupby([f"k{i}" for i in range(len(keys))])["v"]
+    stats = grouped.agg(["median", "size"])
+    median = np.full(shape, np.nan, dtype=np.float32)
+    count = np.zeros(shape, dtype=np.int64)
+    idx = tuple(stats.index.get_level_values(i).to_numpy() for i in range(len(keys)))
+    median[idx] = stats["median"].to_numpy()
+    count[idx] = stats["size"].to_numpy()
+    return median, count
+
+
+def _shrink(median: np.ndarray, count: np.ndarray, fallback, smoothing: float) -> np.ndarray:
+    """Blend each cell toward the coarser level's value, weighted count / (count + smoothing);
+    empty cells take the fallback outright."""
+    fallback = np.broadcast_to(fallback, median.shape)
+    weight = count / (count + smoothing) if smoothing > 0 else (count > 0).astype(float)
+    blended = weight * np.nan_to_num(median) + (1 - weight) * fallback
+    return np.where(count > 0, blended, fallback).astype(np.float32)
+
+
+class ZoneAggregates(BaseEstimator, TransformerMixin):
+    """Median trip duration and speed per (PU, DO) pair, (PU, hour) and zone, fitted on the
+    training rows and joined onto each row by dense array indexing.
+
+    Sparse cells are shrunk toward the next coarser level (pair -> zones -> global), so rare
+    pairs and unknown ids still get a sensible value. Training rows get out-of-fold values
+    (`cv` folds, as in sklearn's TargetEncoder, shuffled with `random_state`) so the model
+    cannot learn a row's own target back from its pair median. The tables are part of the
+    fitted pipeline and so are versioned with the model. With `drop_location_ids` the raw ids
+    are dropped in favour of the aggregates, which removes ~530 one-hot columns from the model
+    input.
+    """
+
+    def __init__(
+        self,
+        smoothing: float = 20.0,
+        cv: int = 5,
+        drop_location_ids: bool = False,
+        random_state: int = 0,
+    ):
+        self.smoothing = smoothing
+        self.cv = cv
+        self.drop_location_ids = drop_location_ids
+        self.random_state = random_state
+
+    def fit(self, X: pd.DataFrame, y):
+        self._fit_tables(X, np.asarray(y, dtype=np.float64))
+        log.info(
+            "fitted zone aggregates",
+            extra={"rows": len(X), "pairs": self.n_pairs_, "table_bytes": self.nbytes},
+        )
+        return self
+
+    def fit_transform(self, X: pd.DataFrame, y=None, **fit_params) -> pd.DataFrame:
+        return self.fit_folds(X, y).transform(X, np.arange(len(X)))
+
+    def fit_folds(self, X: pd.DataFrame, y) -> "OutOfFold":
+        """Fit on all rows of X (only INPUT_COLUMNS are read), plus one table set per CV fold
+        for the training rows' out-of-fold values."""
+        self.fit(X, y)
+        y = np.asarray(y, dtype=np.float64)
+        fold = None
+        if self.cv >= 2:
+            fold = np.random.default_rng(self.random_state).permutation(len(X)) % self.cv
+        models = []
+        for f in range(self.cv if fold is not None else 0):
+            other = ZoneAggregates(self.smoothing, drop_location_ids=self.drop_location_ids)
+            other._fit_tables(X[fold != f], y[fold != f])
+            models.append(other)
+        return OutOfFold(self, fold, models)
+
+    def _fit_tables(self, X: pd.DataFrame, y: np.ndarray) -> None:
+        pu, do = zone_index(X["PULocationID"]), zone_index(X["DOLocationID"])
+        hour = np.clip(X["hour"].to_numpy(dtype=np.int64), 0, N_HOURS - 1)
+        dist = X["trip_distance"].to_numpy(dtype=np.float64)
+        speed = np.where((dist > 0) & (y > 0), dist / (y / 60.0), np.nan)
+        k = float(self.smoothing)
+
+        self.global_duration_ = float(np.median(y))
+        self.global_speed_ = float(np.nanmedian(speed)) if np.isfinite(speed).any() else 0.0
+        med, cnt = _medians([pu], y, (N_ZONES,))
+        self.pu_duration_ = _shrink(med, cnt, self.global_duration_, k)
+        med, cnt = _medians([do], y, (N_ZONES,))
+        self.do_duration_ = _shrink(med, cnt, self.global_duration_, k)
+        med, cnt = _medians([pu, hour], y, (N_ZONES, N_HOURS))
+        self.pu_hour_duration_ = _shrink(med, cnt, self.pu_duration_[:, None], k)
+
+        med, cnt = _medians([pu, do], y, (N_ZONES, N_ZONES))
+        zones = (self.pu_duration_[:, None] + self.do_duration_[None, :]) / 2
+        self.pair_duration_ = _shrink(med, cnt, zones, k)
+        self.pair_log_count_ = np.log1p(cnt).astype(np.float32)
+        med_pu, cnt_pu = _medians([pu], speed, (N_ZONES,))
+        pu_speed = _shrink(med_pu, cnt_pu, self.global_speed_, k)
+        med, cnt = _medians([pu, do], speed, (N_ZONES, N_ZONES))
+        self.pair_speed_ = _shrink(med, cnt, pu_speed[:, None], k)
+        self.n_pairs_ = int((cnt > 0).sum())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in TABLES)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        pu, do = zone_index(X["PULocationID"]), zone_index(X["DOLocationID"])
+        hour = np.clip(X["hour"].to_numpy(dtype=np.int64), 0, N_HOURS - 1)
+        out = X.drop(columns=ZONE_COLUMNS) if self.drop_location_ids else X.copy()
+        speed = self.pair_speed_[pu, do]
+        out["zone_pair_duration"] = self.pair_duration_[pu, do]
+        out["zone_pair_speed"] = speed
+        out["zone_pair_log_count"] = self.pair_log_count_[pu, do]
+        out["zone_pu_hour_duration"] = self.pu_hour_duration_[pu, hour]
+        out["zone_pu_duration"] = self.pu_duration_[pu]
+        out["zone_do_duration"] = self.do_duration_[do]
+        dist = X["trip_distance"].to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = np.where(speed > 0, dist / speed * 60.0, out["zone_pair_duration"])
+        out["zone_expected_duration"] = expected.astype(np.float32)
+        return out
+
+    def template(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Empty frame with transform's output columns and dtypes, for laying out the
+        preprocessor before the tables are fitted."""
+        out = X.head(0).drop(columns=ZONE_COLUMNS) if self.drop_location_ids else X.head(0)
+        return out.assign(**{c: pd.Series(dtype=np.float32) for c in OUTPUT_COLUMNS})
+
+    def save(self, path: Path) -> Path:
+        """Write the fitted tables as a .npz (logged with the training run for inspection)."""
+        np.savez_compressed(path, **{name.rstrip("_"): getattr(self, name) for name in TABLES})
+        return path
+
+
+class OutOfFold:
+    """Transforms slices of the rows ZoneAggregates.fit_folds was fitted on, each row with the
+    tables of the fold that did not see it; `rows` are their positions among those rows."""
+
+    def __init__(self, fitted: ZoneAggregates, fold, models: list):
+        self.fitted, self.fold, self.models = fitted, fold, models
+
+    def transform(self, X: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+        out = self.fitted.transform(X)
+        if not self.models:
+            return out
+        fold = self.fold[rows]
+        cols = [out.columns.get_loc(c) for c in OUTPUT_COLUMNS]
+        for f, other in enumerate(self.models):
+            held = np.flatnonzero(fold == f)
+            out.iloc[held, cols] = other.transform(X.iloc[held])[OUTPUT_COLUMNS].to_numpy()
+        return out
+
+
+def zone_step(cfg):
+    """The configured ZoneAggregates step, or None when `features.zone_aggregates` is off."""
+    opts = cfg.features.get("zone_aggregates") or {}
+    if not opts.get("enabled", False):
+        return None
+    return ZoneAggregates(
+        smoothing=float(opts.get("smoothing", 20)),
+        cv=int(opts.get("cv", 5)),
+        drop_location_ids=bool(opts.get("drop_location_ids", False)),
+        random_state=cfg.random_state,
+    )
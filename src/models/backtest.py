@@ -0,0 +1,192 @@
+import inspect
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import mlflow
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from src.cache import code_version, file_sha256, read_manifest, stage_key
+from src.config import get_tracking_uri, load_config
+from src.logging_utils import setup_logging
+from src.models.train import TARGET, build_preprocessor
+from src.models.train_chunked import partition_files
+
+log = logging.getLogger(__name__)
+MONTH_RE = re.compile(r"(\d{4}-\d{2})")
+
+
+def month_of(path: Path) -> str:
+    m = MONTH_RE.search(path.stem)
+    if not m:
+        raise ValueError(f"Cannot infer month from partition name: {path.name}")
+    return m.group(1)
+
+
+def plan_windows(months: list[str], window: int, horizons: int = 1) -> list[dict]:
+    """Windows training on calendar months [t-window, t) and scoring months t .. t+horizons-1.
+
+    Months are compared as periods, so a missing partition is never bridged: a window whose
+    training months are not all present is skipped, and a missing score month is left out,
+    listed under "missing", while the others keep their calendar horizon.
+    """
+    present = sorted({pd.Period(m, "M") for m in months})
+    if not present:
+        return []
+    first, last = present[0], present[-1]
+    calendar = list(pd.period_range(first, last, freq="M"))
+    gaps = [str(p) for p in calendar if p not in present]
+    if gaps:
+        log.warning("monthly partitions have gaps", extra={"missing": gaps})
+    plans = []
+    for t in calendar[window:]:
+        train = [t - k for k in range(window, 0, -1)]
+        ahead = [t + h for h in range(horizons) if t + h <= last]
+        if not any(p in present for p in ahead):
+            continue
+        if any(p not in present for p in train):
+            log.warning("skipping window with a gap", extra={"score_month": str(t)})
+            continue
+        plans.append(
+            {
+                "train": [str(p) for p in train],
+                "score": [str(p) for p in ahead if p in present],
+                "horizons": [h for h, p in enumerate(ahead) if p in present],
+                "missing": [str(p) for p in ahead if p not in present],
+            }
+        )
+    return plans
+
+
+def partition_key(path: Path) -> str:
+    manifest = read_manifest(path)
+    return manifest["key"] if manifest else file_sha256(path)
+
+
+def load_months(files: dict, months: list[str]) -> pd.DataFrame:
+    return pd.concat([pd.read_parquet(files[m]) for m in months], ignore_index=True)
+
+
+def fitted_preprocessor(X: pd.DataFrame, files: dict, months: list[str], cache_dir: Path):
+    """Load the preprocessor fitted on these exact partitions from cache, or fit and cache it."""
+    key = stage_key(
+        "preprocessor",
+        partitions=[partition_key(files[m]) for m in months],
+        code=code_version(inspect.getsourcefile(build_preprocessor)),
+    )
+    path = cache_dir / f"prep-{key[:16]}.joblib"
+    if path.exists():
+        return joblib.load(path), True
+    pre = build_preprocessor(X).fit(X)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    joblib.dump(pre, tmp)
+    tmp.replace(path)
+    return pre, False
+
+
+def run_window(cfg, files: dict, plan: dict) -> dict:
+    """Fit on the window's training months and score each following month (process worker)."""
+    opts = cfg.backtest
+    t0 = time.perf_counter()
+    train = load_months(files, plan["train"])
+    X, y = train.drop(columns=[TARGET]), train[TARGET].to_numpy()
+    pre, prep_cached = fitted_preprocessor(X, files, plan["train"], Path(opts["cache_dir"]))
+    t_load = time.perf_counter()
+
+    hp = {**cfg.model["hyperparams"], **opts.get("hyperparams", {})}
+    reg = RandomForestRegressor(
+        random_state=cfg.random_state, n_jobs=int(opts.get("n_jobs_per_window", 1)), **hp
+    )
+    reg.fit(pre.transform(X), y)
+    t_fit = time.perf_counter()
+
+    scores = []
+    for h, month in zip(plan["horizons"], plan["score"]):
+        test = pd.read_parquet(files[month])
+        pred = reg.predict(pre.transform(test.drop(columns=[TARGET])))
+        scores.append(
+            {
+                "horizon": h,
+                "month": month,
+                "rows": len(test),
+                "mae": float(mean_absolute_error(test[TARGET], pred)),
+                "r2": float(r2_score(test[TARGET], pred)),
+            }
+        )
+    t_score = time.perf_counter()
+    return {
+        **plan,
+        "train_rows": len(train),
+        "preprocessor_cached": prep_cached,
+        "scores": scores,
+        "load_s": t_load - t0,
+        "fit_s": t_fit - t_load,
+        "score_s": t_score - t_fit,
+    }
+
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    mlflow.set_tracking_uri(get_tracking_uri(cfg))
+    mlflow.set_experiment(cfg.mlflow["experiment"])
+
+    opts = cfg.backtest
+    files = {month_of(p): p for p in partition_files(cfg)}
+    months = sorted(files)
+    window = int(opts.get("window_months", 3))
+    plans = plan_windows(months, window, int(opts.get("horizons", 1)))
+    if not plans:
+        raise RuntimeError(
+            f"Backtest needs more than {window} consecutive monthly partitions; found {months}"
+        )
+    log.info("backtest windows", extra={"months": months, "windows": len(plans)})
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=int(opts.get("max_workers", 2))) as pool:
+        futures = [pool.submit(run_window, cfg, files, plan) for plan in plans]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    by_horizon: dict[int, list[float]] = {}
+    with mlflow.start_run(run_name="backtest"):
+        mlflow.log_params({"window_months": window, "windows": len(plans)})
+        for res in results:
+            score_month = res["score"][0]
+            with mlflow.start_run(run_name=f"window-{score_month}", nested=True):
+                mlflow.log_params(
+                    {
+                        "train_months": ",".join(res["train"]),
+                        "score_month": score_month,
+                        "preprocessor_cached": res["preprocessor_cached"],
+                    }
+                )
+                metrics = {k: res[k] for k in ("load_s", "fit_s", "score_s", "train_rows")}
+                for s in res["scores"]:
+                    metrics[f"mae_h{s['horizon']}"] = s["mae"]
+                    metrics[f"r2_h{s['horizon']}"] = s["r2"]
+                    by_horizon.setdefault(s["horizon"], []).append(s["mae"])
+                mlflow.log_metrics(metrics)
+
+        # Mean MAE by months since training: how fast the model ages
+        decay = {f"mae_mean_h{h}": sum(v) / len(v) for h, v in sorted(by_horizon.items())}
+        mlflow.log_metrics({**decay, "elapsed_s": elapsed})
+        os.makedirs("reports", exist_ok=True)
+        with open("reports/backtest.json", "w") as f:
+            json.dump({"windows": results, "decay": decay}, f, indent=2)
+        mlflow.log_artifact("reports/backtest.json")
+
+    log.info("backtest complete", extra={"elapsed_s": round(elapsed, 2), **decay})
+    return results
+
+
+if __name__ == "__main__":
+    main()
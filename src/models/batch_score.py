@@ -0,0 +1,160 @@
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+
+import mlflow
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from mlflow.tracking import MlflowClient
+
+from src.config import get_tracking_uri, load_config
+from src.features.transform import TARGET
+from src.logging_utils import setup_logging
+from src.models.serialization import load_pipeline
+
+log = logging.getLogger(__name__)
+
+# Set once per worker process by _init_worker
+_pipe = None
+
+
+def _init_worker(tracking_uri: str, model_uri: str) -> None:
+    global _pipe
+    mlflow.set_tracking_uri(tracking_uri)
+    _pipe = load_pipeline(model_uri)
+
+
+def input_files(cfg) -> list[Path]:
+    src = Path(cfg.batch_score.get("input") or cfg.paths["features_dir"])
+    files = sorted(src.glob("*.parquet")) if src.is_dir() else [src]
+    if not files or not files[0].exists():
+        raise FileNotFoundError(f"No parquet input found at {src}")
+    return files
+
+
+def chunk_path(out_dir: Path, version: str, source: Path, index: int) -> Path:
+    # model_version is a column in every file, so the version directory is not a hive key
+    return out_dir / f"v{version}" / f"source={source.stem}" / f"part-{index:05d}.parquet"
+
+
+def _rebatch(batches, skip: int, size: int) -> Iterator[pa.Table]:
+    """Re-cut record batches into `size`-row tables after dropping the first `skip` rows."""
+    buf, buffered = [], 0
+    for batch in batches:
+        if skip:
+            cut = min(skip, batch.num_rows)
+            batch, skip = batch.slice(cut), skip - cut
+        if not batch.num_rows:
+            continue
+        buf.append(batch)
+        buffered += batch.num_rows
+        while buffered >= size:
+            table = pa.Table.from_batches(buf)
+            yield table.slice(0, size)
+            rest = table.slice(size)
+            buf, buffered = rest.to_batches(), rest.num_rows
+    if buffered:
+        yield pa.Table.from_batches(buf)
+
+
+def pending_chunks(
+    source: Path, out_dir: Path, version: str, batch_rows: int
+) -> tuple[int, Iterator[tuple[int, pa.Table]]]:
+    """(finished chunk count, iterator of (index, rows) for the chunks left to score).
+
+    Chunk i is rows [i * batch_rows, (i + 1) * batch_rows) of the file. The chunk count comes
+    from the parquet metadata and reading starts at the row group holding the first unfinished
+    chunk, so a resumed run does not decode the chunks it already wrote.
+    """
+    pf = pq.ParquetFile(source)
+    meta = pf.metadata
+    done = [
+        chunk_path(out_dir, version, source, i).exists()
+        for i in range(math.ceil(meta.num_rows / batch_rows))
+    ]
+    if all(done):
+        return len(done), iter(())
+    first = done.index(False)
+    group, group_start = 0, 0
+    while group_start + meta.row_group(group).num_rows <= first * batch_rows:
+        group_start += meta.row_group(group).num_rows
+        group += 1
+    batches = pf.iter_batches(batch_rows, row_groups=range(group, meta.num_row_groups))
+    chunks = enumerate(_rebatch(batches, first * batch_rows - group_start, batch_rows), first)
+    return sum(done), ((i, rows) for i, rows in chunks if not done[i])
+
+
+def score_chunk(frame: pd.DataFrame, version: str, out: Path) -> int:
+    """Score one chunk and write it atomically, so a file on disk always means a finished chunk."""
+    pred = _pipe.predict(frame.drop(columns=[TARGET], errors="ignore"))
+    frame = frame.assign(prediction=pred, model_version=version)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp)
+    os.replace(tmp, out)
+    return len(frame)
+
+
+def champion(cfg, client) -> tuple[str, str]:
+    name = cfg.mlflow["model_name"]
+    versions = client.get_latest_versions(name=name, stages=["Production"])
+    if not versions:
+        raise RuntimeError(f"No Production version of {name} to score with")
+    return f"models:/{name}/{versions[0].version}", str(versions[0].version)
+
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    opts = cfg.batch_score
+    tracking_uri = get_tracking_uri(cfg)
+    mlflow.set_tracking_uri(tracking_uri)
+    model_uri, version = champion(cfg, MlflowClient())
+    out_dir = Path(opts.get("output_dir", "data/predictions"))
+    batch_rows = int(opts.get("batch_rows", 100_000))
+    max_workers = int(opts.get("max_workers", os.cpu_count() or 1))
+
+    start = time.perf_counter()
+    rows = skipped = 0
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(tracking_uri, model_uri)
+    ) as pool:
+        pending = set()
+        for source in input_files(cfg):
+            # Chunks finished before an earlier crash/interrupt are skipped unread
+            finished, chunks = pending_chunks(source, out_dir, version, batch_rows)
+            skipped += finished
+            for i, chunk in chunks:
+                # Bound the chunks held in memory to two per worker
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    rows += sum(f.result() for f in done)
+                out = chunk_path(out_dir, version, source, i)
+                pending.add(pool.submit(score_chunk, chunk.to_pandas(), version, out))
+        rows += sum(f.result() for f in pending)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "model_uri": model_uri,
+        "model_version": version,
+        "output_dir": str(out_dir),
+        "rows_scored": rows,
+        "chunks_resumed": skipped,
+        "seconds": elapsed,
+        "rows_per_s": rows / elapsed if elapsed > 0 else float("nan"),
+    }
+    os.makedirs("reports", exist_ok=True)
+    with open("reports/batch_score.json", "w") as f:
+        json.dump(report, f, indent=2)
+    log.info("batch scoring finished", extra=report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
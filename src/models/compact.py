@@ -0,0 +1,190 @@
+import copy
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import mlflow
+import numpy as np
+import pandas as pd
+from mlflow.tracking import MlflowClient
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.pipeline import Pipeline
+
+from src.cache import code_version, config_hash, decide, stage_key
+from src.config import get_tracking_uri, load_config
+from src.logging_utils import setup_logging
+from src.models.serialization import load_pipeline, model_size_bytes, save_model
+from src.models.split import TEST, VAL, split_labels
+from src.models.tracking import latest_training_run, log_batch
+from src.models.train import TARGET, load_xy
+
+log = logging.getLogger(__name__)
+
+
+def holdout_sets(cfg, mode: str, max_rows: int) -> dict:
+    """Rebuild the run's validation and test splits (each capped at max_rows) as {split: (X, y)}."""
+    if mode == "chunked":
+        from src.models.train_chunked import iter_batches, partition_files
+
+        parts = {VAL: [], TEST: []}
+        for batch in iter_batches(partition_files(cfg), 100_000):
+            labels = split_labels(batch, cfg.random_state)
+            for split in parts:
+                parts[split].append(batch[labels == split])
+            if all(sum(map(len, p)) >= max_rows for p in parts.values()):
+                break
+        frames = {k: pd.concat(v, ignore_index=True).head(max_rows) for k, v in parts.items()}
+        return {k: (f.drop(columns=[TARGET]), f[TARGET].to_numpy()) for k, f in frames.items()}
+    X, y, idx = load_xy(cfg)
+    return {
+        split: (X.take(idx[split][:max_rows]), y[idx[split][:max_rows]]) for split in (VAL, TEST)
+    }
+
+
+def greedy_select(per_tree: np.ndarray, y: np.ndarray, max_trees: int) -> tuple[list, list]:
+    """Forward-select trees (without replacement) minimising validation MAE of their mean.
+
+    per_tree is (n_trees, n_rows); returns the selection order and the MAE after each step.
+    """
+    remaining = np.ones(len(per_tree), dtype=bool)
+    running = np.zeros(per_tree.shape[1])
+    order, curve = [], []
+    for k in range(min(max_trees, len(per_tree))):
+        mae = np.abs((running + per_tree) / (k + 1) - y).mean(axis=1)
+        mae[~remaining] = np.inf
+        best = int(np.argmin(mae))
+        order.append(best)
+        curve.append(float(mae[best]))
+        remaining[best] = False
+        running += per_tree[best]
+    return order, curve
+
+
+def compact_forest(pipe: Pipeline, X_val: pd.DataFrame, y_val: np.ndarray, opts: dict):
+    """Smallest greedy tree subset (at least `min_trees`) within `max_mae_delta` of the full
+    forest's validation MAE."""
+    prep, forest = pipe[:-1], pipe.named_steps["model"]
+    Xt = prep.transform(X_val)
+    per_tree = np.stack([tree.predict(Xt) for tree in forest.estimators_])
+    full_mae = float(np.abs(per_tree.mean(axis=0) - y_val).mean())
+    order, curve = greedy_select(per_tree, y_val, int(opts.get("max_trees", 40)))
+    target = full_mae + float(opts.get("max_mae_delta", 0.05))
+    min_trees = int(opts.get("min_trees", 10))
+    within = [k for k, mae in enumerate(curve) if mae <= target and k + 1 >= min_trees]
+    n_trees = (within[0] if within else int(np.argmin(curve))) + 1
+
+    compact = copy.copy(forest)
+    compact.estimators_ = [forest.estimators_[i] for i in order[:n_trees]]
+    compact.n_estimators = n_trees
+    if getattr(forest, "leaf_stats_", None) is not None:
+        compact.leaf_stats_ = forest.leaf_stats_.subset(order[:n_trees])
+    return Pipeline([*pipe.steps[:-1], ("model", compact)]), curve
+
+
+def profile(pipe: Pipeline, X: pd.DataFrame, y: np.ndarray) -> dict:
+    """Accuracy, pickled size, load time and single-row / batch latency of a pipeline."""
+    blob = pickle.dumps(pipe)
+    start = time.perf_counter()
+    pickle.loads(blob)
+    load_s = time.perf_counter() - start
+
+    row = X.head(1)
+    timings = []
+    for _ in range(20):
+        start = time.perf_counter()
+        pipe.predict(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    pred = pipe.predict(X)
+    batch_s = time.perf_counter() - start
+    return {
+        "mae_test": float(mean_absolute_error(y, pred)),
+        "r2_test": float(r2_score(y, pred)),
+        "n_trees": len(pipe.named_steps["model"].estimators_),
+        "size_bytes": len(blob),
+        "load_s": load_s,
+        "latency_ms": float(np.median(timings) * 1000),
+        "batch_rows_per_s": len(X) / batch_s if batch_s > 0 else float("nan"),
+    }
+
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg)
+    opts = cfg.compact
+    if not opts.get("enabled", True):
+        log.info("compaction disabled via config")
+        return None
+    mlflow.set_tracking_uri(get_tracking_uri(cfg))
+    client = MlflowClient()
+    exp = client.get_experiment_by_name(cfg.mlflow["experiment"])
+    run = latest_training_run(client, exp.experiment_id)
+    if run is None:
+        raise RuntimeError("No training runs with metrics found")
+    run_id = run.info.run_id
+
+    key = stage_key(
+        "compact",
+        run_id=run_id,
+        config=config_hash(cfg, ["compact"]),
+        code=code_version(__file__),
+    )
+    if decide(cfg, "compact", key, run.data.tags.get("compact_key") == key) == "hit":
+        log.info("compact model already logged", extra={"run_id": run_id})
+        return run_id
+
+    pipe = load_pipeline(f"runs:/{run_id}/model")
+    mode = run.data.params.get("training_mode", "in_memory")
+    holdout = holdout_sets(cfg, mode, int(opts.get("max_eval_rows", 50_000)))
+    X_val, y_val = holdout[VAL]
+    # Trees are selected on validation rows; accuracy is reported on the untouched test rows
+    compact, curve = compact_forest(pipe, X_val, y_val, opts)
+    full_stats, compact_stats = profile(pipe, *holdout[TEST]), profile(compact, *holdout[TEST])
+    report = {
+        "full": full_stats,
+        "compact": compact_stats,
+        "mae_delta": compact_stats["mae_test"] - full_stats["mae_test"],
+        "size_ratio": compact_stats["size_bytes"] / full_stats["size_bytes"],
+        "latency_speedup": full_stats["latency_ms"] / compact_stats["latency_ms"],
+        "greedy_mae_curve": curve,
+    }
+
+    os.makedirs("reports", exist_ok=True)
+    with open("reports/compact.json", "w") as f:
+        json.dump(report, f, indent=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = save_model(
+            compact, Path(tmp) / "model_compact", X_val.head(3), cfg.model.get("serialization")
+        )
+        client.log_artifacts(run_id, str(model_dir), "model_compact")
+        artifact_bytes = model_size_bytes(model_dir)
+    client.log_artifact(run_id, "reports/compact.json")
+    log_batch(
+        run_id,
+        metrics={
+            **{f"full_{k}": v for k, v in full_stats.items()},
+            **{f"compact_{k}": v for k, v in compact_stats.items()},
+            "compact_artifact_bytes": artifact_bytes,
+        },
+        tags={"compact_key": key},
+        client=client,
+    )
+    log.info(
+        "logged compact model",
+        extra={
+            "run_id": run_id,
+            "n_trees": compact_stats["n_trees"],
+            "mae_delta": round(report["mae_delta"], 4),
+            "size_ratio": round(report["size_ratio"], 3),
+            "latency_speedup": round(report["latency_speedup"], 2),
+        },
+    )
+    return run_id
+
+
+if __name__ == "__main__":
+    main()
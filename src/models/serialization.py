@@ -0,0 +1,76 @@
+import logging
+import os
+from pathlib import Path
+
+import joblib
+import mlflow
+from mlflow import sklearn as mlflow_sklearn
+from mlflow.models import infer_signature
+from mlflow.pyfunc import PythonModel
+
+log = logging.getLogger(__name__)
+
+
+class JoblibPipelineModel(PythonModel):
+    """pyfunc wrapper around a compressed joblib dump of the fitted sklearn pipeline."""
+
+    def load_context(self, context):
+        self.pipeline = joblib.load(context.artifacts["pipeline"])
+
+    def predict(self, context, model_input, params=None):
+        return self.pipeline.predict(model_input)
+
+    def __getstate__(self):
+        # MLflow may call load_context before pickling the wrapper; never embed the pipeline
+        state = self.__dict__.copy()
+        state.pop("pipeline", None)
+        return state
+
+
+def save_model(pipe, path: str | Path, input_example, serialization: dict | None = None) -> Path:
+    """Save the pipeline as an MLflow model directory in the configured format.
+
+    `serialization.format` is "pickle" (plain sklearn flavor) or "joblib" (pyfunc wrapping a
+    joblib dump compressed at `serialization.compress`, much smaller for large forests).
+    """
+    serialization = serialization or {}
+    fmt = serialization.get("format", "pickle")
+    path = Path(path)
+    signature = infer_signature(input_example, pipe.predict(input_example))
+    if fmt == "pickle":
+        mlflow_sklearn.save_model(pipe, str(path), signature=signature, input_example=input_example)
+    elif fmt == "joblib":
+        dump = path.parent / "pipeline.joblib"
+        joblib.dump(pipe, dump, compress=serialization.get("compress", 3))
+        mlflow.pyfunc.save_model(
+            str(path),
+            python_model=JoblibPipelineModel(),
+            artifacts={"pipeline": str(dump)},
+            signature=signature,
+            input_example=input_example,
+        )
+    else:
+        raise ValueError(f"Unknown model serialization format: {fmt}")
+    log.info(
+        "saved model",
+        extra={"path": str(path), "format": fmt, "bytes": model_size_bytes(path)},
+    )
+    return path
+
+
+def model_size_bytes(path: str | Path) -> int:
+    return sum(os.path.getsize(f) for f in Path(path).rglob("*") if f.is_file())
+
+
+def unwrap_pipeline(model):
+    """The fitted sklearn pipeline inside an already loaded pyfunc model (either format)."""
+    raw = model.get_raw_model()
+    return raw.pipeline if isinstance(raw, JoblibPipelineModel) else raw
+
+
+def load_pipeline(model_uri: str):
+    """Load the fitted sklearn pipeline behind a model URI, whichever format it was saved in."""
+    flavors = mlflow.models.get_model_info(model_uri).flavors
+    if "sklearn" in flavors:
+        return mlflow_sklearn.load_model(model_uri)
+    return mlflow.pyfunc.load_model(model_uri).unwrap_python_model().pipeline
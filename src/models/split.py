@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+TRAIN, VAL, TEST = 0, 1, 2
+N_BUCKETS = 100
+
+
+def hash_buckets(df: pd.DataFrame, seed: int) -> np.ndarray:
+    """Stable bucket in [0, 100) per row, derived from the row's values (not its position).
+
+    The same row always lands in the same bucket, whichever file or chunk it is read from,
+    so streamed passes over the data agree on the split without holding it in memory.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False, hash_key=f"{seed:016d}"[-16:])
+    return (hashes.to_numpy() % N_BUCKETS).astype(np.int8)
+
+
+def split_labels(
+    df: pd.DataFrame, seed: int, val_size: float = 0.1, test_size: float = 0.1
+) -> np.ndarray:
+    """Label each row TRAIN/VAL/TEST by its hash bucket (default 80/10/10)."""
+    buckets = hash_buckets(df, seed)
+    val_from = int(round(N_BUCKETS * (1 - val_size - test_size)))
+    test_from = int(round(N_BUCKETS * (1 - test_size)))
+    labels = np.full(len(df), TRAIN, dtype=np.int8)
+    labels[buckets >= val_from] = VAL
+    labels[buckets >= test_from] = TEST
+    return labels
+
+
+def split_indices(
+    df: pd.DataFrame, seed: int, val_size: float = 0.1, test_size: float = 0.1
+) -> dict[int, np.ndarray]:
+    """Row positions per split ({TRAIN: ..., VAL: ..., TEST: ...}), from `split_labels`."""
+    labels = split_labels(df, seed, val_size, test_size)
+    return {split: np.flatnonzero(labels == split) for split in (TRAIN, VAL, TEST)}
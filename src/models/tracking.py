@@ -0,0 +1,115 @@
+import logging
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MB (NaN where unsupported)."""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes vs KiB
+
+
+def log_batch(
+    run_id: str,
+    params: Optional[Dict[str, Any]] = None,
+    metrics: Optional[Dict[str, float]] = None,
+    tags: Optional[Dict[str, Any]] = None,
+    client: Optional[MlflowClient] = None,
+) -> None:
+    """Log params, metrics and tags in a single tracking-server round-trip."""
+    client = client or MlflowClient()
+    ts = int(time.time() * 1000)
+    client.log_batch(
+        run_id,
+        metrics=[Metric(k, float(v), ts, 0) for k, v in (metrics or {}).items()],
+        params=[Param(k, str(v)) for k, v in (params or {}).items()],
+        tags=[RunTag(k, str(v)) for k, v in (tags or {}).items()],
+    )
+
+
+class ArtifactUploader:
+    """Upload run artifacts on a bounded worker pool while training continues.
+
+    Use as a context manager inside the run: leaving it waits for every upload and re-raises
+    the first failure, so the run is only marked finished once its artifacts are stored.
+    """
+
+    def __init__(self, run_id: str, max_workers: int = 4, client: Optional[MlflowClient] = None):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._futures: list[Future] = []
+
+    def log_artifact(self, local_path: str, artifact_path: Optional[str] = None) -> Future:
+        return self._submit(self.client.log_artifact, local_path, artifact_path)
+
+    def log_artifacts(self, local_dir: str, artifact_path: Optional[str] = None) -> Future:
+        return self._submit(self.client.log_artifacts, local_dir, artifact_path)
+
+    def _submit(self, fn, local: str, artifact_path: Optional[str]) -> Future:
+        def upload():
+            start = time.perf_counter()
+            fn(self.run_id, local, artifact_path)
+            elapsed = round(time.perf_counter() - start, 3)
+            log.info("artifact uploaded", extra={"path": local, "seconds": elapsed})
+
+        fut = self._pool.submit(upload)
+        self._futures.append(fut)
+        return fut
+
+    def wait(self) -> None:
+        try:
+            for fut in self._futures:
+                fut.result()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wait()
+
+
+# Set by `train` on the run it produced or reused from cache (epoch ms, zero-padded so the tag
+# sorts as a string); later stages pick the run with the newest value
+SELECTED_TAG = "train_selected_at"
+
+
+def mark_selected(run_id: str, client: Optional[MlflowClient] = None) -> None:
+    client = client or MlflowClient()
+    client.set_tag(run_id, SELECTED_TAG, f"{time.time_ns() // 1_000_000:015d}")
+
+
+def latest_training_run(client: MlflowClient, experiment_id: str, max_results: int = 5):
+    """The run the last `train` produced or reused; for runs predating that tag, the most
+    recent run in the experiment that logged validation metrics."""
+    selected = client.search_runs(
+        experiment_id,
+        filter_string=f"tags.{SELECTED_TAG} LIKE '%'",
+        order_by=[f"tags.{SELECTED_TAG} DESC"],
+        max_results=1,
+    )
+    if selected:
+        return selected[0]
+    runs = client.search_runs(
+        experiment_id, order_by=["attributes.start_time DESC"], max_results=max_results
+    )
+    for r in runs:
+        if "mae_val" in r.data.metrics and "r2_val" in r.data.metrics:
+            return r
+    return None
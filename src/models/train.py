@@ -1,22 +1,27 @@
+import inspect
 import json
 import logging
 import os
+import tempfile
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import mlflow
+import numpy as np
 import pandas as pd
-import shap
-from mlflow import sklearn as mlflow_sklearn
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 
+from src.cache import code_version, config_hash, decide, file_sha256, stage_key
 from src.config import get_tracking_uri, load_config
+from src.features.zone_stats import INPUT_COLUMNS, zone_step
 from src.logging_utils import setup_logging
+from src.models.serialization import model_size_bytes, save_model
+from src.models.split import TEST, TRAIN, VAL, split_indices
+from src.models.tracking import ArtifactUploader, log_batch, mark_selected, peak_rss_mb
+from src.models.uncertainty import DEFAULT_POINTS, fit_leaf_stats
 
 TARGET = "duration_min"
 log = logging.getLogger(__name__)
@@ -31,6 +36,29 @@ def load_features(cfg):
     return pd.read_parquet(p)
 
 
+def train_sources() -> list[str]:
+    """Source files whose code shapes the trained model; editing any of them invalidates the
+    train cache."""
+    shaping = (split_indices, zone_step, fit_leaf_stats, save_model)
+    return [
+        __file__,
+        str(Path(__file__).with_name("train_chunked.py")),
+        *(inspect.getsourcefile(f) for f in shaping),
+    ]
+
+
+def find_cached_run(experiment_id: str, key: str):
+    """Return the latest finished run tagged with this input hash, if any."""
+    runs = mlflow.search_runs(
+        experiment_ids=[experiment_id],
+        filter_string=f"tags.input_hash = '{key}' and attributes.status = 'FINISHED'",
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+        output_format="list",
+    )
+    return runs[0] if runs else None
+
+
 def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
     num_cols = [c for c in X.columns if X[c].dtype != "object" and c != TARGET]
     cat_cols = [c for c in X.columns if X[c].dtype == "object"]
@@ -52,122 +80,285 @@ def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
     return pre
 
 
+def build_pipeline(cfg, X: pd.DataFrame, reg) -> Pipeline:
+    """Preprocessor + model, preceded by the zone aggregate join when enabled."""
+    zones = zone_step(cfg)
+    if zones is None:
+        return Pipeline([("prep", build_preprocessor(X)), ("model", reg)])
+    pre = build_preprocessor(zones.template(X))
+    return Pipeline([("zones", zones), ("prep", pre), ("model", reg)])
+
+
+def load_xy(cfg) -> tuple[pd.DataFrame, np.ndarray, dict]:
+    """Features, target and hash-split row positions ({TRAIN: ..., VAL: ..., TEST: ...}).
+
+    The target column is popped rather than dropped, so the frame is not copied; the split is
+    the same `split_labels` hash the chunked trainer uses.
+    """
+    df = load_features(cfg)
+    idx = split_indices(df, cfg.random_state)
+    y = df.pop(TARGET).to_numpy()
+    log.info(
+        "split dataset", extra={"rows": len(df), **{f"rows_{k}": len(v) for k, v in idx.items()}}
+    )
+    return df, y, idx
+
+
+def category_cover(prep: ColumnTransformer, X: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    """Positions among `rows` of X that include every value of every one-hot column.
+
+    Passthrough and one-hot steps fit the same on these rows as on all of them, but fitting on
+    them skips the (discarded) full encoded matrix that ColumnTransformer.fit builds. Other
+    transformers, or one-hot columns that X lacks, fall back to all rows.
+    """
+    cat_cols = []
+    for _, step, cols in prep.transformers:
+        if isinstance(step, OneHotEncoder) and step.min_frequency is None:
+            if step.max_categories is None:
+                cat_cols += list(cols)
+                continue
+        if step not in ("passthrough", "drop"):
+            return rows
+    if any(c not in X.columns for c in cat_cols):
+        return rows
+    keep = np.zeros(len(rows), dtype=bool)
+    for c in cat_cols:
+        keep |= ~pd.Series(X[c].to_numpy()[rows]).duplicated().to_numpy()
+    return rows[keep]
+
+
+def _columns_at(X: pd.DataFrame, columns: list[str], rows: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({c: X[c].to_numpy()[rows] for c in columns})
+
+
+def design_matrix(pipe: Pipeline, X: pd.DataFrame, y: np.ndarray, idx: dict, chunk_rows: int):
+    """Fit the pipeline's preprocessing on the training rows and write every row's model input
+    into one float32 matrix, ordered train | val | test so each split is a view.
+
+    Works from X and the split positions without copying the training frame: steps before
+    "prep" (the zone join, which reads X's raw columns) are fitted on just the columns they
+    read, "prep" on the few rows covering every category, and rows are transformed
+    `chunk_rows` at a time, so the float64 output of the one-hot encoder never exists for the
+    whole dataset. Training rows get the zone join's out-of-fold values.
+    """
+    frame_steps, prep = [s for _, s in pipe.steps[:-2]], pipe.named_steps["prep"]
+    train_rows = idx[TRAIN]
+    folds = [
+        step.fit_folds(_columns_at(X, INPUT_COLUMNS, train_rows), y[train_rows])
+        for step in frame_steps
+    ]
+    cover = X.take(category_cover(prep, X, train_rows))
+    for step in frame_steps:
+        cover = step.transform(cover)
+    prep.fit(cover)
+
+    def frames():
+        for split in (TRAIN, VAL, TEST):
+            for start in range(0, len(idx[split]), chunk_rows):
+                part = X.take(idx[split][start : start + chunk_rows])
+                for step, oof in zip(frame_steps, folds):
+                    if split == TRAIN:
+                        part = oof.transform(part, np.arange(start, start + len(part)))
+                    else:
+                        part = step.transform(part)
+                yield part
+
+    width = prep.transform(cover.head(1)).shape[1]
+    matrix = np.empty((len(X), width), dtype=np.float32)  # the forest fits on float32 anyway
+    row = 0
+    for part in frames():
+        matrix[row : row + len(part)] = prep.transform(part)
+        row += len(part)
+    bounds = np.cumsum([0, len(idx[TRAIN]), len(idx[VAL]), len(idx[TEST])])
+    views = {s: matrix[bounds[s] : bounds[s + 1]] for s in (TRAIN, VAL, TEST)}
+    return views, {s: y[idx[s]] for s in (TRAIN, VAL, TEST)}
+
+
+def attach_leaf_stats(cfg, forest, Xt, y) -> int:
+    """Store per-leaf target samples on the forest (`leaf_stats_`, pickled with the model)
+    for interval predictions, when `model.uncertainty.enabled`; returns their size in bytes."""
+    opts = cfg.model.get("uncertainty", {})
+    if not opts.get("enabled", False):
+        return 0
+    forest.leaf_stats_ = fit_leaf_stats(
+        forest, np.asarray(Xt, dtype=np.float32), y, int(opts.get("points", DEFAULT_POINTS))
+    )
+    return forest.leaf_stats_.nbytes
+
+
+def fit_in_memory(cfg):
+    """Fit on the single features parquet; returns (pipeline, metrics, training sample)."""
+    rss_start = peak_rss_mb()
+    X, y, idx = load_xy(cfg)
+    rss_loaded = peak_rss_mb()
+    hp = cfg.model["hyperparams"]
+    reg = RandomForestRegressor(random_state=cfg.random_state, n_jobs=cfg.n_jobs, **hp)
+    pipe = build_pipeline(cfg, X, reg)
+    chunk_rows = int(cfg.model.get("in_memory", {}).get("transform_rows", 20_000))
+    Xs, ys = design_matrix(pipe, X, y, idx, chunk_rows)
+    reg.fit(Xs[TRAIN], ys[TRAIN])
+    stats_bytes = attach_leaf_stats(cfg, reg, Xs[TRAIN], ys[TRAIN])
+    pred_val = reg.predict(Xs[VAL])
+    pred_test = reg.predict(Xs[TEST])
+
+    metrics = {
+        "mae_val": float(mean_absolute_error(ys[VAL], pred_val)),
+        "mae_test": float(mean_absolute_error(ys[TEST], pred_test)),
+        "r2_val": float(r2_score(ys[VAL], pred_val)),
+        "r2_test": float(r2_score(ys[TEST], pred_test)),
+        "peak_rss_mb_start": rss_start,
+        "peak_rss_mb_loaded": rss_loaded,
+        "peak_rss_mb_fitted": peak_rss_mb(),
+        "design_matrix_mb": sum(m.nbytes for m in Xs.values()) / 2**20,
+        "leaf_stats_bytes": stats_bytes,
+    }
+    # Input example and SHAP background only need a few hundred rows
+    return pipe, metrics, X.take(idx[TRAIN][:1000])
+
+
 def main():
     cfg = load_config()
     setup_logging(cfg)
     mlflow.set_tracking_uri(get_tracking_uri(cfg))
-    mlflow.set_experiment(cfg.mlflow["experiment"])
+    exp = mlflow.set_experiment(cfg.mlflow["experiment"])
 
-    df = load_features(cfg)
-    y = df[TARGET].values
-    X = df.drop(columns=[TARGET])
-    log.info("split dataset", extra={"rows": len(df), "target": TARGET})
-    X_train, X_tmp, y_train, y_tmp = train_test_split(
-        X, y, test_size=0.2, random_state=cfg.random_state
-    )
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_tmp, y_tmp, test_size=0.5, random_state=cfg.random_state
+    mode = cfg.model.get("training_mode", "in_memory")
+    if mode == "chunked":
+        from src.models.train_chunked import partition_files
+
+        inputs = partition_files(cfg)
+    else:
+        inputs = [Path(cfg.paths["features_out"])]
+        if not inputs[0].exists():
+            error_msg = "Processed features not found. Run: python -m src.features.transform"
+            raise FileNotFoundError(error_msg)
+    key = stage_key(
+        "train",
+        features={p.name: file_sha256(p) for p in inputs},
+        config=config_hash(cfg, ["random_state", "n_jobs", "model", "features"]),
+        code=code_version(*train_sources()),
     )
+    cached = find_cached_run(exp.experiment_id, key)
+    decision = decide(cfg, "train", key, cached is not None)
+    if decision == "hit":
+        run_id = cached.info.run_id
+        mlflow.MlflowClient().set_tag(run_id, "cache_last_hit", pd.Timestamp.utcnow().isoformat())
+        # validate, compact and promote pick up this run, not whichever ran last
+        mark_selected(run_id)
+        log.info("reusing cached training run", extra={"run_id": run_id, "input_hash": key})
+        return run_id
 
-    pre = build_preprocessor(X_train)
     hp = cfg.model["hyperparams"]
-    reg = RandomForestRegressor(random_state=cfg.random_state, n_jobs=cfg.n_jobs, **hp)
-    pipe = Pipeline([("prep", pre), ("model", reg)])
-
-    with mlflow.start_run(run_name="train-rf") as run:
-        # Train
-        pipe.fit(X_train, y_train)
-        pred_val = pipe.predict(X_val)
-        pred_test = pipe.predict(X_test)
-
-        metrics = {
-            "mae_val": float(mean_absolute_error(y_val, pred_val)),
-            "mae_test": float(mean_absolute_error(y_test, pred_test)),
-            "r2_val": float(r2_score(y_val, pred_val)),
-            "r2_test": float(r2_score(y_test, pred_test)),
-        }
-
-        # Log params & metrics
-        for k, v in hp.items():
-            mlflow.log_param(k, v)
-        mlflow.log_metric("mae_val", metrics["mae_val"])
-        mlflow.log_metric("mae_test", metrics["mae_test"])
-        mlflow.log_metric("r2_val", metrics["r2_val"])
-        mlflow.log_metric("r2_test", metrics["r2_test"])
-
-        # Save reports/metrics.json
-        os.makedirs("reports", exist_ok=True)
-        with open("reports/metrics.json", "w") as f:
-            json.dump(metrics, f, indent=2)
-        mlflow.log_artifact("reports/metrics.json")
-
-        # SHAP summary (enabled for all platforms)
-        enable_shap = os.environ.get("ENABLE_SHAP", "1") == "1"
-        if enable_shap:
-            try:
-                log.info("Generating SHAP summary plot...")
-
-                # Use a smaller sample for SHAP calculation
-                sample_size = min(100, len(X_train))
-                background = X_train.sample(n=sample_size, random_state=cfg.random_state)
-                log.info(f"Using {sample_size} samples for SHAP calculation")
-
-                # Transform the sample through the preprocessing pipeline
-                transformed = pipe.named_steps["prep"].transform(background)
-                log.info(f"Transformed sample shape: {transformed.shape}")
-
-                # Access fitted RF model
-                rf = pipe.named_steps["model"]
-                log.info(f"Model type: {type(rf)}")
-
-                # Create explainer and compute SHAP values
-                explainer = shap.TreeExplainer(rf)
-                log.info("TreeExplainer created successfully")
-
-                shap_values = explainer.shap_values(transformed)
-                log.info(f"SHAP values computed, shape: {shap_values.shape}")
-
-                # Use matplotlib backend that works on Windows
-                import matplotlib
-
-                matplotlib.use("Agg")
-                plt.figure(figsize=(10, 6))
-                shap.summary_plot(shap_values, transformed, show=False, plot_type="bar")
-                shap_path = "reports/shap_summary.png"
-                os.makedirs("reports", exist_ok=True)
-                plt.tight_layout()
-                plt.savefig(shap_path, bbox_inches="tight", dpi=100)
-                plt.close()
-                mlflow.log_artifact(shap_path)
-                log.info("SHAP summary plot generated and logged")
-            except Exception as e:
-                log.warning(f"SHAP generation failed: {str(e)}")
-                log.warning(f"Error type: {type(e).__name__}")
-                import traceback
-
-                log.warning(f"Full traceback: {traceback.format_exc()}")
-                os.makedirs("reports", exist_ok=True)
-                with open("reports/shap_error.txt", "w") as f:
-                    f.write(f"SHAP error: {str(e)}\n")
-                    f.write(f"Error type: {type(e).__name__}\n")
-                    f.write(f"Traceback:\n{traceback.format_exc()}")
-                mlflow.log_artifact("reports/shap_error.txt")
-        else:
-            log.info("SHAP disabled via ENABLE_SHAP=0")
-
-        # Prepare input example and signature for MLflow model logging
-        input_example = X_train.head(3)  # Use first 3 rows as example
-
-        # Log full pipeline as MLflow model (Registry-ready)
-        mlflow_sklearn.log_model(
-            sk_model=pipe,
-            artifact_path="model",
-            input_example=input_example,
-            registered_model_name=None,  # registration handled by deployment stage
-        )
+    upload_workers = int(cfg.mlflow.get("upload_workers", 4))
+    with (
+        mlflow.start_run(
+            run_name="train-rf", tags={"input_hash": key, "cache_decision": decision}
+        ) as run,
+        tempfile.TemporaryDirectory() as tmp,
+    ):
+        with ArtifactUploader(run.info.run_id, max_workers=upload_workers) as uploader:
+            # Train
+            if mode == "chunked":
+                from src.models.train_chunked import fit_chunked
+
+                pipe, metrics, X_train = fit_chunked(cfg)
+            else:
+                pipe, metrics, X_train = fit_in_memory(cfg)
+
+            # Save the full pipeline locally as an MLflow model (Registry-ready); registration
+            # is handled by the deployment stage
+            input_example = X_train.head(3)  # Use first 3 rows as example
+            model_dir = save_model(
+                pipe, Path(tmp) / "model", input_example, cfg.model.get("serialization")
+            )
+
+            # Log params, metrics & tags in one round-trip
+            log_batch(
+                run.info.run_id,
+                params={
+                    **hp,
+                    "training_mode": mode,
+                    "zone_aggregates": "zones" in pipe.named_steps,
+                },
+                metrics={**metrics, "model_size_bytes": model_size_bytes(model_dir)},
+                tags={"model_format": cfg.model.get("serialization", {}).get("format", "pickle")},
+            )
+
+            # Save reports/metrics.json; uploads run in the background from here on
+            os.makedirs("reports", exist_ok=True)
+            with open("reports/metrics.json", "w") as f:
+                json.dump(metrics, f, indent=2)
+            uploader.log_artifact("reports/metrics.json")
+            uploader.log_artifacts(str(model_dir), "model")
+            if "zones" in pipe.named_steps:
+                # The tables ship inside the pipeline; the .npz is a readable copy
+                tables = pipe.named_steps["zones"].save(Path(tmp) / "zone_aggregates.npz")
+                uploader.log_artifact(str(tables))
+
+            # SHAP summary (enabled for all platforms)
+            enable_shap = os.environ.get("ENABLE_SHAP", "1") == "1"
+            if enable_shap:
+                try:
+                    # shap and matplotlib are only needed here; importing them at module load
+                    # cost every entry point that imports this module several seconds
+                    import shap
+
+                    log.info("Generating SHAP summary plot...")
+
+                    # Use a smaller sample for SHAP calculation
+                    sample_size = min(100, len(X_train))
+                    background = X_train.sample(n=sample_size, random_state=cfg.random_state)
+                    log.info(f"Using {sample_size} samples for SHAP calculation")
+
+                    # Transform the sample through the preprocessing pipeline
+                    transformed = pipe[:-1].transform(background)
+                    log.info(f"Transformed sample shape: {transformed.shape}")
+
+                    # Access fitted RF model
+                    rf = pipe.named_steps["model"]
+                    log.info(f"Model type: {type(rf)}")
+
+                    # Create explainer and compute SHAP values
+                    explainer = shap.TreeExplainer(rf)
+                    log.info("TreeExplainer created successfully")
+
+                    shap_values = explainer.shap_values(transformed)
+                    log.info(f"SHAP values computed, shape: {shap_values.shape}")
+
+                    # Use matplotlib backend that works on Windows
+                    import matplotlib
+
+                    matplotlib.use("Agg")
+                    import matplotlib.pyplot as plt
+
+                    plt.figure(figsize=(10, 6))
+                    shap.summary_plot(shap_values, transformed, show=False, plot_type="bar")
+                    shap_path = "reports/shap_summary.png"
+                    os.makedirs("reports", exist_ok=True)
+                    plt.tight_layout()
+                    plt.savefig(shap_path, bbox_inches="tight", dpi=100)
+                    plt.close()
+                    uploader.log_artifact(shap_path)
+                    log.info("SHAP summary plot generated and logged")
+                except Exception as e:
+                    log.warning(f"SHAP generation failed: {str(e)}")
+                    log.warning(f"Error type: {type(e).__name__}")
+                    import traceback
+
+                    log.warning(f"Full traceback: {traceback.format_exc()}")
+                    os.makedirs("reports", exist_ok=True)
+                    with open("reports/shap_error.txt", "w") as f:
+                        f.write(f"SHAP error: {str(e)}\n")
+                        f.write(f"Error type: {type(e).__name__}\n")
+                        f.write(f"Traceback:\n{traceback.format_exc()}")
+                    uploader.log_artifact("reports/shap_error.txt")
+            else:
+                log.info("SHAP disabled via ENABLE_SHAP=0")
 
+    mark_selected(run.info.run_id)
     log.info("training metrics", extra=metrics)
     log.info("mlflow run", extra={"run_id": run.info.run_id})
+    return run.info.run_id
 
 
 if __name__ == "__main__":
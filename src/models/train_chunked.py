@@ -0,0 +1,176 @@
+import logging
+import math
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+from src.features.zone_stats import zone_step
+from src.models.split import TEST, TRAIN, VAL, split_labels
+from src.models.train import TARGET, attach_leaf_stats, build_preprocessor
+
+log = logging.getLogger(__name__)
+
+
+class StreamingRegressionMetrics:
+    """MAE and R² accumulated batch by batch from sufficient statistics."""
+
+    def __init__(self):
+        self.n = 0
+        self.abs_err = 0.0
+        self.sq_err = 0.0
+        self.y_sum = 0.0
+        self.y_sq_sum = 0.0
+
+    def update(self, y_true, y_pred) -> None:
+        y_true = np.asarray(y_true, dtype=np.float64)
+        resid = y_true - np.asarray(y_pred, dtype=np.float64)
+        self.n += len(y_true)
+        self.abs_err += float(np.abs(resid).sum())
+        self.sq_err += float((resid**2).sum())
+        self.y_sum += float(y_true.sum())
+        self.y_sq_sum += float((y_true**2).sum())
+
+    @property
+    def mae(self) -> float:
+        return self.abs_err / self.n if self.n else float("nan")
+
+    @property
+    def r2(self) -> float:
+        if not self.n:
+            return float("nan")
+        ss_tot = self.y_sq_sum - self.y_sum**2 / self.n
+        return 1.0 - self.sq_err / ss_tot if ss_tot > 0 else float("nan")
+
+
+def partition_files(cfg) -> list[Path]:
+    files = sorted(Path(cfg.paths["features_dir"]).glob("*.parquet"))
+    if not files:
+        error_msg = "No feature partitions found. Run: python -m src.features.transform"
+        raise FileNotFoundError(error_msg)
+    return files
+
+
+def iter_batches(
+    files: list[Path], batch_rows: int, exclude: Optional[dict] = None
+) -> Iterator[pd.DataFrame]:
+    """Batches of each file in turn; `exclude` maps a file to sorted row positions to leave out."""
+    for f in files:
+        skip = exclude.get(f, []) if exclude else []
+        start = 0
+        for batch in pq.ParquetFile(f).iter_batches(batch_size=batch_rows):
+            frame = batch.to_pandas()
+            lo, hi = np.searchsorted(skip, [start, start + batch.num_rows])
+            if hi > lo:
+                frame = frame.drop(index=skip[lo:hi] - start).reset_index(drop=True)
+            start += batch.num_rows
+            yield frame
+
+
+def count_batches(files: list[Path], batch_rows: int) -> int:
+    """Number of batches `iter_batches` yields; batches never span two files."""
+    return sum(math.ceil(pq.ParquetFile(f).metadata.num_rows / batch_rows) for f in files)
+
+
+def prep_sample(
+    files: list[Path], rows: int, batch_rows: int, seed: int
+) -> tuple[pd.DataFrame, dict]:
+    """Random rows spread over all partitions, used to fit the preprocessor and for SHAP.
+
+    Row positions are drawn up front and picked out while streaming each file in batches;
+    returns the sample and {file: sorted positions}.
+    """
+    per_file = max(1, rows // len(files))
+    rng = np.random.default_rng(seed)
+    parts, picked = [], {}
+    for f in files:
+        pf = pq.ParquetFile(f)
+        n = pf.metadata.num_rows
+        picks = np.sort(rng.choice(n, size=min(per_file, n), replace=False))
+        picked[f] = picks
+        start = 0
+        for batch in pf.iter_batches(batch_size=batch_rows):
+            lo, hi = np.searchsorted(picks, [start, start + batch.num_rows])
+            if hi > lo:
+                parts.append(batch.take(picks[lo:hi] - start).to_pandas())
+            start += batch.num_rows
+    return pd.concat(parts, ignore_index=True), picked
+
+
+def fit_chunked(cfg):
+    """Grow the forest chunk by chunk over the feature partitions (bounded memory).
+
+    Each chunk adds trees fitted on that chunk's training rows only (`warm_start`); rows are
+    split by a stable hash of their values and val/test metrics come from a second pass.
+    Returns (pipeline, metrics, sample features).
+    """
+    opts = cfg.model.get("chunked", {})
+    batch_rows = int(opts.get("batch_rows", 250_000))
+    files = partition_files(cfg)
+
+    sample_rows = int(opts.get("prep_sample_rows", 50_000))
+    sample, sampled = prep_sample(files, sample_rows, batch_rows, cfg.random_state)
+    head = []
+    fit_rows = sample[split_labels(sample, cfg.random_state) == TRAIN]
+    fit_X, fit_y = fit_rows.drop(columns=[TARGET]), fit_rows[TARGET]
+    fit_layout = fit_X
+    zones = zone_step(cfg)
+    if zones is not None:
+        # Zone tables and leaf statistics come from the sample's training rows; quantiles and
+        # medians do not stream. Those rows get out-of-fold aggregates for the leaf statistics
+        # and are held out of the forest, so no tree sees aggregates of its own targets
+        fit_layout = zones.fit_transform(fit_X, fit_y)
+        head = [("zones", zones)]
+    sample = sample.drop(columns=[TARGET])
+    layout = zones.transform(sample) if zones is not None else sample
+    pre = build_preprocessor(layout).fit(layout)
+    prep = Pipeline([*head, ("prep", pre)])
+
+    hp = dict(cfg.model["hyperparams"])
+    n_estimators = int(hp.pop("n_estimators", 100))
+    n_chunks = max(1, count_batches(files, batch_rows))
+    reg = RandomForestRegressor(
+        n_estimators=0, warm_start=True, random_state=cfg.random_state, n_jobs=cfg.n_jobs, **hp
+    )
+    log.info(
+        "chunked training",
+        extra={"files": len(files), "chunks": n_chunks, "trees": n_estimators},
+    )
+
+    held_out = sampled if zones is not None else None
+    for i, batch in enumerate(iter_batches(files, batch_rows, exclude=held_out)):
+        train = batch[split_labels(batch, cfg.random_state) == TRAIN]
+        # Trees so far follow i/n_chunks of n_estimators, so the forest ends at exactly
+        # n_estimators and, with more chunks than trees, the skipped chunks are spread out
+        target = min(n_estimators, math.ceil((i + 1) * n_estimators / n_chunks))
+        if train.empty or target <= reg.n_estimators:
+            continue
+        reg.set_params(n_estimators=target)
+        reg.fit(prep.transform(train.drop(columns=[TARGET])), train[TARGET].to_numpy())
+        log.info("fitted chunk", extra={"chunk": i, "rows": len(train), "trees": reg.n_estimators})
+
+    if reg.n_estimators == 0:
+        raise RuntimeError("No training rows found in feature partitions")
+    pipe = Pipeline([*head, ("prep", pre), ("model", reg)])
+    stats_bytes = attach_leaf_stats(cfg, reg, pre.transform(fit_layout), fit_y)
+
+    scores = {VAL: StreamingRegressionMetrics(), TEST: StreamingRegressionMetrics()}
+    for batch in iter_batches(files, batch_rows):
+        labels = split_labels(batch, cfg.random_state)
+        for split, acc in scores.items():
+            part = batch[labels == split]
+            if not part.empty:
+                acc.update(part[TARGET], pipe.predict(part.drop(columns=[TARGET])))
+
+    metrics = {
+        "mae_val": scores[VAL].mae,
+        "mae_test": scores[TEST].mae,
+        "r2_val": scores[VAL].r2,
+        "r2_test": scores[TEST].r2,
+        "leaf_stats_bytes": stats_bytes,
+    }
+    return pipe, metrics, sample
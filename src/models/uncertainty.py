@@ -0,0 +1,141 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LEVELS = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+DEFAULT_POINTS = 8
+
+
+@dataclass
+class LeafStats:
+    """Training-target statistics for every leaf of every tree in a forest.
+
+    Leaves of all trees share one table: `node_leaf[offsets[t] + node]` is the row of tree t's
+    node (-1 for split nodes). Each leaf keeps `points` of its training targets, taken at evenly
+    spaced ranks, so a leaf with at most that many rows keeps all of them. A prediction's
+    distribution pools the points of the leaves it reaches, each leaf weighted 1 / trees, as in
+    quantile regression forests; its std follows from the pooled first two moments. `value` is
+    the tree's own leaf output, so the point prediction matches `forest.predict`.
+    """
+
+    offsets: np.ndarray  # int64 (trees,)
+    node_leaf: np.ndarray  # int32 (total nodes,)
+    points: np.ndarray  # float32 (leaves, points)
+    mean: np.ndarray  # float32 (leaves,)
+    mean_sq: np.ndarray  # float32 (leaves,)
+    value: np.ndarray  # float32 (leaves,)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.node_leaf, self.points, self.mean, self.mean_sq, self.value)
+        return int(sum(a.nbytes for a in arrays))
+
+    def subset(self, trees: list[int]) -> "LeafStats":
+        """Stats for a forest keeping only `trees` (in that order), e.g. after compaction."""
+        ends = np.append(self.offsets[1:], len(self.node_leaf))
+        parts = [self.node_leaf[self.offsets[t] : ends[t]] for t in trees]
+        offsets = np.cumsum([0] + [len(p) for p in parts[:-1]]).astype(np.int64)
+        return LeafStats(
+            offsets, np.concatenate(parts), self.points, self.mean, self.mean_sq, self.value
+        )
+
+
+def _tree_leaf_stats(tree, leaf_ids: np.ndarray, y: np.ndarray, n_points: int):
+    """Per-leaf sample points and moments of y for one tree; leaves no row reached fall back to
+    the tree's stored leaf value."""
+    tree_ = tree.tree_
+    is_leaf = tree_.children_left == -1
+    value = tree_.value[:, 0, 0].astype(np.float32)
+    leaves = np.flatnonzero(is_leaf)
+    node_leaf = np.full(tree_.node_count, -1, dtype=np.int32)
+    node_leaf[leaves] = np.arange(len(leaves), dtype=np.int32)
+
+    points = np.repeat(value[leaves][:, None], n_points, axis=1)
+    mean = value[leaves].copy()
+    mean_sq = mean**2
+    order = np.lexsort((y, leaf_ids))
+    ids, ys = leaf_ids[order], y[order]
+    seen, start, count = np.unique(ids, return_index=True, return_counts=True)
+    # Actual targets at ranks k / n_points, not interpolated: a 2-row leaf keeps both values
+    ranks = np.floor(np.arange(n_points) / n_points * count[:, None]).astype(np.int64)
+    rows = node_leaf[seen]
+    points[rows] = ys[start[:, None] + ranks]
+    mean[rows] = np.add.reduceat(ys, start) / count
+    mean_sq[rows] = np.add.reduceat(ys**2, start) / count
+    return node_leaf, points, mean, mean_sq, value[leaves]
+
+
+def fit_leaf_stats(
+    forest, Xt: np.ndarray, y: np.ndarray, n_points: int = DEFAULT_POINTS
+) -> LeafStats:
+    """Capture leaf statistics from the (preprocessed) training rows, one tree at a time so
+    only one column of leaf ids is held in memory."""
+    y = np.asarray(y, dtype=np.float64)
+    parts = [_tree_leaf_stats(t, t.apply(Xt), y, n_points) for t in forest.estimators_]
+    n_leaves = np.cumsum([0] + [len(p[4]) for p in parts[:-1]])
+    node_counts = [len(p[0]) for p in parts]
+    stats = LeafStats(
+        offsets=np.cumsum([0] + node_counts[:-1]).astype(np.int64),
+        node_leaf=np.concatenate(
+            [np.where(p[0] >= 0, p[0] + base, -1) for p, base in zip(parts, n_leaves)]
+        ).astype(np.int32),
+        points=np.concatenate([p[1] for p in parts]).astype(np.float32),
+        mean=np.concatenate([p[2] for p in parts]).astype(np.float32),
+        mean_sq=np.concatenate([p[3] for p in parts]).astype(np.float32),
+        value=np.concatenate([p[4] for p in parts]).astype(np.float32),
+    )
+    log.info(
+        "captured leaf statistics",
+        extra={"trees": len(parts), "leaves": len(stats.value), "bytes": stats.nbytes},
+    )
+    return stats
+
+
+def parse_levels(raw: str | None) -> list[float]:
+    """Parse "0.1,0.9" into [0.1, 0.9]; raises ValueError for levels outside (0, 1)."""
+    if not raw:
+        return []
+    levels = [float(v) for v in raw.split(",") if v.strip()]
+    if any(not 0 < q < 1 for q in levels):
+        raise ValueError("quantiles must be in (0, 1)")
+    return levels
+
+
+def forest_distribution(
+    forest, stats: LeafStats, Xt: np.ndarray, levels, block_rows: int = 4096
+) -> pd.DataFrame:
+    """Point prediction, std and the requested quantiles for each row from a single
+    `forest.apply` traversal and one gather of leaf rows.
+
+    Quantiles are taken over the pooled points of a row's leaves (trees x points values), in
+    blocks of `block_rows` rows to bound memory.
+    """
+    rows = stats.node_leaf[forest.apply(Xt) + stats.offsets]  # (n, trees)
+    mean = stats.mean[rows].mean(axis=1, dtype=np.float64)
+    second = stats.mean_sq[rows].mean(axis=1, dtype=np.float64)
+    out = {
+        "prediction": stats.value[rows].mean(axis=1, dtype=np.float64),
+        "std": np.sqrt(np.maximum(second - mean**2, 0.0)),
+    }
+    if len(levels):
+        qs = np.empty((len(levels), len(rows)))
+        for i in range(0, len(rows), block_rows):
+            block = rows[i : i + block_rows]
+            pooled = stats.points[block].reshape(len(block), -1)
+            qs[:, i : i + block_rows] = np.quantile(pooled, levels, axis=1)
+        out.update({f"q{q:g}": qs[j] for j, q in enumerate(levels)})
+    return pd.DataFrame(out)
+
+
+def predict_distribution(pipe, X: pd.DataFrame, levels) -> pd.DataFrame:
+    """`forest_distribution` for a fitted pipeline whose model step carries `leaf_stats_`."""
+    forest = pipe[-1]
+    stats = getattr(forest, "leaf_stats_", None)
+    if stats is None:
+        raise ValueError("Model has no leaf statistics; retrain with model.uncertainty.enabled")
+    Xt = np.asarray(pipe[:-1].transform(X), dtype=np.float32)
+    return forest_distribution(forest, stats, Xt, levels)
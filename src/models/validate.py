@@ -5,6 +5,7 @@ from mlflow.tracking import MlflowClient
 
 from src.config import get_tracking_uri, load_config
 from src.logging_utils import setup_logging
+from src.models.tracking import latest_training_run
 
 
 def main():
@@ -13,12 +14,9 @@ def main():
     mlflow.set_tracking_uri(get_tracking_uri(cfg))
     client = MlflowClient()
     exp = client.get_experiment_by_name(cfg.mlflow["experiment"])
-    runs = client.search_runs(
-        exp.experiment_id, order_by=["attributes.start_time DESC"], max_results=1
-    )
-    if not runs:
+    run = latest_training_run(client, exp.experiment_id)
+    if run is None:
         raise RuntimeError("No runs found. Train first.")
-    run = runs[0]
     data = {
         "run_id": run.info.run_id,
         "metrics": run.data.metrics,
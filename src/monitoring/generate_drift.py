@@ -1,4 +1,6 @@
+import json
 import logging
+import time
 from pathlib import Path
 
 import mlflow
@@ -8,6 +10,45 @@ from evidently.report import Report
 
 from src.config import get_tracking_uri, load_config
 from src.logging_utils import setup_logging
+from src.monitoring.prediction_log import load_log
+
+TARGET = "duration_min"
+
+
+def drift_summary(report: dict) -> dict:
+    """Machine-readable drift metrics from an Evidently DataDriftPreset report dict."""
+    table = next(m["result"] for m in report["metrics"] if m["metric"] == "DataDriftTable")
+    return {
+        "generated_at": time.time(),
+        "dataset_drift": bool(table["dataset_drift"]),
+        "share_drifted": float(table["share_of_drifted_columns"]),
+        "n_drifted": int(table["number_of_drifted_columns"]),
+        "columns": {
+            col: {
+                "score": float(v["drift_score"]),
+                "drifted": bool(v["drift_detected"]),
+                "stattest": v["stattest_name"],
+                "threshold": float(v["stattest_threshold"]),
+            }
+            for col, v in table["drift_by_columns"].items()
+        },
+    }
+
+
+def current_frame(cfg) -> pd.DataFrame:
+    """Current data: the simulated drift set, or recent traffic from the API's prediction log."""
+    opts = cfg.drift
+    if opts.get("current_source", "simulated") == "predictions":
+        hours = float(opts.get("window_hours", 24))
+        log_dir = cfg.paths.get("predictions_dir", "data/prediction_log")
+        df = load_log(log_dir, since=time.time() - hours * 3600)
+        if len(df) < int(opts.get("min_rows", 500)):
+            raise RuntimeError(f"Only {len(df)} logged predictions in the last {hours:g}h")
+        return df
+    cur = Path(cfg.paths["current_dir"]) / "current.parquet"
+    if not cur.exists():
+        raise FileNotFoundError("Missing current dataset. Run simulate_drift.")
+    return pd.read_parquet(cur)
 
 
 def main():
@@ -17,38 +58,57 @@ def main():
     mlflow.set_experiment(cfg.mlflow["experiment"])
 
     ref = Path(cfg.paths["reference_path"])
-    cur_dir = Path(cfg.paths["current_dir"])
-    cur = cur_dir / "current.parquet"
-    if not ref.exists() or not cur.exists():
-        error_msg = "Missing reference or current dataset. Run transform and simulate_drift."
-        raise FileNotFoundError(error_msg)
-
+    if not ref.exists():
+        raise FileNotFoundError("Missing reference dataset. Run transform.")
     ref_df = pd.read_parquet(ref)
-    cur_df = pd.read_parquet(cur)
+    cur_df = current_frame(cfg)
+    # Logged predictions carry the model inputs but no ground truth
+    shared = [c for c in ref_df.columns if c in cur_df.columns]
+    ref_df, cur_df = ref_df[shared], cur_df[shared]
 
     log = logging.getLogger(__name__)
     with mlflow.start_run(run_name="drift-report"):
         data_report = Report(metrics=[DataDriftPreset()])
         data_report.run(reference_data=ref_df, current_data=cur_df)
-        target_report = Report(metrics=[TargetDriftPreset()])
-        target_report.run(reference_data=ref_df, current_data=cur_df)
-
         out_dir = Path("reports")
         out_dir.mkdir(exist_ok=True)
         data_html = out_dir / "data_drift.html"
-        target_html = out_dir / "target_drift.html"
         data_report.save_html(str(data_html))
-        target_report.save_html(str(target_html))
+        target_html = None
+        if TARGET in shared:
+            target_report = Report(metrics=[TargetDriftPreset()])
+            target_report.run(reference_data=ref_df, current_data=cur_df)
+            target_html = out_dir / "target_drift.html"
+            target_report.save_html(str(target_html))
+            mlflow.log_artifact(str(target_html))
+
+        # Consumed by the retraining policy (src/monitoring/retrain_policy.py)
+        summary = drift_summary(data_report.as_dict())
+        metrics_path = Path(cfg.paths.get("drift_metrics", "reports/drift_metrics.json"))
+        metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(metrics_path, "w") as f:
+            json.dump(summary, f, indent=2)
 
         mlflow.log_artifact(str(data_html))
-        mlflow.log_artifact(str(target_html))
+        mlflow.log_artifact(str(metrics_path))
+        mlflow.log_metrics(
+            {
+                "drift_share": summary["share_drifted"],
+                "dataset_drift": float(summary["dataset_drift"]),
+                **{f"drift_score_{c}": v["score"] for c, v in summary["columns"].items()},
+            }
+        )
     log.info(
         "drift reports saved & logged",
         extra={
             "data_html": str(data_html),
-            "target_html": str(target_html),
+            "target_html": str(target_html) if target_html else None,
+            "current_rows": len(cur_df),
+            "drift_metrics": str(metrics_path),
+            "share_drifted": summary["share_drifted"],
         },
     )
+    return summary
 
 
 if __name__ == "__main__":
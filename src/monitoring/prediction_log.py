@@ -0,0 +1,170 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+log = logging.getLogger(__name__)
+
+_TICK = object()  # flush_interval_s elapsed with rows buffered
+_STOP = object()
+
+
+def _column(chunks: list) -> pa.ChunkedArray:
+    arrays = [pa.array(c, from_pandas=True) for c in chunks]
+    types = [a.type for a in arrays if a.type != pa.null()]
+    if types:
+        arrays = [a.cast(types[0]) if a.type != types[0] else a for a in arrays]
+    return pa.chunked_array(arrays)
+
+
+class PredictionLog:
+    """Append-only parquet log written off the request path by a background thread.
+
+    `append` / `append_frame` never block on I/O: rows go onto a queue and the writer keeps
+    them column by column, writing one file per `flush_rows` rows or `flush_interval_s`
+    seconds, whichever comes first. At most `max_rows` rows are queued or buffered; beyond
+    that new rows are dropped and counted in `dropped` instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        prefix: str = "predictions",
+        max_rows: int = 100_000,
+        flush_rows: int = 10_000,
+        flush_interval_s: float = 60.0,
+    ):
+        self.out_dir = Path(out_dir)
+        self.prefix = prefix
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self.written = 0
+        self.files = 0
+        self._pending = 0  # rows queued or buffered, not yet written
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"{prefix}-log", daemon=True)
+        self._thread.start()
+
+    def resize(self, max_rows: int, flush_rows: int, flush_interval_s: Optional[float] = None):
+        with self._lock:
+            self.max_rows, self.flush_rows = max_rows, flush_rows
+            if flush_interval_s is not None:
+                self.flush_interval_s = flush_interval_s
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        return self._offer({k: [v] for k, v in record.items()}, 1)
+
+    def append_frame(self, df: pd.DataFrame, **extra) -> bool:
+        """Log df's rows plus `extra` columns (scalars are repeated, arrays taken per row)."""
+        n = len(df)
+        columns = {c: df[c].to_numpy(copy=True) for c in df.columns}
+        for name, value in extra.items():
+            columns[name] = [value] * n if np.ndim(value) == 0 else np.array(value, copy=True)
+        return self._offer(columns, n)
+
+    def _offer(self, columns: dict, n: int) -> bool:
+        with self._lock:
+            if self._pending + n > self.max_rows or not self._thread.is_alive():
+                self.dropped += n
+                return False
+            self._pending += n
+        self._queue.put((columns, n))
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Write everything appended so far and wait for it."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+        return {
+            "pending": pending,
+            "written": self.written,
+            "files": self.files,
+            "dropped": self.dropped,
+        }
+
+    def _run(self) -> None:
+        buf: Dict[str, list] = {}
+        rows, first_at = 0, 0.0
+        while True:
+            timeout = (
+                None if not rows else max(0.0, first_at + self.flush_interval_s - time.monotonic())
+            )
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _TICK
+            if isinstance(item, tuple):
+                columns, n = item
+                for name in buf.keys() - columns.keys():
+                    buf[name].append([None] * n)
+                for name, values in columns.items():
+                    buf.setdefault(name, [[None] * rows] if rows else []).append(values)
+                if not rows:
+                    first_at = time.monotonic()
+                rows += n
+                if rows < self.flush_rows:
+                    continue
+            if rows:
+                self._write(buf, rows)
+                buf, rows = {}, 0
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def _write(self, buf: Dict[str, list], rows: int) -> Optional[Path]:
+        self._seq += 1
+        out = self.out_dir / f"{self.prefix}-{int(time.time() * 1000)}-{self._seq:05d}.parquet"
+        try:
+            table = pa.table({name: _column(chunks) for name, chunks in buf.items()})
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            # Readers glob *.parquet, so they never see a partly written file
+            tmp = out.with_suffix(".tmp")
+            pq.write_table(table, tmp)
+            tmp.replace(out)
+        except Exception:  # noqa: BLE001 - logging must never take the writer thread down
+            log.exception("prediction log write failed", extra={"prefix": self.prefix})
+            with self._lock:
+                self._pending -= rows
+                self.dropped += rows
+            return None
+        with self._lock:
+            self._pending -= rows
+            self.written += rows
+            self.files += 1
+        log.info("flushed prediction log", extra={"path": str(out), "rows": rows})
+        return out
+
+
+def load_log(
+    log_dir: str | Path, prefix: str = "predictions", since: Optional[float] = None
+) -> pd.DataFrame:
+    """Concatenate a log's files, optionally only those written at or after `since` (epoch s)."""
+    files = sorted(Path(log_dir).glob(f"{prefix}-*.parquet"))
+    if since is not None:
+        files = [f for f in files if int(f.stem.split("-")[-2]) >= since * 1000]
+    if not files:
+        return pd.DataFrame()
+    return pa.concat_tables(
+        [pq.read_table(f) for f in files], promote_options="default"
+    ).to_pandas()
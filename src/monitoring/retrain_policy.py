@@ -0,0 +1,173 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.config import load_config
+from src.data.get_data import source_urls
+from src.logging_utils import setup_logging
+
+log = logging.getLogger(__name__)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_partitions(cfg) -> list[str]:
+    """Training data partitions: raw files on disk plus the sources the config asks for."""
+    names = {p.name for p in Path(cfg.paths["raw_dir"]).glob("*.parquet")}
+    names |= {url.split("/")[-1] for url in source_urls(cfg)}
+    return sorted(names)
+
+
+def drifted_columns(drift: Optional[dict]) -> list[str]:
+    return sorted(c for c, v in (drift or {}).get("columns", {}).items() if v.get("drifted"))
+
+
+def evaluate(opts: dict, drift: Optional[dict], state: dict, partitions: list, now: float) -> dict:
+    """Decide whether to retrain; pure, so the policy can be replayed over past inputs.
+
+    Triggers: a drift report newer than the last retrain that differs from the drift seen then
+    (columns drifted that were not, or a share up by `min_share_increase`) and either reaches
+    `min_drift_share` or newly flags one of `trigger_columns`; partitions not seen at the
+    last retrain; or `max_interval_hours` without any retrain. Unchanged drift does not
+    trigger again, since retraining on the same data would not remove it. Triggers within
+    `min_interval_hours` of the previous trigger (including one whose training is still
+    pending) are debounced.
+    """
+    reasons = []
+    seen = state.get("drift", {"share": 0.0, "columns": []})
+    if drift and drift.get("generated_at", 0) > state.get("drift_seen_at", 0):
+        share, min_share = drift["share_drifted"], float(opts.get("min_drift_share", 0.5))
+        new_columns = sorted(set(drifted_columns(drift)) - set(seen["columns"]))
+        grew = share >= seen["share"] + float(opts.get("min_share_increase", 0.1))
+        if share >= min_share and (new_columns or grew):
+            reasons.append(f"drift share {share:.2f} >= {min_share}")
+        flagged = [c for c in opts.get("trigger_columns", []) if c in new_columns]
+        if flagged:
+            reasons.append(f"drift in {flagged}")
+    new = sorted(set(partitions) - set(state.get("partitions", [])))
+    if new and opts.get("on_new_partitions", True):
+        reasons.append(f"new partitions {new}")
+    last = state.get("last_trigger_at")
+    pending = state.get("pending")
+    if pending is not None:
+        last = max(last or 0.0, pending["ts"])
+    max_hours = opts.get("max_interval_hours")
+    if max_hours and last is not None and now - last >= max_hours * 3600:
+        reasons.append(f"no retrain for {max_hours}h")
+
+    debounced = bool(reasons) and last is not None
+    debounced = debounced and now - last < float(opts.get("min_interval_hours", 0)) * 3600
+    return {
+        "ts": now,
+        "retrain": bool(reasons) and not debounced,
+        "debounced": debounced,
+        "reasons": reasons,
+        "new_partitions": new,
+        "drift_share": drift.get("share_drifted") if drift else None,
+        "drift_generated_at": drift.get("generated_at") if drift else None,
+    }
+
+
+def savings(decisions: list[dict], baseline_hours: float) -> Dict[str, Any]:
+    """Retrains triggered by the policy vs. runs a fixed `baseline_hours` schedule would make."""
+    if not decisions:
+        return {"evaluations": 0, "retrains": 0, "fixed_schedule_runs": 0, "runs_saved": 0}
+    span_h = (decisions[-1]["ts"] - decisions[0]["ts"]) / 3600
+    fixed = int(span_h // baseline_hours) + 1
+    retrains = sum(d["retrain"] for d in decisions)
+    return {
+        "evaluations": len(decisions),
+        "retrains": retrains,
+        "debounced": sum(d["debounced"] for d in decisions),
+        "span_hours": round(span_h, 2),
+        "fixed_schedule_runs": fixed,
+        "runs_saved": fixed - retrains,
+    }
+
+
+def snapshot(drift: Optional[dict], partitions: list, now: float) -> dict:
+    """What a retrain started at `now` will have seen; committed once training succeeds."""
+    return {
+        "ts": now,
+        "partitions": partitions,
+        "drift_seen_at": drift.get("generated_at", 0) if drift else 0,
+        "drift": {
+            "share": drift["share_drifted"] if drift else 0.0,
+            "columns": drifted_columns(drift),
+        },
+    }
+
+
+def _write_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def _inputs(cfg) -> tuple[Path, dict, Optional[dict], list]:
+    state_path = Path(cfg.retrain.get("state_path", "data/retrain_state.json"))
+    drift = _read_json(Path(cfg.paths.get("drift_metrics", "reports/drift_metrics.json")))
+    return state_path, _read_json(state_path) or {}, drift, current_partitions(cfg)
+
+
+def record_retrain() -> dict:
+    """Commit the pending trigger (or, for a manual run, the current inputs) as the last
+    retrain. Runs as the final task of training_dag, so a failed run leaves the state as it
+    was and the trigger fires again after `min_interval_hours`."""
+    cfg = load_config()
+    setup_logging(cfg)
+    state_path, state, drift, partitions = _inputs(cfg)
+    done = state.pop("pending", None) or snapshot(drift, partitions, time.time())
+    state.update(
+        last_trigger_at=done["ts"],
+        last_retrain_at=time.time(),
+        partitions=done["partitions"],
+        drift_seen_at=done["drift_seen_at"],
+        drift=done["drift"],
+    )
+    _write_state(state_path, state)
+    log.info("recorded retrain", extra={"partitions": len(done["partitions"]), **done["drift"]})
+    return state
+
+
+def main() -> bool:
+    """Evaluate the policy once, record the decision, and return whether to retrain."""
+    cfg = load_config()
+    setup_logging(cfg)
+    opts = cfg.retrain
+    log_path = Path(opts.get("decisions_log", "reports/retrain_decisions.jsonl"))
+    state_path, state, drift, partitions = _inputs(cfg)
+
+    decision = evaluate(opts, drift, state, partitions, time.time())
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(decision) + "\n")
+    if decision["retrain"]:
+        # Debounces further triggers; record_retrain commits it when training succeeds
+        state["pending"] = snapshot(drift, partitions, decision["ts"])
+        _write_state(state_path, state)
+
+    with open(log_path, "r", encoding="utf-8") as f:
+        history = [json.loads(line) for line in f if line.strip()]
+    summary = savings(history, float(opts.get("baseline_interval_hours", 24)))
+    log.info(
+        "retrain decision",
+        extra={
+            "retrain": decision["retrain"],
+            "debounced": decision["debounced"],
+            "reasons": decision["reasons"],
+            **summary,
+        },
+    )
+    return decision["retrain"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.monitoring.prediction_log import PredictionLog, load_log
+
+log = logging.getLogger(__name__)
+
+
+class ShadowLog(PredictionLog):
+    """Paired champion/challenger predictions, written like the prediction log.
+
+    At most `capacity` records wait to be written; beyond that new ones are dropped and
+    counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        capacity: int = 10_000,
+        flush_rows: int = 1_000,
+        flush_interval_s: float = 300.0,
+    ):
+        super().__init__(out_dir, "shadow", capacity, flush_rows, flush_interval_s)
+
+
+def load_shadow_log(log_dir: str | Path, since: Optional[float] = None) -> pd.DataFrame:
+    return load_log(log_dir, "shadow", since)
+
+
+def compare_shadow(df: pd.DataFrame, challenger_version: str, opts: dict) -> Dict[str, Any]:
+    """Compare challenger to champion on logged traffic for one challenger version.
+
+    Ground truth is not known at request time, so the gate is on divergence: the challenger
+    must have scored at least `min_samples` requests and stay within `max_mean_abs_diff`
+    minutes of the champion on average. It guards against a challenger that behaves
+    differently on live traffic, not against one that is less accurate; accuracy is gated
+    offline by `validation_thresholds`.
+    """
+    min_samples = int(opts.get("min_samples", 200))
+    if not df.empty:
+        df = df[df["challenger_version"] == str(challenger_version)]
+    result: Dict[str, Any] = {"challenger_version": str(challenger_version), "n": len(df)}
+    if len(df) < min_samples:
+        result.update(ok=False, enough_samples=False)
+        return result
+    diff = df["challenger_pred"].to_numpy() - df["champion_pred"].to_numpy()
+    result.update(
+        enough_samples=True,
+        mean_abs_diff=float(np.abs(diff).mean()),
+        mean_diff=float(diff.mean()),
+        p95_abs_diff=float(np.quantile(np.abs(diff), 0.95)),
+        champion_versions=sorted(df["champion_version"].astype(str).unique().tolist()),
+    )
+    result["ok"] = result["mean_abs_diff"] <= float(opts.get("max_mean_abs_diff", 2.0))
+    return result
@@ -1,24 +1,27 @@
+import asyncio
+import dataclasses
 import logging
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional
 
-import mlflow
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
-from mlflow.exceptions import MlflowException
-from mlflow.pyfunc import load_model
-from mlflow.tracking import MlflowClient
-
-try:
-    # Older MLflow raises RestException for registry errors
-    from mlflow.exceptions import RestException  # type: ignore
-except Exception:  # pragma: no cover - optional import for older versions
-    RestException = MlflowException  # type: ignore
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
-from src.config import get_tracking_uri, load_config
+from src.config import ConfigWatcher, get_tracking_uri, load_config
 from src.logging_utils import setup_logging
+from src.monitoring.prediction_log import PredictionLog
+from src.monitoring.shadow import ShadowLog
+from src.serve import formats
+from src.serve.executor import InferenceExecutor, Overloaded, distribution_uri, predict_uri
+from src.serve.lookup import LookupTable
 
-app = FastAPI(title="MLOps Final — Model API")
+app = FastAPI(title="MLOps Final — Model API", default_response_class=ORJSONResponse)
 log = logging.getLogger(__name__)
 
 
@@ -32,21 +35,144 @@ class InputData(BaseModel):
     payment_type: int
 
 
+# Ensure proper data types to match MLflow schema expectations
+# Based on the schema error messages, we need specific types:
+_SCHEMA_DTYPES = {
+    "passenger_count": "float64",  # double
+    "payment_type": "float64",  # double
+    "PULocationID": "int32",
+    "DOLocationID": "int32",
+    "hour": "int32",
+    "day_of_week": "int32",
+}
+
 _model = None
-_cfg = load_config()
+_model_version = None
+_model_uri = None
+_lookup = None
+# Config and mlflow are loaded on first use (startup), not when the module is imported
+_cfg = None
+# Model calls run on an explicit, bounded executor so the event loop (and /health) stays free
+_executor: Optional[InferenceExecutor] = None
+
+# Challenger ("Staging") model scored in shadow on a sample of /predict traffic
+_challenger = None
+_challenger_version = None
+_shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+# At most one shadow call queued or running; samples arriving meanwhile are skipped, so a slow
+# challenger cannot grow the pool's unbounded queue
+_shadow_future: Optional[Future] = None
+_shadow_log: Optional[ShadowLog] = None
+_watcher: Optional[ConfigWatcher] = None
+# Durable record of served predictions, written off the request path
+_prediction_log: Optional[PredictionLog] = None
+
+
+def _config():
+    global _cfg
+    if _cfg is None:
+        _cfg = load_config()
+    return _cfg
+
+
+def _shadow_opts() -> dict:
+    return _config().serving.get("shadow", {})
+
+
+def _apply_serving(new):
+    """Hot-reload hook, run on the event loop: adopt the new serving section in place.
+
+    Per-request settings (retry_after_s, batch.max_rows, shadow.sample_rate) are read through
+    _config() and apply immediately; the executor and the shadow and prediction logs are
+    resized here. Other
+    serving keys apply on the next /reload, other sections only after a restart.
+    """
+    global _cfg
+    old = _config()
+    if dataclasses.replace(new, serving=old.serving) != old:
+        log.warning("config changed outside `serving`; restart the API to apply it")
+    if new.serving == old.serving:
+        return
+    _cfg = dataclasses.replace(old, serving=new.serving)
+    if _executor is not None:
+        _executor.reconfigure(new.serving.get("inference", {}))
+    if _shadow_log is not None:
+        shadow = new.serving.get("shadow", {})
+        _shadow_log.resize(
+            int(shadow.get("buffer_rows", 10_000)), int(shadow.get("flush_rows", 1_000))
+        )
+    if _prediction_log is not None:
+        opts = new.serving.get("prediction_log", {})
+        _prediction_log.resize(
+            int(opts.get("max_rows", 200_000)),
+            int(opts.get("flush_rows", 50_000)),
+            float(opts.get("flush_interval_s", 60)),
+        )
+    log.info("applied serving config", extra={"serving": dict(new.serving)})
+
+
+def _registry_errors() -> tuple:
+    from mlflow.exceptions import MlflowException
+
+    try:
+        # Older MLflow raises RestException for registry errors
+        from mlflow.exceptions import RestException  # type: ignore
+    except Exception:  # pragma: no cover - optional import for older versions
+        RestException = MlflowException  # type: ignore
+    return MlflowException, RestException
+
+
+def _load_lookup(mv):
+    """Load the precomputed lookup table logged for this champion version, if enabled."""
+    import mlflow
+
+    global _lookup
+    _lookup = None
+    cfg = _config()
+    if not cfg.serving.get("lookup", {}).get("enabled", False):
+        return
+    dst = Path(cfg.paths.get("lookup_dir", "data/lookup")) / str(mv.version)
+    try:
+        dst.mkdir(parents=True, exist_ok=True)
+        local = mlflow.artifacts.download_artifacts(
+            run_id=mv.run_id, artifact_path="lookup", dst_path=str(dst)
+        )
+        table = LookupTable.load(local)
+    except (*_registry_errors(), OSError, ValueError) as exc:
+        log.warning("lookup table unavailable; using model", extra={"error": str(exc)})
+        return
+    if table.meta.get("model_version") != str(mv.version):
+        log.warning("lookup table built for another version; ignoring", extra=table.meta)
+        return
+    _lookup = table
+    log.info("loaded lookup table", extra={"version": mv.version, "bytes": table.nbytes})
 
 
 def _load_champion():
-    global _model
-    mlflow.set_tracking_uri(get_tracking_uri(_cfg))
-    name = _cfg.mlflow["model_name"]
+    import mlflow
+    from mlflow.pyfunc import load_model
+    from mlflow.tracking import MlflowClient
+
+    global _model, _model_version, _model_uri
+    mlflow.set_tracking_uri(get_tracking_uri(_config()))
+    name = _config().mlflow["model_name"]
     try:
-        _model = load_model(f"models:/{name}/Production")
-        log.info("loaded champion", extra={"model_name": name, "stage": "Production"})
+        # Resolve the version first so /health can report exactly what is being served
+        mv = MlflowClient().get_latest_versions(name=name, stages=["Production"])[0]
+        _model_uri = f"models:/{name}/{mv.version}"
+        _model = load_model(_model_uri)
+        _model_version = str(mv.version)
+        log.info(
+            "loaded champion",
+            extra={"model_name": name, "stage": "Production", "version": _model_version},
+        )
+        _load_lookup(mv)
         return True
-    except (MlflowException, RestException, FileNotFoundError) as exc:
+    except (*_registry_errors(), FileNotFoundError, IndexError) as exc:
         # Fallback to local artifacts (optional): not needed if registry exists
         _model = None
+        _model_version = None
+        _model_uri = None
         log.warning(
             "no champion in registry; model unset",
             extra={"model_name": name, "error": str(exc)},
@@ -54,57 +180,270 @@ def _load_champion():
         return False
 
 
+def _load_challenger():
+    from mlflow.pyfunc import load_model
+    from mlflow.tracking import MlflowClient
+
+    global _challenger, _challenger_version
+    if not _shadow_opts().get("enabled", False):
+        return False
+    name = _config().mlflow["model_name"]
+    stage = _shadow_opts().get("stage", "Staging")
+    try:
+        version = MlflowClient().get_latest_versions(name=name, stages=[stage])[0].version
+        _challenger = load_model(f"models:/{name}/{version}")
+        _challenger_version = str(version)
+        log.info("loaded challenger", extra={"stage": stage, "version": _challenger_version})
+        return True
+    except (*_registry_errors(), FileNotFoundError, IndexError) as exc:
+        _challenger = None
+        _challenger_version = None
+        log.info("no challenger to shadow", extra={"stage": stage, "error": str(exc)})
+        return False
+
+
+def _score_shadow(challenger, challenger_version, champion_version, df, champion_pred):
+    """Runs on the shadow executor, never on the request path."""
+    try:
+        y = challenger.predict(df)
+        _shadow_log.append(
+            {
+                "ts": time.time(),
+                "champion_version": champion_version,
+                "challenger_version": challenger_version,
+                **df.to_dict("records")[0],
+                "champion_pred": champion_pred,
+                "challenger_pred": float(y[0]),
+            }
+        )
+    except Exception:  # noqa: BLE001 - shadow failures must never affect serving
+        log.exception("shadow scoring failed")
+
+
+def _model_distribution(model, df: pd.DataFrame, levels) -> pd.DataFrame:
+    from src.models.serialization import unwrap_pipeline
+    from src.models.uncertainty import predict_distribution
+
+    return predict_distribution(unwrap_pipeline(model), df, levels)
+
+
+def _sample_shadow(df: pd.DataFrame, champion_pred: float) -> None:
+    global _shadow_future
+    challenger = _challenger
+    if challenger is None or random.random() >= _shadow_opts().get("sample_rate", 0.1):
+        return
+    if _shadow_future is not None and not _shadow_future.done():
+        return  # previous sample still being scored
+    _shadow_future = _shadow_pool.submit(
+        _score_shadow, challenger, _challenger_version, _model_version, df, champion_pred
+    )
+
+
+async def _predict_frame(df: pd.DataFrame, levels=None):
+    """Score df on the inference executor; 503 with Retry-After when its queue is full.
+
+    With `levels` (a list, possibly empty) the result is a frame of prediction, std and
+    quantile columns instead of bare predictions.
+    """
+    try:
+        if levels is not None:
+            if _executor.kind == "process":
+                return await _executor.run(distribution_uri, _model_uri, df, levels)
+            return await _executor.run(_model_distribution, _model, df, levels)
+        if _executor.kind == "process":
+            return await _executor.run(predict_uri, _model_uri, df)
+        return await _executor.run(_model.predict, df)
+    except Overloaded as exc:
+        retry_after = str(_config().serving.get("inference", {}).get("retry_after_s", 1))
+        raise HTTPException(
+            status_code=503, detail="Inference queue full", headers={"Retry-After": retry_after}
+        ) from exc
+
+
+async def _score(df: pd.DataFrame) -> np.ndarray:
+    """Precomputed table where rows are covered; one model call for the rest."""
+    df = df.astype(_SCHEMA_DTYPES)
+    pred = _lookup.lookup_many(df) if _lookup is not None else np.full(len(df), np.nan)
+    missing = np.isnan(pred)
+    if missing.any():
+        rest = df if missing.all() else df[missing]
+        pred[missing] = np.asarray(await _predict_frame(rest), dtype=np.float64).reshape(-1)
+    return pred
+
+
+def _levels(quantiles: Optional[str], std: bool):
+    """Requested quantile levels; None when the plain point prediction will do."""
+    from src.models.uncertainty import parse_levels
+
+    try:
+        levels = parse_levels(quantiles)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"quantiles: {exc}") from exc
+    return levels if levels or std else None
+
+
+async def _distribution(df: pd.DataFrame, levels, std: bool) -> pd.DataFrame:
+    """Intervals come from the model's leaf statistics, so the lookup table is bypassed."""
+    try:
+        out = await _predict_frame(df.astype(_SCHEMA_DTYPES), levels)
+    except ValueError as exc:  # model trained without leaf statistics
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return out if std else out.drop(columns="std")
+
+
+def _log_predictions(df: pd.DataFrame, pred) -> None:
+    if _prediction_log is not None:
+        _prediction_log.append_frame(
+            df, ts=time.time(), model_version=str(_model_version), prediction=pred
+        )
+
+
 @app.on_event("startup")
-def startup_event():
-    setup_logging(_cfg)
+async def startup_event():
+    global _executor, _shadow_log, _watcher, _prediction_log
+    cfg = _config()
+    setup_logging(cfg)
+    opts = cfg.serving.get("prediction_log", {})
+    if opts.get("enabled", False):
+        _prediction_log = PredictionLog(
+            cfg.paths.get("predictions_dir", "data/prediction_log"),
+            max_rows=int(opts.get("max_rows", 200_000)),
+            flush_rows=int(opts.get("flush_rows", 50_000)),
+            flush_interval_s=float(opts.get("flush_interval_s", 60)),
+        )
+    shadow = _shadow_opts()
+    _shadow_log = ShadowLog(
+        cfg.paths.get("shadow_dir", "data/shadow"),
+        capacity=int(shadow.get("buffer_rows", 10_000)),
+        flush_rows=int(shadow.get("flush_rows", 1_000)),
+    )
     _load_champion()
+    _load_challenger()
+    _executor = InferenceExecutor(cfg.serving.get("inference", {}), get_tracking_uri(cfg))
+    hot = cfg.serving.get("hot_reload", {})
+    if hot.get("enabled", False):
+        loop = asyncio.get_running_loop()
+        _watcher = ConfigWatcher(
+            lambda new: loop.call_soon_threadsafe(_apply_serving, new),
+            interval_s=float(hot.get("interval_s", 2.0)),
+        ).start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if _watcher is not None:
+        _watcher.stop()
+    if _executor is not None:
+        _executor.shutdown()
+    _shadow_pool.shutdown(wait=True)
+    for record_log in (_shadow_log, _prediction_log):
+        if record_log is not None:
+            record_log.close()
 
 
 @app.get("/health")
-def health():
-    return {"status": "ok" if _model is not None else "no-model"}
+async def health():
+    return {
+        "status": "ok" if _model is not None else "no-model",
+        "version": _model_version,
+        "shadow_version": _challenger_version,
+        "inference": _executor.stats() if _executor is not None else None,
+        "prediction_log": _prediction_log.stats() if _prediction_log is not None else None,
+    }
 
 
 @app.post("/reload")
-def reload_model():
-    if not _load_champion():
+async def reload_model():
+    # Registry calls and model loading block; keep them off the event loop
+    if not await asyncio.to_thread(_load_champion):
         raise HTTPException(status_code=503, detail="Champion not available")
-    return {"status": "reloaded"}
+    await asyncio.to_thread(_load_challenger)
+    return {"status": "reloaded", "version": _model_version}
 
 
 @app.post("/predict")
-def predict(x: InputData):
-    if _model is None:
+async def predict(x: InputData, quantiles: Optional[str] = None, std: bool = False):
+    """`?quantiles=0.1,0.9&std=true` adds a prediction interval and spread to the response."""
+    if _model is None or _executor is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    df = pd.DataFrame([x.dict()])
+    df = pd.DataFrame([x.dict()]).astype(_SCHEMA_DTYPES)
+    levels = _levels(quantiles, std)
+    try:
+        extra = {}
+        if levels is None:
+            val = float((await _score(df))[0])
+        else:
+            row = (await _distribution(df, levels, std)).iloc[0]
+            val = float(row["prediction"])
+            if std:
+                extra["std"] = float(row["std"])
+            if levels:
+                extra["quantiles"] = {f"{q:g}": float(row[f"q{q:g}"]) for q in levels}
+        _log_predictions(df, [val])
+        _sample_shadow(df, val)
+        return {"prediction": val, **extra}
+    except HTTPException:
+        raise
+    except Exception as e:  # noqa: BLE001 - surface all prediction errors to the client
+        log.exception("prediction failed")
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-    # Ensure proper data types to match MLflow schema expectations
-    # Based on the schema error messages, we need specific types:
-    df["passenger_count"] = df["passenger_count"].astype("float64")  # double
-    df["payment_type"] = df["payment_type"].astype("float64")  # double
-    df["PULocationID"] = df["PULocationID"].astype("int32")  # int32
-    df["DOLocationID"] = df["DOLocationID"].astype("int32")  # int32
-    df["hour"] = df["hour"].astype("int32")  # int32
-    df["day_of_week"] = df["day_of_week"].astype("int32")  # int32
 
+@app.post("/predict/batch")
+async def predict_batch(request: Request, quantiles: Optional[str] = None, std: bool = False):
+    """Score many rows per request; Arrow IPC stream, Parquet or JSON bodies
+    (columnar or records), answered with a `prediction` column in the negotiated format, plus
+    `std` and `q<level>` columns when requested as in /predict."""
+    if _model is None or _executor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    levels = _levels(quantiles, std)
+    try:
+        in_type, out_type = formats.negotiate(
+            request.headers.get("content-type"), request.headers.get("accept")
+        )
+    except formats.UnsupportedMediaType as exc:
+        raise HTTPException(status_code=415, detail=str(exc)) from exc
+    max_rows = int(_config().serving.get("batch", {}).get("max_rows", 100_000))
+    try:
+        df = formats.decode(await request.body(), in_type, max_rows)
+    except formats.TooManyRows as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except Exception as e:  # noqa: BLE001 - any decoder error means a malformed body
+        raise HTTPException(status_code=400, detail=f"Could not decode body: {e}") from e
+    df, errors = formats.validate_frame(df, InputData)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
     try:
-        y = _model.predict(df)
-        val = float(y[0]) if hasattr(y, "__len__") else float(y)
-        log.debug("prediction", extra={"input": x.dict(), "prediction": val})
-        return {"prediction": val}
+        if levels is None:
+            out = pd.DataFrame({"prediction": await _score(df)})
+        else:
+            out = await _distribution(df, levels, std)
+    except HTTPException:
+        raise
     except Exception as e:  # noqa: BLE001 - surface all prediction errors to the client
-        log.exception("prediction failed")
+        log.exception("batch prediction failed")
         raise HTTPException(status_code=400, detail=str(e)) from e
+    _log_predictions(df, out["prediction"].to_numpy())
+    log.debug("batch prediction", extra={"rows": len(df), "format": in_type})
+    body = formats.encode(out, out_type)
+    return Response(content=body, media_type=out_type)
 
 
 @app.get("/model")
-def model_info():
-    mlflow.set_tracking_uri(get_tracking_uri(_cfg))
+async def model_info():
+    return await asyncio.to_thread(_model_info)
+
+
+def _model_info():
+    import mlflow
+    from mlflow.tracking import MlflowClient
+
+    mlflow.set_tracking_uri(get_tracking_uri(_config()))
     client = MlflowClient()
-    name = _cfg.mlflow["model_name"]
+    name = _config().mlflow["model_name"]
     try:
         latest = client.get_latest_versions(name=name, stages=["Production"])[0]
-    except (MlflowException, RestException, IndexError) as exc:
+    except (*_registry_errors(), IndexError) as exc:
         raise HTTPException(status_code=404, detail="No production model") from exc
     run = client.get_run(latest.run_id)
     params = run.data.params
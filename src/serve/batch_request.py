@@ -0,0 +1,56 @@
+import argparse
+import time
+
+import pandas as pd
+import requests
+
+from src.serve import formats
+
+FORMATS = {
+    "arrow": formats.ARROW,
+    "parquet": formats.PARQUET,
+    "json": formats.JSON,
+}
+COLUMNS = [
+    "trip_distance",
+    "passenger_count",
+    "PULocationID",
+    "DOLocationID",
+    "hour",
+    "day_of_week",
+    "payment_type",
+]
+
+
+def score_batch(
+    frame: pd.DataFrame, url: str = "http://localhost:8000", fmt: str = "arrow"
+) -> pd.DataFrame:
+    """POST feature rows to /predict/batch in a binary format and decode the predictions."""
+    media_type = FORMATS[fmt]
+    r = requests.post(
+        f"{url.rstrip('/')}/predict/batch",
+        data=formats.encode(frame[COLUMNS], media_type),
+        headers={"Content-Type": media_type, "Accept": media_type},
+        timeout=60,
+    )
+    r.raise_for_status()
+    return formats.decode(r.content, media_type)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score reference rows via /predict/batch")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="arrow")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--reference", default="data/reference.parquet")
+    args = parser.parse_args()
+    frame = pd.read_parquet(args.reference, columns=COLUMNS).dropna().head(args.rows)
+    start = time.perf_counter()
+    pred = score_batch(frame, args.url, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"{len(pred)} rows via {args.format} in {elapsed:.3f}s ({len(pred) / elapsed:,.0f}/s)")
+    print(pred.head())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+# Per-process model cache for process-pool workers, keyed by model URI so a reload (new version,
+# new URI) is picked up lazily by each worker without restarting the pool
+_worker_models: dict = {}
+
+
+class Overloaded(RuntimeError):
+    """Raised when the inference queue is full; the caller should answer 503 + Retry-After."""
+
+
+def _init_worker(tracking_uri: str) -> None:
+    import mlflow
+
+    mlflow.set_tracking_uri(tracking_uri)
+
+
+def _worker_model(model_uri: str):
+    from mlflow.pyfunc import load_model
+
+    model = _worker_models.get(model_uri)
+    if model is None:
+        _worker_models.clear()
+        model = _worker_models[model_uri] = load_model(model_uri)
+    return model
+
+
+def predict_uri(model_uri: str, frame):
+    """Predict with the model at model_uri, loading it once per worker process."""
+    return _worker_model(model_uri).predict(frame)
+
+
+def distribution_uri(model_uri: str, frame, levels):
+    """Prediction, std and quantiles (see src.models.uncertainty) with a worker's model."""
+    from src.models.serialization import unwrap_pipeline
+    from src.models.uncertainty import predict_distribution
+
+    return predict_distribution(unwrap_pipeline(_worker_model(model_uri)), frame, levels)
+
+
+class InferenceExecutor:
+    """Runs model calls off the event loop on a fixed pool with a bounded number of waiters.
+
+    At most `max_workers` calls execute and `max_queue` more may wait; beyond that `run` raises
+    `Overloaded` immediately instead of letting requests pile up. Counting happens on the event
+    loop thread, so no lock is needed.
+    """
+
+    def __init__(self, opts: dict, tracking_uri: str):
+        self.kind = opts.get("kind", "thread")
+        self.max_workers = int(opts.get("max_workers", 2))
+        self.max_queue = int(opts.get("max_queue", 32))
+        self.pending = 0
+        self.rejected = 0
+        self._tracking_uri = tracking_uri
+        self._pool = self._make_pool()
+        log.info(
+            "inference executor started",
+            extra={"kind": self.kind, "workers": self.max_workers, "queue": self.max_queue},
+        )
+
+    def _make_pool(self) -> Executor:
+        if self.kind == "process":
+            return ProcessPoolExecutor(
+                self.max_workers, initializer=_init_worker, initargs=(self._tracking_uri,)
+            )
+        if self.kind == "thread":
+            return ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+        raise ValueError(f"Unknown inference executor kind: {self.kind}")
+
+    def reconfigure(self, opts: dict) -> None:
+        """Apply new limits live. A new pool kind or size swaps in a fresh pool; calls already
+        running finish on the old one."""
+        self.max_queue = int(opts.get("max_queue", 32))
+        kind, workers = opts.get("kind", "thread"), int(opts.get("max_workers", 2))
+        if (kind, workers) != (self.kind, self.max_workers):
+            old = self._pool
+            self.kind, self.max_workers = kind, workers
+            self._pool = self._make_pool()
+            old.shutdown(wait=False)
+        log.info("inference executor reconfigured", extra=self.stats())
+
+    @property
+    def full(self) -> bool:
+        return self.pending >= self.max_workers + self.max_queue
+
+    async def run(self, fn: Callable, *args) -> Any:
+        if self.full:
+            self.rejected += 1
+            raise Overloaded(f"{self.pending} inference calls in flight")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "pending": self.pending,
+            "capacity": self.max_workers + self.max_queue,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
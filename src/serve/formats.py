@@ -0,0 +1,130 @@
+import io
+import json
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel
+
+ARROW = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+JSON = "application/json"
+MEDIA_TYPES = {
+    ARROW: ARROW,
+    "application/x-arrow": ARROW,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+    JSON: JSON,
+}
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+class TooManyRows(ValueError):
+    pass
+
+
+def _check_rows(rows: int, max_rows: Optional[int]) -> None:
+    if max_rows is not None and rows > max_rows:
+        raise TooManyRows(f"{rows} rows exceeds max_rows={max_rows}")
+
+
+def negotiate(content_type: Optional[str], accept: Optional[str]) -> tuple[str, str]:
+    """(request format, response format); the response mirrors the request unless Accept names
+    another supported type."""
+    request_type = MEDIA_TYPES.get((content_type or JSON).split(";")[0].strip().lower())
+    if request_type is None:
+        raise UnsupportedMediaType(f"Unsupported Content-Type: {content_type}")
+    for part in (accept or "").split(","):
+        response_type = MEDIA_TYPES.get(part.split(";")[0].strip().lower())
+        if response_type:
+            return request_type, response_type
+    return request_type, request_type
+
+
+def decode(body: bytes, media_type: str, max_rows: Optional[int] = None) -> pd.DataFrame:
+    """Body as a frame; raises TooManyRows beyond `max_rows`, for Arrow and Parquet before any
+    rows are converted to pandas."""
+    if media_type == ARROW:
+        # The IPC stream is read in place from the request buffer, one record batch at a time
+        reader = pa.ipc.open_stream(pa.py_buffer(body))
+        batches, rows = [], 0
+        for batch in reader:
+            rows += batch.num_rows
+            _check_rows(rows, max_rows)
+            batches.append(batch)
+        return pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+    if media_type == PARQUET:
+        parquet = pq.ParquetFile(pa.BufferReader(body))
+        _check_rows(parquet.metadata.num_rows, max_rows)
+        return parquet.read().to_pandas()
+    # Columnar {"col": [...]} or row-wise [{"col": ...}, ...]
+    frame = pd.DataFrame(json.loads(body))
+    _check_rows(len(frame), max_rows)
+    return frame
+
+
+def encode(frame: pd.DataFrame, media_type: str) -> bytes:
+    if media_type == ARROW:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_type == PARQUET:
+        buf = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), buf)
+        return buf.getvalue()
+    columns = {c: _json_values(frame[c]) for c in frame.columns}
+    return json.dumps(columns, allow_nan=False).encode("utf-8")
+
+
+def _json_values(col: pd.Series) -> list:
+    # NaN is not valid JSON; missing values go out as null
+    if col.hasnans:
+        return col.astype(object).where(col.notna(), None).tolist()
+    return col.tolist()
+
+
+def validate_frame(frame: pd.DataFrame, schema: type[BaseModel]) -> tuple[pd.DataFrame, dict]:
+    """Vectorized equivalent of validating every row against `schema`.
+
+    Missing optional columns / nulls get the field default; required columns must be present
+    and non-null. Every given value must be numeric (as pydantic requires on /predict) and
+    within the Field(ge=..., le=...) bounds. Returns the frame restricted to the schema
+    columns and {column: error} for each failing column.
+    """
+    out, errors = {}, {}
+    for name, field in schema.model_fields.items():
+        if name not in frame.columns:
+            if field.is_required():
+                errors[name] = "missing column"
+                continue
+            col = pd.Series(field.default, index=frame.index)
+            bad = np.zeros(len(frame), dtype=bool)
+        else:
+            given = frame[name].notna().to_numpy()
+            col = pd.to_numeric(frame[name], errors="coerce")
+            # Values coercion turned into NaN were not numbers; only real nulls get the default
+            bad = given & col.isna().to_numpy()
+            if field.is_required():
+                bad |= ~given
+            else:
+                col = col.fillna(field.default)
+        values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+        for meta in field.metadata:
+            if getattr(meta, "ge", None) is not None:
+                bad |= values < meta.ge
+            if getattr(meta, "le", None) is not None:
+                bad |= values > meta.le
+        if field.annotation in (int, Optional[int]):
+            bad |= ~np.isnan(values) & (values != np.round(values))
+        if bad.any():
+            rows = np.flatnonzero(bad)
+            errors[name] = f"{len(rows)} invalid rows, first at {rows[:5].tolist()}"
+        out[name] = col
+    return pd.DataFrame(out), errors
@@ -0,0 +1,167 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+N_ZONES = 266  # TLC zone ids are 1..265
+N_CODES = 16  # payment types / passenger counts are small non-negative ints
+FEATURES = [
+    "trip_distance",
+    "passenger_count",
+    "PULocationID",
+    "DOLocationID",
+    "payment_type",
+    "hour",
+    "day_of_week",
+]
+
+
+def _code_index(codes) -> np.ndarray:
+    index = np.full(N_CODES, -1, dtype=np.int16)
+    index[np.asarray(codes, dtype=int)] = np.arange(len(codes))
+    return index
+
+
+@dataclass
+class LookupTable:
+    """Model predictions precomputed over frequent (PU, DO) pairs × hour × dow × payment ×
+    passengers × distance knots; distance is interpolated linearly between knots."""
+
+    values: np.ndarray  # float32 (pairs, 24, 7, payments, passengers, knots)
+    pair_index: np.ndarray  # int32 (N_ZONES, N_ZONES), -1 when the pair is not tabulated
+    knots: np.ndarray
+    payment_types: list
+    passenger_counts: list
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._payment_index = _code_index(self.payment_types)
+        self._passenger_index = _code_index(self.passenger_counts)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.pair_index.nbytes + self.knots.nbytes)
+
+    def lookup_many(self, frame: pd.DataFrame) -> np.ndarray:
+        """Interpolated predictions per row; NaN where the row falls outside the table."""
+        pu = frame["PULocationID"].to_numpy(dtype=np.int64)
+        do = frame["DOLocationID"].to_numpy(dtype=np.int64)
+        hour = frame["hour"].to_numpy(dtype=np.int64)
+        dow = frame["day_of_week"].to_numpy(dtype=np.int64)
+        pay = frame["payment_type"].fillna(-1).to_numpy(dtype=np.int64)
+        pax = frame["passenger_count"].fillna(-1).to_numpy(dtype=np.int64)
+        dist = frame["trip_distance"].to_numpy(dtype=np.float64)
+
+        ok = (pu >= 0) & (pu < N_ZONES) & (do >= 0) & (do < N_ZONES)
+        ok &= (hour >= 0) & (hour < 24) & (dow >= 0) & (dow < 7)
+        ok &= (pay >= 0) & (pay < N_CODES) & (pax >= 0) & (pax < N_CODES)
+        ok &= (dist >= self.knots[0]) & (dist <= self.knots[-1])
+        pair = np.where(ok, self.pair_index[np.where(ok, pu, 0), np.where(ok, do, 0)], -1)
+        pay_i = np.where(ok, self._payment_index[np.where(ok, pay, 0)], -1)
+        pax_i = np.where(ok, self._passenger_index[np.where(ok, pax, 0)], -1)
+        ok &= (pair >= 0) & (pay_i >= 0) & (pax_i >= 0)
+
+        out = np.full(len(frame), np.nan)
+        if not ok.any():
+            return out
+        k = np.clip(np.searchsorted(self.knots, dist[ok], side="right") - 1, 0, len(self.knots) - 2)
+        curve = self.values[pair[ok], hour[ok], dow[ok], pay_i[ok], pax_i[ok]]
+        rows = np.arange(len(k))
+        lo, hi = curve[rows, k], curve[rows, k + 1]
+        w = (dist[ok] - self.knots[k]) / (self.knots[k + 1] - self.knots[k])
+        out[ok] = lo + w * (hi - lo)
+        return out
+
+    def save(self, out_dir: str | Path) -> Path:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.save(out_dir / "values.npy", self.values)
+        np.save(out_dir / "pair_index.npy", self.pair_index)
+        meta = {
+            **self.meta,
+            "knots": self.knots.tolist(),
+            "payment_types": list(self.payment_types),
+            "passenger_counts": list(self.passenger_counts),
+        }
+        with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return out_dir
+
+    @classmethod
+    def load(cls, in_dir: str | Path, mmap: bool = True) -> "LookupTable":
+        in_dir = Path(in_dir)
+        with open(in_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        return cls(
+            values=np.load(in_dir / "values.npy", mmap_mode=mode),
+            pair_index=np.load(in_dir / "pair_index.npy"),
+            knots=np.asarray(meta.pop("knots"), dtype=np.float64),
+            payment_types=meta.pop("payment_types"),
+            passenger_counts=meta.pop("passenger_counts"),
+            meta=meta,
+        )
+
+
+def build_table(pipe, reference: pd.DataFrame, opts: dict) -> LookupTable:
+    """Predict the grid with the model in bounded chunks and store it as float32."""
+    start = time.perf_counter()
+    top = reference.groupby(["PULocationID", "DOLocationID"]).size()
+    pairs = top.nlargest(int(opts.get("n_pairs", 200))).index.to_list()
+    knots = np.asarray(opts.get("distance_knots", [0, 0.5, 1, 2, 3, 5, 8, 12, 20, 30]), float)
+    payments = list(opts.get("payment_types", [1, 2]))
+    passengers = list(opts.get("passenger_counts", [1, 2]))
+
+    pair_index = np.full((N_ZONES, N_ZONES), -1, dtype=np.int32)
+    for i, (pu, do) in enumerate(pairs):
+        pair_index[int(pu), int(do)] = i
+    inner = pd.MultiIndex.from_product(
+        [range(24), range(7), payments, passengers, knots],
+        names=["hour", "day_of_week", "payment_type", "passenger_count", "trip_distance"],
+    ).to_frame(index=False)
+    values = np.empty((len(pairs), 24, 7, len(payments), len(passengers), len(knots)), np.float32)
+    pairs_per_chunk = max(1, int(opts.get("chunk_rows", 200_000)) // len(inner))
+    for c in range(0, len(pairs), pairs_per_chunk):
+        chunk = pairs[c : c + pairs_per_chunk]
+        grid = pd.concat([inner.assign(PULocationID=pu, DOLocationID=do) for pu, do in chunk])
+        grid = grid.astype(
+            {
+                "trip_distance": "float64",
+                "passenger_count": "float64",
+                "PULocationID": "int32",
+                "DOLocationID": "int32",
+                "payment_type": "float64",
+                "hour": "int32",
+                "day_of_week": "int32",
+            }
+        )[FEATURES]
+        values[c : c + len(chunk)] = pipe.predict(grid).reshape((len(chunk),) + values.shape[1:])
+    table = LookupTable(values, pair_index, knots, payments, passengers)
+    table.meta["build_s"] = time.perf_counter() - start
+    table.meta["bytes"] = table.nbytes
+    return table
+
+
+def interpolation_error(table: LookupTable, pipe, X: pd.DataFrame) -> Dict[str, float]:
+    """Max/mean |table - model| over the rows of X the table covers, and the coverage share."""
+    approx = table.lookup_many(X)
+    covered = ~np.isnan(approx)
+    if not covered.any():
+        return {
+            "coverage": 0.0,
+            "max_interp_error": float("nan"),
+            "mean_interp_error": float("nan"),
+        }
+    err = np.abs(approx[covered] - pipe.predict(X[covered]))
+    return {
+        "coverage": float(covered.mean()),
+        "max_interp_error": float(err.max()),
+        "mean_interp_error": float(err.mean()),
+    }
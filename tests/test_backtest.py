@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from src.models.backtest import month_of, plan_windows
+
+
+def test_plan_windows_rolls_over_every_month():
+    months = ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05"]
+    plans = plan_windows(months, window=3, horizons=2)
+    assert [p["train"] for p in plans] == [months[0:3], months[1:4]]
+    assert [p["score"] for p in plans] == [["2024-04", "2024-05"], ["2024-05"]]
+    assert plan_windows(months[:3], window=3) == []
+
+
+def test_plan_windows_does_not_bridge_missing_months():
+    months = ["2024-01", "2024-02", "2024-04", "2024-05", "2024-06", "2024-07"]
+    plans = plan_windows(months, window=2, horizons=2)
+    # 2024-03 is missing: no window trains across it, and 2024-04 is scored as two months ahead
+    assert [p["train"] for p in plans] == [
+        ["2024-01", "2024-02"],
+        ["2024-04", "2024-05"],
+        ["2024-05", "2024-06"],
+    ]
+    assert [p["score"] for p in plans] == [["2024-04"], ["2024-06", "2024-07"], ["2024-07"]]
+    assert [p["horizons"] for p in plans] == [[1], [0, 1], [0]]
+    assert plans[0]["missing"] == ["2024-03"]
+
+
+def test_month_of_partition_name():
+    assert month_of(Path("data/processed/features/green_tripdata_2024-07.parquet")) == "2024-07"
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import src.models.batch_score as bs
+from src.config import load_config
+
+
+class Doubler:
+    def predict(self, X):
+        return X["trip_distance"].to_numpy() * 2
+
+
+def test_score_chunk_writes_version_column(tmp_path, monkeypatch):
+    monkeypatch.setattr(bs, "_pipe", Doubler())
+    out = bs.chunk_path(tmp_path, "7", Path("green_tripdata_2024-01.parquet"), 3)
+    frame = pd.DataFrame({"trip_distance": [1.0, 2.5], "duration_min": [5.0, 9.0]})
+    assert bs.score_chunk(frame, "7", out) == 2
+    assert out == tmp_path / "v7" / "source=green_tripdata_2024-01" / "part-00003.parquet"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    scored = pd.read_parquet(tmp_path)
+    assert scored["prediction"].tolist() == [2.0, 5.0]
+    assert scored["model_version"].unique().tolist() == ["7"]
+
+
+def test_resume_skips_finished_chunks_unread(tmp_path, monkeypatch):
+    source = tmp_path / "in" / "green_tripdata_2024-01.parquet"
+    source.parent.mkdir()
+    pq.write_table(pa.table({"trip_distance": np.arange(10.0)}), source, row_group_size=3)
+    out_dir = tmp_path / "out"
+    cfg = load_config()
+    cfg.batch_score.update(input=str(source), output_dir=str(out_dir), batch_rows=4, max_workers=1)
+    # Chunks 0 and 2 finished in an earlier run; their files carry a marker column
+    for i in (0, 2):
+        marker = pd.DataFrame({"marker": [i]})
+        bs.chunk_path(out_dir, "7", source, i).parent.mkdir(parents=True, exist_ok=True)
+        marker.to_parquet(bs.chunk_path(out_dir, "7", source, i))
+
+    finished, chunks = bs.pending_chunks(source, out_dir, "7", 4)
+    assert finished == 2
+    assert [(i, t.column(0).to_pylist()) for i, t in chunks] == [(1, [4.0, 5.0, 6.0, 7.0])]
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(bs, "load_config", lambda: cfg)
+    monkeypatch.setattr(bs, "setup_logging", lambda cfg: None)
+    monkeypatch.setattr(bs, "champion", lambda cfg, client: ("models:/m/7", "7"))
+    monkeypatch.setattr(bs, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(bs, "_init_worker", lambda *args: setattr(bs, "_pipe", Doubler()))
+    report = bs.main()
+    assert report["chunks_resumed"] == 2 and report["rows_scored"] == 4
+    for i in (0, 2):
+        assert pd.read_parquet(bs.chunk_path(out_dir, "7", source, i))["marker"].tolist() == [i]
+    scored = pd.read_parquet(bs.chunk_path(out_dir, "7", source, 1))
+    assert scored["prediction"].tolist() == [8.0, 10.0, 12.0, 14.0]
+
+
+def test_chunks_match_record_batches(tmp_path):
+    source = tmp_path / "x.parquet"
+    pq.write_table(pa.table({"v": np.arange(1000)}), source, row_group_size=300)
+    expected = [b.column(0).to_pylist() for b in pq.ParquetFile(source).iter_batches(128)]
+    for done in ([], [0, 1, 2], [0, 1, 2, 3, 5]):
+        out_dir = tmp_path / f"out{len(done)}"
+        for i in done:
+            bs.chunk_path(out_dir, "1", source, i).parent.mkdir(parents=True, exist_ok=True)
+            bs.chunk_path(out_dir, "1", source, i).touch()
+        _, chunks = bs.pending_chunks(source, out_dir, "1", 128)
+        got = {i: t.column(0).to_pylist() for i, t in chunks}
+        assert got == {i: b for i, b in enumerate(expected) if i not in done}
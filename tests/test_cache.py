@@ -0,0 +1,42 @@
+from mlflow.tracking import MlflowClient
+
+from src.cache import config_hash, decide, read_manifest, stage_key, write_manifest
+from src.config import load_config
+from src.models.tracking import latest_training_run, mark_selected
+from src.models.train import train_sources
+
+
+def test_stage_key_changes_with_config():
+    cfg = load_config()
+    base = stage_key("train", config=config_hash(cfg, ["model"]))
+    assert base == stage_key("train", config=config_hash(cfg, ["model"]))
+    cfg.model["hyperparams"]["n_estimators"] += 1
+    assert base != stage_key("train", config=config_hash(cfg, ["model"]))
+
+
+def test_manifest_roundtrip_and_force(tmp_path, monkeypatch):
+    cfg = load_config()
+    out = tmp_path / "features.parquet"
+    assert read_manifest(out) is None
+    write_manifest(out, "abc", rows=3)
+    assert read_manifest(out)["key"] == "abc"
+
+    monkeypatch.delenv("FORCE_RERUN", raising=False)
+    assert decide(cfg, "train", "abc", hit=True) == "hit"
+    monkeypatch.setenv("FORCE_RERUN", "transform,train")
+    assert decide(cfg, "train", "abc", hit=True) == "forced"
+
+
+def test_cached_run_is_selected_downstream(tmp_path):
+    client = MlflowClient(tracking_uri=f"file:{tmp_path}")
+    exp = client.create_experiment("e")
+    runs = []
+    for _ in range(2):
+        run = client.create_run(exp)
+        client.log_metric(run.info.run_id, "mae_val", 1.0)
+        client.log_metric(run.info.run_id, "r2_val", 0.5)
+        runs.append(run.info.run_id)
+    assert latest_training_run(client, exp).info.run_id == runs[1]
+    mark_selected(runs[0], client)  # train reused the older run from cache
+    assert latest_training_run(client, exp).info.run_id == runs[0]
+    assert any(p.endswith("zone_stats.py") for p in train_sources())
@@ -0,0 +1,15 @@
+import numpy as np
+
+from src.models.compact import greedy_select
+
+
+def test_greedy_select_prefers_accurate_trees():
+    rng = np.random.default_rng(0)
+    y = rng.normal(20, 5, 500)
+    good = y + rng.normal(0, 0.5, (3, 500))
+    bad = y + rng.normal(5, 3, (5, 500))
+    per_tree = np.vstack([bad[:2], good[:1], bad[2:], good[1:]])
+    order, curve = greedy_select(per_tree, y, max_trees=3)
+    assert sorted(order) == [2, 6, 7]
+    assert len(set(order)) == len(order)
+    assert curve[-1] < np.abs(per_tree.mean(axis=0) - y).mean()
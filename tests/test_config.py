@@ -0,0 +1,37 @@
+import os
+
+import pytest
+import yaml
+
+from src.config import ConfigError, ConfigWatcher, load_config
+
+
+def _write(path, cfg):
+    path.write_text(yaml.safe_dump(cfg))
+    # make sure the mtime moves even on coarse-grained filesystems
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_layering_validation_and_reload(tmp_path, monkeypatch):
+    base = yaml.safe_load(open("config.yaml"))
+    path = tmp_path / "config.yaml"
+    _write(path, base)
+    monkeypatch.setenv("MLOPS__SERVING__INFERENCE__MAX_QUEUE", "7")
+
+    cfg = load_config(str(path))
+    assert cfg.serving.inference.max_queue == 7 and cfg.paths["raw_dir"] == cfg.paths.raw_dir
+    cfg.model["hyperparams"]["n_estimators"] = -1  # callers get their own copy
+    assert load_config(str(path)).model.hyperparams["n_estimators"] != -1
+
+    seen = []
+    watcher = ConfigWatcher(seen.append, path=str(path))
+    base["serving"]["inference"]["max_workers"] = 5
+    _write(path, base)
+    assert watcher.poll() and seen[-1].serving.inference.max_workers == 5
+
+    base["model"]["n_estimator"] = 10  # typo
+    _write(path, base)
+    with pytest.raises(ConfigError, match="model.n_estimator: unknown key"):
+        load_config(str(path))
+    assert not watcher.poll() and len(seen) == 1
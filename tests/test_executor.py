@@ -0,0 +1,23 @@
+import asyncio
+import time
+
+import pytest
+
+from src.serve.executor import InferenceExecutor, Overloaded
+
+
+def test_executor_rejects_beyond_queue():
+    async def scenario():
+        ex = InferenceExecutor({"kind": "thread", "max_workers": 1, "max_queue": 1}, "")
+        calls = [asyncio.create_task(ex.run(time.sleep, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert ex.full
+        with pytest.raises(Overloaded):
+            await ex.run(time.sleep, 0)
+        await asyncio.gather(*calls)
+        stats = ex.stats()
+        ex.shutdown()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 0 and stats["rejected"] == 1
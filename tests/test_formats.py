@@ -0,0 +1,65 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.serve import formats
+from src.serve.app import InputData
+
+
+@pytest.mark.parametrize("media_type", [formats.ARROW, formats.PARQUET, formats.JSON])
+def test_round_trip_and_validation(media_type):
+    frame = pd.DataFrame(
+        {
+            "trip_distance": [1.5, 3.0, 2.0],
+            "passenger_count": [1, None, 2],
+            "PULocationID": [10, 20, 30],
+            "DOLocationID": [11, 21, 31],
+            "hour": [0, 23, 24],
+            "day_of_week": [1, 2, 3],
+            "payment_type": [1, 2, 1],
+        }
+    )
+    decoded = formats.decode(formats.encode(frame, media_type), media_type)
+    valid, errors = formats.validate_frame(decoded, InputData)
+    assert list(errors) == ["hour"] and "first at [2]" in errors["hour"]
+    assert valid["passenger_count"].tolist() == [1, 1, 2]
+
+    _, errors = formats.validate_frame(decoded.drop(columns=["PULocationID"]).head(2), InputData)
+    assert errors == {"PULocationID": "missing column"}
+
+
+def test_negotiate():
+    assert formats.negotiate("application/x-parquet", None) == (formats.PARQUET,) * 2
+    assert formats.negotiate(formats.ARROW, "application/json") == (formats.ARROW, formats.JSON)
+    for content_type in ("text/csv", "application/msgpack"):
+        with pytest.raises(formats.UnsupportedMediaType):
+            formats.negotiate(content_type, None)
+
+
+@pytest.mark.parametrize("media_type", [formats.ARROW, formats.PARQUET, formats.JSON])
+def test_decode_rejects_too_many_rows(media_type):
+    body = formats.encode(pd.DataFrame({"hour": range(10)}), media_type)
+    assert len(formats.decode(body, media_type, max_rows=10)) == 10
+    with pytest.raises(formats.TooManyRows):
+        formats.decode(body, media_type, max_rows=9)
+
+
+def test_garbage_is_not_defaulted_and_nan_is_null():
+    frame = pd.DataFrame(
+        {
+            "trip_distance": [1.5, 3.0, 2.0],
+            "passenger_count": [None, "abc", 2],
+            "PULocationID": [10, 20, 30],
+            "DOLocationID": [11, 21, 31],
+            "hour": [0, 23, 5],
+            "day_of_week": [1, 2, 3],
+            "payment_type": [1, 2, 1],
+        }
+    )
+    valid, errors = formats.validate_frame(frame, InputData)
+    assert list(errors) == ["passenger_count"] and "first at [1]" in errors["passenger_count"]
+    assert valid["passenger_count"][0] == 1
+
+    body = formats.encode(pd.DataFrame({"prediction": [1.5, float("nan")]}), formats.JSON)
+    assert json.loads(body) == {"prediction": [1.5, None]}
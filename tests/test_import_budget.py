@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+
+def test_entry_points_import_lazily():
+    """Entry points stay within their tools/import_budget.py budgets: the API, the DAG entry
+    shim and data quality import none of mlflow/sklearn/shap/matplotlib/evidently, and train
+    imports mlflow/sklearn but leaves shap/matplotlib/evidently to the code paths using them."""
+    targets = ["src.entrypoints", "src.serve.app", "src.data.quality", "src.models.train"]
+    # Generous scale: the point here is the lazy-import check, not machine speed
+    proc = subprocess.run(
+        [sys.executable, "tools/import_budget.py", "--scale", "5", *targets],
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
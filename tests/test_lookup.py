@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from src.serve.lookup import LookupTable, build_table
+
+
+class LinearModel:
+    """Stands in for the pipeline: fare grows linearly with distance."""
+
+    def predict(self, X):
+        return 2.0 + 3.0 * X["trip_distance"].to_numpy() + X["hour"].to_numpy() * 0.1
+
+
+def _rows(**kw):
+    base = {
+        "trip_distance": 2.5,
+        "passenger_count": 1.0,
+        "PULocationID": 10,
+        "DOLocationID": 20,
+        "payment_type": 1.0,
+        "hour": 8,
+        "day_of_week": 2,
+    }
+    return pd.DataFrame([{**base, **kw}])
+
+
+def test_lookup_interpolates_and_round_trips(tmp_path):
+    reference = pd.DataFrame({"PULocationID": [10, 10, 30], "DOLocationID": [20, 20, 40]})
+    opts = {"n_pairs": 1, "distance_knots": [0, 1, 5, 10], "payment_types": [1, 2]}
+    table = build_table(LinearModel(), reference, opts)
+    assert table.values.shape == (1, 24, 7, 2, 2, 4)
+
+    loaded = LookupTable.load(table.save(tmp_path / "lookup"))
+    frame = pd.concat(
+        [_rows(), _rows(PULocationID=30, DOLocationID=40), _rows(trip_distance=50.0)],
+        ignore_index=True,
+    )
+    out = loaded.lookup_many(frame)
+    assert np.isclose(out[0], 2.0 + 3.0 * 2.5 + 0.8, atol=1e-4)
+    assert np.isnan(out[1]) and np.isnan(out[2])
@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.monitoring.prediction_log import PredictionLog, load_log
+
+
+def _frame(n):
+    return pd.DataFrame({"trip_distance": np.arange(n, dtype=float), "hour": np.arange(n) % 24})
+
+
+def test_rotates_by_size_and_drops_under_backpressure(tmp_path):
+    plog = PredictionLog(tmp_path, max_rows=30, flush_rows=10, flush_interval_s=60)
+    for i in range(25):
+        plog.append({"trip_distance": float(i), "prediction": 10.0 + i})
+    plog.flush()
+    assert len(list(tmp_path.glob("predictions-*.parquet"))) == 3
+
+    assert plog.append_frame(_frame(8), model_version="3", prediction=np.ones(8))
+    # 8 rows buffered (below flush_rows) leave room for 22 more
+    assert not plog.append_frame(_frame(23), prediction=np.ones(23))
+    plog.close()
+    assert plog.stats() == {"pending": 0, "written": 33, "files": 4, "dropped": 23}
+
+    df = load_log(tmp_path)
+    assert len(df) == 33 and df["prediction"].notna().all()
+    # Columns missing from some rows are null there, not dropped
+    assert df["model_version"].isna().sum() == 25 and df["hour"].notna().sum() == 8
+
+
+def test_flushes_on_interval(tmp_path):
+    plog = PredictionLog(tmp_path, flush_rows=1_000, flush_interval_s=0.05)
+    plog.append_frame(_frame(3), prediction=[1.0, 2.0, 3.0])
+    deadline = time.time() + 5
+    while plog.stats()["written"] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert plog.stats()["files"] == 1
+    assert len(load_log(tmp_path, since=time.time() - 60)) == 3
+    assert load_log(tmp_path, since=time.time() + 60).empty
+    plog.close()
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from src.data.quality import evaluate
+
+
+def test_rules_single_pass(tmp_path):
+    pick = pd.Timestamp("2024-01-10 08:00")
+    frame = pd.DataFrame(
+        {
+            "lpep_pickup_datetime": [pick] * 4,
+            "lpep_dropoff_datetime": [pick + pd.Timedelta(minutes=m) for m in (5, 10, -3, 7)],
+            "PULocationID": [1, 265, 999, 10],
+            "passenger_count": [1.0, None, 2.0, 1.0],
+            "payment_type": [1.0, 2.0, 9.0, 1.0],
+        }
+    )
+    frame.iloc[:2].to_parquet(tmp_path / "a.parquet")
+    frame.iloc[2:].to_parquet(tmp_path / "b.parquet")
+    rules = [
+        {"type": "row_count", "min": 4},
+        {"type": "range", "column": "PULocationID", "min": 1, "max": 265},
+        {"type": "null_rate", "column": "passenger_count", "max": 0.3, "severity": "soft"},
+        {"type": "domain", "column": "payment_type", "values": [1, 2], "severity": "soft"},
+        {
+            "name": "inversions",
+            "type": "order",
+            "columns": ["lpep_pickup_datetime", "lpep_dropoff_datetime"],
+        },
+        {
+            "type": "freshness",
+            "column": "lpep_pickup_datetime",
+            "max_age_days": 30,
+            "as_of": "2024-02-01",
+        },
+        {"type": "range", "column": "trip_distance", "min": 0},
+    ]
+    report = evaluate(sorted(tmp_path.glob("*.parquet")), rules, batch_rows=1)
+    observed = {r["name"]: r["observed"] for r in report["rules"]}
+    assert report["rows"] == 4
+    assert observed["range_PULocationID"] == 0.25 and observed["inversions"] == 0.25
+    assert observed["null_rate_passenger_count"] == 0.25
+    assert report["hard_failures"] == ["range_PULocationID", "inversions", "range_trip_distance"]
+    assert report["soft_failures"] == ["domain_payment_type"]
+
+
+def test_domain_rule_ignores_nulls(tmp_path):
+    pd.DataFrame({"payment_type": [1.0, None, None, 9.0]}).to_parquet(tmp_path / "a.parquet")
+    rules = [{"type": "domain", "column": "payment_type", "values": [1, 2]}]
+    report = evaluate([tmp_path / "a.parquet"], rules, batch_rows=2)
+    assert report["rules"][0]["observed"] == 0.25
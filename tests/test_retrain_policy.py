@@ -0,0 +1,73 @@
+import json
+
+from src.monitoring.retrain_policy import evaluate, main, record_retrain, savings
+
+OPTS = {
+    "min_drift_share": 0.5,
+    "trigger_columns": ["duration_min"],
+    "min_interval_hours": 12,
+    "max_interval_hours": 168,
+}
+H = 3600
+
+
+def _drift(at, share=0.0, drifted=()):
+    columns = {c: {"drifted": True} for c in drifted}
+    return {"generated_at": at, "share_drifted": share, "columns": columns}
+
+
+def test_triggers_on_drift_and_new_partitions():
+    state = {"last_trigger_at": 0, "drift_seen_at": 0, "partitions": ["a"]}
+    now = 24 * H
+    assert not evaluate(OPTS, _drift(now, 0.1), state, ["a"], now)["retrain"]
+    assert evaluate(OPTS, _drift(now, 0.6), state, ["a"], now)["retrain"]
+    assert evaluate(OPTS, _drift(now, 0.1, ["duration_min"]), state, ["a"], now)["retrain"]
+    decision = evaluate(OPTS, None, state, ["a", "b"], now)
+    assert decision["retrain"] and decision["new_partitions"] == ["b"]
+
+
+def test_stale_report_debounce_and_max_interval():
+    state = {"last_trigger_at": 10 * H, "drift_seen_at": 10 * H, "partitions": ["a"]}
+    # The report that caused the last retrain does not trigger again
+    assert not evaluate(OPTS, _drift(10 * H, 0.9), state, ["a"], 30 * H)["retrain"]
+    debounced = evaluate(OPTS, _drift(15 * H, 0.9), state, ["a"], 15 * H)
+    assert debounced["debounced"] and not debounced["retrain"]
+    assert evaluate(OPTS, None, state, ["a"], 10 * H + 168 * H)["retrain"]
+
+
+def test_savings_against_fixed_schedule():
+    decisions = [{"ts": h * H, "retrain": h in (0, 72), "debounced": False} for h in range(97)]
+    summary = savings(decisions, baseline_hours=24)
+    assert summary["fixed_schedule_runs"] == 5
+    assert summary["retrains"] == 2 and summary["runs_saved"] == 3
+
+
+def test_unchanged_drift_does_not_retrigger():
+    # Retrained while duration_min had drifted; the same drift an hour later is not new
+    state = {
+        "last_trigger_at": 0,
+        "drift_seen_at": 0,
+        "partitions": ["a"],
+        "drift": {"share": 0.6, "columns": ["duration_min", "hour"]},
+    }
+    now = 24 * H
+    assert not evaluate(OPTS, _drift(now, 0.6, ["duration_min", "hour"]), state, ["a"], now)[
+        "retrain"
+    ]
+    assert evaluate(OPTS, _drift(now, 0.6, ["trip_distance"]), state, ["a"], now)["retrain"]
+    assert evaluate(OPTS, _drift(now, 0.8, ["hour"]), state, ["a"], now)["retrain"]
+
+
+def test_state_is_committed_only_by_record_retrain(tmp_path, monkeypatch):
+    state_path, drift_path = tmp_path / "state.json", tmp_path / "drift.json"
+    drift_path.write_text(json.dumps(_drift(1.0, 0.9, ["duration_min"])))
+    monkeypatch.setenv("MLOPS__RETRAIN__STATE_PATH", str(state_path))
+    monkeypatch.setenv("MLOPS__RETRAIN__DECISIONS_LOG", str(tmp_path / "decisions.jsonl"))
+    monkeypatch.setenv("MLOPS__PATHS__DRIFT_METRICS", str(drift_path))
+    assert main()
+    state = json.loads(state_path.read_text())
+    assert "last_trigger_at" not in state and state["pending"]["drift"]["columns"]
+    assert not main()  # pending trigger debounces while training runs
+    record_retrain()
+    state = json.loads(state_path.read_text())
+    assert "pending" not in state and state["drift"]["columns"] == ["duration_min"]
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mlflow
+import pytest
+from mlflow.tracking import MlflowClient
+
+from src.config import load_config
+from src.deployment import promote
+from src.deployment.rollout import default_candidates, first_reachable, rollout
+
+FAST = {"retries": 3, "backoff_base_s": 0.01, "backoff_max_s": 0.05, "timeout_s": 1.0}
+
+
+def _stand_in(version_after_reload, reload_status=200):
+    """Local HTTP server mimicking the API's /reload and /health endpoints."""
+    state = {"version": "1", "reloads": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            state["reloads"] += 1
+            if reload_status == 200:
+                state["version"] = version_after_reload
+            self._reply(reload_status, {"status": "reloaded", "version": state["version"]})
+
+        def do_GET(self):
+            self._reply(200, {"status": "ok", "version": state["version"]})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", state
+
+
+def _dead_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def make(*args, **kwargs):
+        server, url, state = _stand_in(*args, **kwargs)
+        started.append(server)
+        return url, state
+
+    yield make
+    for server in started:
+        server.shutdown()
+
+
+def test_rollout_reloads_all_replicas_concurrently(servers):
+    urls = [servers("2")[0] for _ in range(3)]
+    results = asyncio.run(rollout(urls, "2", FAST))
+    assert [r.ok for r in results] == [True, True, True]
+    assert all(r.version == "2" and r.latency_s > 0 for r in results)
+
+
+def test_rollout_reports_dead_and_stale_replicas(servers):
+    live, _ = servers("2")
+    stale, _ = servers("1")
+    results = asyncio.run(
+        rollout([live, _dead_url(), stale], "2", {**FAST, "version_timeout_s": 0.2})
+    )
+    ok = {r.url: r for r in results}
+    assert ok[live].ok
+    assert not ok[stale].ok and "expected 2" in ok[stale].error
+    dead = [r for r in results if r.url not in (live, stale)][0]
+    assert not dead.ok and dead.attempts == FAST["retries"]
+
+
+def test_failed_canary_halts_rollout(servers):
+    canary, _ = servers("2", reload_status=503)
+    rest, rest_state = servers("2")
+    results = asyncio.run(rollout([canary, rest], "2", {**FAST, "canary_percent": 50}))
+    assert not results[0].ok
+    assert results[1].error == "skipped: canary failed"
+    assert rest_state["reloads"] == 0
+
+
+def test_default_candidates_roll_out_to_first_reachable(servers, monkeypatch):
+    live, state = servers("2")
+    monkeypatch.setenv("API_URL", _dead_url())
+    monkeypatch.delenv("RUNNING_IN_DOCKER", raising=False)
+    urls = [*default_candidates()[:1], live]
+    assert first_reachable(urls, timeout=0.5) == [live]
+    assert first_reachable(urls[:1], timeout=0.5) == []
+    results = asyncio.run(rollout(first_reachable(urls, timeout=0.5), "2", FAST))
+    assert [r.ok for r in results] == [True] and state["reloads"] == 1
+
+
+def test_failed_canary_restores_production_and_fails_promotion(servers, tmp_path, monkeypatch):
+    canary, _ = servers("2", reload_status=503)
+    rest, rest_state = servers("2")
+    cfg = load_config()
+    cfg.paths["mlruns_dir"] = str(tmp_path)
+    cfg.serving["replicas"] = [canary, rest]
+    cfg.serving["rollout"] = {**FAST, "canary_percent": 50}
+    cfg.serving["shadow"]["enabled"] = False
+    for var in ("MLFLOW_TRACKING_URI", "API_REPLICAS"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(promote, "load_config", lambda: cfg)
+    monkeypatch.setattr(promote, "setup_logging", lambda cfg: None)
+
+    client = MlflowClient(tracking_uri=f"file:{tmp_path}")
+    exp = client.create_experiment(cfg.mlflow["experiment"])
+    name = cfg.mlflow["model_name"]
+    for version in ("1", "2"):
+        run_id = client.create_run(exp).info.run_id
+        client.log_metric(run_id, "mae_val", 1.0)
+        client.log_metric(run_id, "r2_val", 0.9)
+        if version == "1":
+            client.create_registered_model(name)
+            client.create_model_version(name, f"runs:/{run_id}/model", run_id)
+            client.transition_model_version_stage(name, "1", "Production")
+
+    previous_uri = mlflow.get_tracking_uri()
+    try:
+        with pytest.raises(RuntimeError, match="Production restored to 1"):
+            promote.main()
+    finally:
+        mlflow.set_tracking_uri(previous_uri)
+    assert [str(v.version) for v in client.get_latest_versions(name, ["Production"])] == ["1"]
+    assert client.get_model_version(name, "2").current_stage == "Archived"
+    assert rest_state["reloads"] == 0
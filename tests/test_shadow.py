@@ -0,0 +1,104 @@
+import threading
+import time
+
+import mlflow
+import pandas as pd
+import pytest
+from mlflow.tracking import MlflowClient
+
+from src.config import load_config
+from src.deployment import promote
+from src.monitoring.shadow import ShadowLog, compare_shadow, load_shadow_log
+from src.serve import app
+
+
+def test_shadow_log_flushes_and_gates(tmp_path):
+    shadow = ShadowLog(tmp_path, capacity=100, flush_rows=10)
+    for i in range(25):
+        shadow.append(
+            {
+                "champion_version": "1",
+                "challenger_version": "2",
+                "champion_pred": 10.0 + i,
+                "challenger_pred": 10.5 + i,
+            }
+        )
+    shadow.flush()
+    df = load_shadow_log(tmp_path)
+    assert len(df) == 25 and len(list(tmp_path.glob("shadow-*.parquet"))) == 3
+
+    opts = {"min_samples": 20, "max_mean_abs_diff": 1.0}
+    result = compare_shadow(df, "2", opts)
+    assert result["ok"] and abs(result["mean_abs_diff"] - 0.5) < 1e-9
+    assert not compare_shadow(df, "2", {**opts, "max_mean_abs_diff": 0.1})["ok"]
+    assert not compare_shadow(df, "3", opts)["enough_samples"]
+
+
+def test_shadow_sampling_skips_while_busy(monkeypatch):
+    release, calls = threading.Event(), []
+    monkeypatch.setattr(app, "_challenger", object())
+    monkeypatch.setattr(app, "_shadow_future", None)
+    monkeypatch.setattr(app, "_shadow_opts", lambda: {"sample_rate": 1.0})
+    monkeypatch.setattr(app, "_score_shadow", lambda *args: (calls.append(args), release.wait()))
+    df = pd.DataFrame({"x": [1]})
+    for _ in range(5):
+        app._sample_shadow(df, 1.0)
+    release.set()
+    app._shadow_future.result(timeout=5)
+    assert len(calls) == 1
+
+
+def _shadow_rows(log_dir, challenger: str, n: int, diff: float) -> None:
+    shadow = ShadowLog(log_dir, capacity=n, flush_rows=n)
+    for i in range(n):
+        shadow.append(
+            {
+                "champion_version": "1",
+                "challenger_version": challenger,
+                "champion_pred": 10.0 + i,
+                "challenger_pred": 10.0 + i + diff,
+            }
+        )
+    shadow.flush()
+
+
+def test_scheduled_gate_promotes_backed_challenger(tmp_path, monkeypatch):
+    cfg = load_config()
+    cfg.paths["mlruns_dir"] = str(tmp_path / "mlruns")
+    cfg.paths["shadow_dir"] = str(tmp_path / "shadow")
+    cfg.serving["shadow"].update(enabled=True, gate=True, min_samples=20, max_mean_abs_diff=1.0)
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+    monkeypatch.setattr(promote, "load_config", lambda: cfg)
+    monkeypatch.setattr(promote, "setup_logging", lambda cfg: None)
+    monkeypatch.setattr(promote, "reload_apis", lambda cfg, version: True)
+    client = MlflowClient(tracking_uri=f"file:{tmp_path / 'mlruns'}")
+    exp = client.create_experiment(cfg.mlflow["experiment"])
+    name = cfg.mlflow["model_name"]
+    client.create_registered_model(name)
+
+    # Samples for this version written before it was staged are not read
+    _shadow_rows(cfg.paths["shadow_dir"], "2", 30, diff=5.0)
+    time.sleep(0.01)
+    for stage in ("Production", "Staging"):
+        run_id = client.create_run(exp).info.run_id
+        mv = client.create_model_version(name, f"runs:/{run_id}/model", run_id)
+        client.transition_model_version_stage(name, mv.version, stage)
+
+    previous_uri = mlflow.get_tracking_uri()
+    try:
+        assert promote.evaluate_challenger() is False
+        assert client.get_model_version(name, "2").current_stage == "Staging"
+        _shadow_rows(cfg.paths["shadow_dir"], "2", 30, diff=0.5)
+        assert promote.evaluate_challenger() is True
+        assert client.get_model_version(name, "2").current_stage == "Production"
+        assert promote.evaluate_challenger() is False  # nothing staged any more
+
+        run_id = client.create_run(exp).info.run_id
+        client.create_model_version(name, f"runs:/{run_id}/model", run_id)
+        client.transition_model_version_stage(name, "3", "Staging")
+        _shadow_rows(cfg.paths["shadow_dir"], "3", 30, diff=5.0)
+        with pytest.raises(RuntimeError, match="challenger 3 archived"):
+            promote.evaluate_challenger()
+        assert client.get_model_version(name, "3").current_stage == "Archived"
+    finally:
+        mlflow.set_tracking_uri(previous_uri)
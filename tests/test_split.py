@@ -0,0 +1,139 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from src.config import load_config
+from src.models.split import TEST, TRAIN, VAL, split_indices, split_labels
+from src.models.train import build_pipeline, design_matrix
+from src.models.train_chunked import (
+    StreamingRegressionMetrics,
+    count_batches,
+    fit_chunked,
+    iter_batches,
+    prep_sample,
+)
+
+
+def test_hash_split_is_stable_and_proportional():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(size=5000), "b": rng.integers(0, 50, 5000)})
+    labels = split_labels(df, seed=42)
+    # Same rows get the same labels regardless of order or chunking
+    shuffled = df.sample(frac=1.0, random_state=1)
+    assert (split_labels(shuffled, seed=42) == labels[shuffled.index]).all()
+    assert (
+        np.concatenate([split_labels(df[:100], 42), split_labels(df[100:], 42)]) == labels
+    ).all()
+    share = np.bincount(labels, minlength=3) / len(df)
+    assert abs(share[TRAIN] - 0.8) < 0.03
+    assert abs(share[VAL] - 0.1) < 0.02
+    assert abs(share[TEST] - 0.1) < 0.02
+
+
+def test_streaming_metrics_match_sklearn():
+    rng = np.random.default_rng(1)
+    y = rng.normal(10, 3, 1000)
+    pred = y + rng.normal(0, 1, 1000)
+    acc = StreamingRegressionMetrics()
+    for i in range(0, 1000, 128):
+        acc.update(y[i : i + 128], pred[i : i + 128])
+    assert np.isclose(acc.mae, mean_absolute_error(y, pred))
+    assert np.isclose(acc.r2, r2_score(y, pred))
+
+
+def test_design_matrix_matches_pipeline():
+    rng = np.random.default_rng(2)
+    n = 600
+    X = pd.DataFrame(
+        {
+            "trip_distance": rng.uniform(0, 10, n),
+            "PULocationID": rng.integers(1, 40, n).astype("int32"),
+            "DOLocationID": rng.integers(1, 40, n).astype("int32"),
+            "payment_type": rng.integers(1, 4, n).astype(float),
+            "hour": rng.integers(0, 24, n).astype("int32"),
+        }
+    )
+    y = rng.normal(10, 2, n)
+    idx = split_indices(X, seed=42)
+    pipe = build_pipeline(load_config(), X, RandomForestRegressor(n_estimators=3, random_state=0))
+    Xs, ys = design_matrix(pipe, X, y, idx, chunk_rows=64)
+    assert Xs[TRAIN].dtype == np.float32 and Xs[VAL].base is Xs[TRAIN].base
+    # Same encoding as fitting the preprocessor on all training rows at once
+    prep = pipe.named_steps["prep"]
+    reference = prep.fit(X.take(idx[TRAIN])).transform(X.take(idx[TEST]))
+    assert np.allclose(Xs[TEST], reference)
+    assert (ys[VAL] == y[idx[VAL]]).all()
+
+
+def test_design_matrix_does_not_copy_training_frame():
+    rng = np.random.default_rng(3)
+    n = 100_000
+    X = pd.DataFrame({f"x{i}": rng.normal(size=n) for i in range(6)})
+    X["payment_type"] = rng.integers(1, 5, n).astype(float)
+    y = rng.normal(10, 2, n)
+    idx = split_indices(X, seed=42)
+    pipe = build_pipeline(load_config(), X, RandomForestRegressor())
+    train_bytes = X.take(idx[TRAIN]).memory_usage().sum()
+    tracemalloc.start()
+    try:
+        Xs, _ = design_matrix(pipe, X, y, idx, chunk_rows=1000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    matrix_bytes = sum(m.nbytes for m in Xs.values())
+    # Beyond the output matrix only chunk-sized temporaries; a training-frame copy would not fit
+    assert peak - matrix_bytes < train_bytes / 2
+
+
+def test_prep_sample_draws_from_whole_partitions(tmp_path):
+    files = []
+    for i, n in enumerate([1000, 250]):
+        f = tmp_path / f"part-{i}.parquet"
+        pq.write_table(pa.table({"row": np.arange(n)}), f, row_group_size=300)
+        files.append(f)
+    # Batches restart at every file: 4 + 1, not ceil(1250 / 250)
+    assert count_batches(files, 250) == 5
+    assert count_batches(files, 300) == 5
+
+    sample, picked = prep_sample(files, 200, batch_rows=128, seed=0)
+    assert len(sample) == 200
+    # Not just each file's head
+    assert sample["row"].max() > 500
+    assert prep_sample(files, 200, batch_rows=64, seed=0)[0].equals(sample)
+    assert sample["row"].tolist() == [*picked[files[0]], *picked[files[1]]]
+
+    # Training batches leave the sampled rows out
+    rest = pd.concat(iter_batches(files, 128, exclude=picked), ignore_index=True)
+    assert len(rest) == 1250 - 200
+    for f, n, part in [(files[0], 1000, rest[:900]), (files[1], 250, rest[900:])]:
+        assert sorted([*part["row"], *picked[f]]) == list(range(n))
+
+
+def test_chunked_forest_has_exactly_n_estimators(tmp_path):
+    rng = np.random.default_rng(4)
+    for month in ("2024-01", "2024-02"):
+        n = 600
+        pd.DataFrame(
+            {
+                "trip_distance": rng.uniform(0, 10, n),
+                "PULocationID": rng.integers(1, 40, n),
+                "DOLocationID": rng.integers(1, 40, n),
+                "hour": rng.integers(0, 24, n),
+                "duration_min": rng.normal(10, 2, n),
+            }
+        ).to_parquet(tmp_path / f"green_tripdata_{month}.parquet")
+    cfg = load_config()
+    cfg.paths["features_dir"] = str(tmp_path)
+    cfg.features["zone_aggregates"] = {"enabled": False}
+    cfg.model["uncertainty"] = {"enabled": False}
+    cfg.model["chunked"] = {"batch_rows": 250, "prep_sample_rows": 100}
+    # 3 + 3 chunks
+    for trees in (10, 4):
+        cfg.model["hyperparams"] = {"n_estimators": trees, "max_depth": 3}
+        pipe, _, _ = fit_chunked(cfg)
+        assert pipe[-1].n_estimators == len(pipe[-1].estimators_) == trees
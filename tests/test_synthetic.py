@@ -0,0 +1,38 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.config import load_config
+from src.data.synthetic import SCHEMA, generate, months_from
+from src.features.transform import engineer
+
+
+def _cfg(workers):
+    cfg = load_config()
+    cfg.data["months"] = ["2024-02"]
+    cfg.data["synthetic"] = {"rows_per_month": 5000, "chunk_rows": 2000, "max_workers": workers}
+    return cfg
+
+
+def test_generate_is_reproducible_and_usable(tmp_path):
+    (path,) = generate(_cfg(1), tmp_path / "a")
+    (other,) = generate(_cfg(2), tmp_path / "b")
+    meta = pq.ParquetFile(path).metadata
+    assert path.endswith("green_tripdata_2024-02.parquet")
+    assert meta.num_rows == 5000 and meta.num_row_groups == 3
+    table = pq.read_table(path)
+    assert table.schema.equals(SCHEMA) and table.equals(pq.read_table(other))
+
+    df = table.to_pandas()
+    assert df["lpep_pickup_datetime"].dt.month.eq(2).all()
+    assert df["PULocationID"].between(1, 265).all() and df["DOLocationID"].between(1, 265).all()
+    features = engineer(df, _cfg(1))
+    assert len(features) > 0.95 * len(df)
+    # Longer trips take longer
+    corr = pd.Series(features["trip_distance"]).corr(features["duration_min"])
+    assert corr > 0.5
+
+
+def test_months_default_to_url():
+    cfg = load_config()
+    cfg.data["months"] = []
+    assert months_from(cfg) == ["2024-01"]
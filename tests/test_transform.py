@@ -1,7 +1,19 @@
 import pandas as pd
 
 from src.config import load_config
-from src.features.transform import engineer
+from src.features.transform import engineer, transform_key, write_partitions
+
+RAW = pd.DataFrame(
+    {
+        "lpep_pickup_datetime": pd.to_datetime(["2024-01-01 12:00:00", "2024-01-01 13:00:00"]),
+        "lpep_dropoff_datetime": pd.to_datetime(["2024-01-01 12:30:00", "2024-01-01 14:00:00"]),
+        "trip_distance": [1.2, 3.4],
+        "passenger_count": [1.0, 2.0],
+        "PULocationID": [1, 2],
+        "DOLocationID": [3, 4],
+        "payment_type": [1.0, 1.0],
+    }
+)
 
 
 def test_engineer_ranges():
@@ -24,3 +36,26 @@ def test_engineer_ranges():
     assert (out["trip_distance"] >= 0).all()
     assert out["hour"].between(0, 23).all()
     assert out["day_of_week"].between(0, 6).all()
+
+
+def test_partition_keys_survive_new_months_and_stale_partitions_go(tmp_path, monkeypatch):
+    monkeypatch.delenv("FORCE_RERUN", raising=False)
+    cfg = load_config()
+    cfg.paths["features_dir"] = str(tmp_path / "features")
+    raws = []
+    for month in ("2024-01", "2024-02"):
+        raws.append(tmp_path / f"green_tripdata_{month}.parquet")
+        RAW.to_parquet(raws[-1])
+    cfg.data["months"] = ["2024-01"]
+    keys = [transform_key(cfg, r) for r in raws]
+    cfg.data["months"] = ["2024-01", "2024-02"]
+    cfg.data["source"] = "synthetic"
+    assert [transform_key(cfg, r) for r in raws] == keys
+    cfg.data["sample_fraction"] = 0.5
+    assert transform_key(cfg, raws[0]) != keys[0]
+
+    outs = write_partitions(cfg, raws)
+    assert all(o.exists() for o in outs)
+    write_partitions(cfg, raws[1:])
+    assert not outs[0].exists() and outs[1].exists()
+    assert not list(outs[0].parent.glob(outs[0].name + "*"))
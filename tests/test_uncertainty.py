@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.models.uncertainty import fit_leaf_stats, parse_levels, predict_distribution
+
+
+def _fitted(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({"a": rng.uniform(0, 10, n), "b": rng.uniform(0, 1, n)})
+    y = 3 * X["a"].to_numpy() + rng.normal(0, 1 + X["b"].to_numpy() * 4, n)
+    pipe = Pipeline(
+        [
+            ("prep", StandardScaler()),
+            ("model", RandomForestRegressor(n_estimators=20, min_samples_leaf=5, random_state=0)),
+        ]
+    ).fit(X, y)
+    Xt = pipe[:-1].transform(X).astype(np.float32)
+    pipe[-1].leaf_stats_ = fit_leaf_stats(pipe[-1], Xt, y)
+    return pipe, X, y
+
+
+def test_distribution_matches_forest_and_is_ordered():
+    pipe, X, _ = _fitted()
+    out = predict_distribution(pipe, X.head(200), [0.1, 0.5, 0.9, 0.2])
+    np.testing.assert_allclose(out["prediction"], pipe.predict(X.head(200)), rtol=1e-5)
+    assert (out["std"] > 0).all()
+    assert (out["q0.1"] <= out["q0.2"] + 1e-9).all() and (out["q0.5"] <= out["q0.9"]).all()
+    assert list(out.columns) == ["prediction", "std", "q0.1", "q0.5", "q0.9", "q0.2"]
+
+
+def test_intervals_cover_held_out_rows():
+    # 2-row leaves as with the shipped hyperparams. Averaging each leaf's own quantiles (no
+    # spread across trees) covered 48% here; pooled leaf samples cover ~69%
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"a": rng.uniform(0, 10, 6000), "b": rng.uniform(0, 1, 6000)})
+    y = 3 * X["a"].to_numpy() + rng.normal(0, 1 + X["b"].to_numpy() * 4, len(X))
+    forest = RandomForestRegressor(n_estimators=30, min_samples_leaf=2, random_state=0)
+    forest.fit(X[:4000], y[:4000])
+    forest.leaf_stats_ = fit_leaf_stats(forest, X[:4000].to_numpy(np.float32), y[:4000])
+    pipe = Pipeline([("prep", "passthrough"), ("model", forest)])
+    out = predict_distribution(pipe, X[4000:], [0.1, 0.9])
+    held = y[4000:]
+    coverage = np.mean((held >= out["q0.1"]) & (held <= out["q0.9"]))
+    assert 0.62 <= coverage <= 0.9
+
+
+def test_subset_follows_kept_trees():
+    pipe, X, _ = _fitted()
+    forest = pipe[-1]
+    stats = forest.leaf_stats_
+    keep = [7, 2, 11]
+    forest.estimators_ = [forest.estimators_[t] for t in keep]
+    forest.n_estimators = len(keep)
+    forest.leaf_stats_ = stats.subset(keep)
+    out = predict_distribution(pipe, X.head(50), [])
+    np.testing.assert_allclose(out["prediction"], pipe.predict(X.head(50)), rtol=1e-5)
+
+
+def test_parse_levels_and_missing_stats():
+    assert parse_levels("0.1, 0.9") == [0.1, 0.9] and parse_levels(None) == []
+    with pytest.raises(ValueError):
+        parse_levels("0.5,1")
+    pipe, X, _ = _fitted(n=200)
+    del pipe[-1].leaf_stats_
+    with pytest.raises(ValueError, match="leaf statistics"):
+        predict_distribution(pipe, X.head(2), [0.5])
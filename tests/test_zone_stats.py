@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from src.config import load_config
+from src.features.zone_stats import OUTPUT_COLUMNS, ZoneAggregates, zone_step
+from src.models.train import build_pipeline
+
+
+def _trips(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        {
+            "trip_distance": rng.uniform(0.5, 10, n),
+            "passenger_count": rng.integers(1, 4, n).astype(float),
+            "PULocationID": rng.integers(1, 6, n).astype("int32"),
+            "DOLocationID": rng.integers(1, 6, n).astype("int32"),
+            "payment_type": rng.integers(1, 3, n).astype(float),
+            "hour": rng.integers(0, 24, n).astype("int32"),
+            "day_of_week": rng.integers(0, 7, n).astype("int32"),
+        }
+    )
+    y = 5 * X["PULocationID"] + 2 * X["trip_distance"] + rng.normal(0, 1, n)
+    return X, y.to_numpy()
+
+
+def test_tables_index_and_fallback():
+    X, y = _trips()
+    zones = ZoneAggregates(smoothing=0, cv=0).fit(X, y)
+    assert zones.pair_duration_.shape == (266, 266) and zones.pu_hour_duration_.shape == (266, 24)
+    out = zones.transform(X)
+    pu1 = y[X["PULocationID"] == 1]
+    assert out.loc[X["PULocationID"] == 1, "zone_pu_duration"].iloc[0] == np.float32(np.median(pu1))
+    # Unknown / missing ids use the global fallback row
+    unknown = X.head(2).assign(PULocationID=[999, 0], DOLocationID=[300, 0])
+    fallback = zones.transform(unknown)
+    assert (fallback["zone_pu_duration"] == zones.pu_duration_[0]).all()
+    assert list(zones.template(X).columns) == list(out.columns)
+
+
+def test_out_of_fold_training_values_and_pipeline():
+    X, y = _trips()
+    zones = ZoneAggregates(cv=5, drop_location_ids=True)
+    train_out = zones.fit_transform(X, y)
+    assert "PULocationID" not in train_out and set(OUTPUT_COLUMNS) <= set(train_out)
+    # Training rows see tables fitted without them; later calls use the full tables
+    assert not np.allclose(train_out[OUTPUT_COLUMNS], zones.transform(X)[OUTPUT_COLUMNS])
+
+    cfg = load_config()
+    cfg.features["zone_aggregates"] = {"enabled": True, "drop_location_ids": True}
+    pipe = build_pipeline(cfg, X, RandomForestRegressor(n_estimators=5, random_state=0))
+    pipe.fit(X, y)
+    assert list(pipe.named_steps) == ["zones", "prep", "model"]
+    assert pipe.predict(X.head(3)).shape == (3,)
+
+
+def test_folds_follow_the_configured_seed():
+    X, y = _trips()
+    cfg = load_config()
+    cfg.features["zone_aggregates"] = {"enabled": True}
+    cfg.random_state = 7
+    zones = zone_step(cfg)
+    assert zones.random_state == 7
+    fold = zones.fit_folds(X, y).fold
+    assert np.array_equal(fold, zone_step(cfg).fit_folds(X, y).fold)
+    cfg.random_state = 8
+    assert not np.array_equal(fold, zone_step(cfg).fit_folds(X, y).fold)
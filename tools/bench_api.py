@@ -0,0 +1,93 @@
+"""Load-test a running API: /predict throughput and latency, plus /health latency under load.
+
+    python tools/bench_api.py --url http://localhost:8000 --concurrency 64 --duration 20
+
+Run it once per `serving.inference` setting (e.g. kind thread vs process, max_workers) to
+compare; 503 responses mean the bounded inference queue rejected the request.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+
+
+def _payload() -> dict:
+    return {
+        "trip_distance": round(random.uniform(0.3, 15.0), 2),
+        "passenger_count": random.choice([1, 1, 1, 2, 3]),
+        "PULocationID": random.randint(1, 265),
+        "DOLocationID": random.randint(1, 265),
+        "hour": random.randint(0, 23),
+        "day_of_week": random.randint(0, 6),
+        "payment_type": random.choice([1, 2]),
+    }
+
+
+async def _predict_worker(client, deadline, latencies, codes):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            r = await client.post("/predict", json=_payload())
+        except httpx.TransportError as exc:  # reset/refused under overload: count, keep going
+            codes[type(exc).__name__] = codes.get(type(exc).__name__, 0) + 1
+            continue
+        codes[r.status_code] = codes.get(r.status_code, 0) + 1
+        if r.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+async def _health_probe(client, deadline, latencies):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+        except httpx.TransportError:
+            pass
+        else:
+            latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.1)
+
+
+def _pcts(values) -> dict:
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000
+    return {f"p{q}_ms": round(float(np.percentile(ms, q)), 2) for q in (50, 95, 99)}
+
+
+async def bench(url: str, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+        predict_lat, health_lat, codes = [], [], {}
+        await asyncio.gather(
+            _health_probe(client, deadline, health_lat),
+            *(_predict_worker(client, deadline, predict_lat, codes) for _ in range(concurrency)),
+        )
+        inference = (await client.get("/health")).json().get("inference")
+    return {
+        "concurrency": concurrency,
+        "ok_per_s": round(len(predict_lat) / duration, 1),
+        "status_codes": codes,
+        "predict": _pcts(predict_lat),
+        "health_under_load": _pcts(health_lat),
+        "inference": inference,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.url, args.concurrency, args.duration)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Latency of quantile predictions from a forest's leaf statistics vs. the alternatives.
+
+    python tools/bench_quantiles.py --model-uri models:/champion/Production
+    python tools/bench_quantiles.py --model-uri runs:/<run_id>/model --rows 1 1000
+
+Scores rows of the test split. For each batch size, prints one JSON line with the
+median milliseconds of: the plain point prediction, `predict_distribution` (one pass over the
+forest) and the naive way of collecting every tree's prediction and taking their percentiles.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import get_tracking_uri, load_config
+from src.models.uncertainty import DEFAULT_LEVELS, predict_distribution
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(float(np.median(times)) * 1000, 3)
+
+
+def _per_tree(pipe, X: pd.DataFrame, levels) -> np.ndarray:
+    Xt = np.asarray(pipe[:-1].transform(X), dtype=np.float32)
+    preds = np.stack([t.predict(Xt) for t in pipe[-1].estimators_], axis=1)
+    return np.percentile(preds, np.asarray(levels) * 100, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-uri", required=True)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    import mlflow
+
+    from src.models.serialization import load_pipeline
+    from src.models.train import TEST, load_xy
+
+    cfg = load_config()
+    mlflow.set_tracking_uri(get_tracking_uri(cfg))
+    pipe = load_pipeline(args.model_uri)
+    X, _, idx = load_xy(cfg)
+    X = X.take(idx[TEST])
+    levels = list(DEFAULT_LEVELS)
+    for n in args.rows:
+        batch = X.head(n)
+        print(
+            json.dumps(
+                {
+                    "rows": n,
+                    "trees": len(pipe[-1].estimators_),
+                    "predict_ms": _median_ms(lambda: pipe.predict(batch), args.repeat),
+                    "distribution_ms": _median_ms(
+                        lambda: predict_distribution(pipe, batch, levels), args.repeat
+                    ),
+                    "per_tree_ms": _median_ms(lambda: _per_tree(pipe, batch, levels), args.repeat),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
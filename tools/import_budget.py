@@ -0,0 +1,116 @@
+"""Import-time budget for CLI entry points, the API and the Airflow DAG files.
+
+    python tools/import_budget.py            # all targets, exit 1 on any violation
+    python tools/import_budget.py --scale 2  # loosen every budget 2x (slow CI machines)
+
+Each target is imported in a fresh interpreter with `-X importtime`; the summed cumulative
+time of its top-level imports is compared to the budget, and modules that must stay lazy
+(loaded only on the code paths that need them) are reported if they were imported anyway.
+DAG files are skipped when Airflow is not installed.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+HEAVY = ["mlflow", "sklearn", "shap", "matplotlib", "evidently"]
+
+# target -> (budget in ms, modules that must not be imported)
+BUDGETS = {
+    "src.entrypoints": (50, HEAVY),
+    "src.data.get_data": (500, HEAVY),
+    "src.data.simulate_drift": (1_000, HEAVY),
+    "src.data.synthetic": (1_000, HEAVY),
+    "src.features.transform": (1_000, HEAVY),
+    "src.data.quality": (1_000, HEAVY),
+    "src.serve.app": (1_500, HEAVY),
+    "src.models.validate": (4_000, ["sklearn", "shap", "matplotlib", "evidently"]),
+    "src.deployment.promote": (4_000, ["sklearn", "shap", "matplotlib", "evidently"]),
+    "src.models.batch_score": (5_000, ["shap", "matplotlib", "evidently"]),
+    "src.models.train": (6_000, ["shap", "matplotlib", "evidently"]),
+    "src.models.compact": (6_000, ["shap", "matplotlib", "evidently"]),
+    "src.models.backtest": (6_000, ["shap", "matplotlib", "evidently"]),
+    "src.monitoring.generate_drift": (8_000, ["shap", "matplotlib"]),  # evidently needs sklearn
+    "src.monitoring.retrain_policy": (500, HEAVY),
+    "dags/training_dag.py": (8_000, HEAVY),
+    "dags/deployment_dag.py": (8_000, HEAVY),
+    "dags/drift_dag.py": (8_000, HEAVY),
+    "dags/batch_score_dag.py": (8_000, HEAVY),
+}
+
+
+def _code(target: str | None) -> str:
+    if target is None:
+        return "import runpy"  # interpreter startup baseline
+    if target.endswith(".py"):
+        return f"import runpy; runpy.run_path({str(REPO / target)!r})"
+    return f"import {target}"
+
+
+def _run(target: str | None) -> tuple[float, set, subprocess.CompletedProcess]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _code(target)],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+    )
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.add(name.strip().split(".")[0])
+        if not name.startswith("  "):  # imported directly by the target, not a dependency
+            total_us += int(cumulative)
+    return total_us / 1000, modules, proc
+
+
+def measure(target: str) -> dict:
+    """Import `target` in a fresh interpreter; import ms and top-level packages it loaded, both
+    net of interpreter startup."""
+    base_ms, base_modules, _ = _run(None)
+    ms, modules, proc = _run(target)
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode else None
+    return {"ms": max(ms - base_ms, 0.0), "modules": modules - base_modules, "error": error}
+
+
+def check(target: str, scale: float = 1.0) -> dict:
+    budget_ms, forbidden = BUDGETS[target]
+    result = measure(target)
+    if result["error"] and target.endswith(".py") and "airflow" in result["error"]:
+        return {"target": target, "status": "skipped", "reason": "airflow not installed"}
+    problems = []
+    if result["error"]:
+        problems.append(result["error"])
+    if result["ms"] > budget_ms * scale:
+        problems.append(f"{result['ms']:.0f} ms > budget {budget_ms * scale:.0f} ms")
+    eager = sorted(set(forbidden) & result["modules"])
+    if eager:
+        problems.append(f"imports {eager} eagerly")
+    return {
+        "target": target,
+        "status": "fail" if problems else "ok",
+        "ms": round(result["ms"], 1),
+        "budget_ms": budget_ms * scale,
+        "problems": problems,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=list(BUDGETS))
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+    results = [check(t, args.scale) for t in args.targets]
+    for r in results:
+        print(json.dumps(r))
+    return 1 if any(r["status"] == "fail" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())